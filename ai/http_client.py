@@ -0,0 +1,163 @@
+import asyncio
+import atexit
+import json
+import os
+import queue
+import threading
+
+import aiohttp
+
+
+class StreamError(Exception):
+    """Streaming request answered with an error status"""
+
+    def __init__(self, status, body=""):
+        super().__init__(f"Streaming request failed with status code: {status}")
+        self.status = status
+        self.body = body
+
+
+class AsyncHTTPClient:
+    """
+    One event loop in a daemon thread with one pooled aiohttp session.
+    Connections are kept alive and reused across requests, so only the
+    first call to a host pays for the TCP and TLS handshake. Coroutines
+    run on the loop with run(); Streamlit scripts, which have no loop of
+    their own, use run_sync().
+    """
+
+    def __init__(self, pool_size=20, connect_timeout=5, read_timeout=60, keepalive_timeout=60):
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(
+            total=None, connect=connect_timeout, sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self.keepalive_timeout = keepalive_timeout
+        self.session = None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="hf-http-client", daemon=True)
+        self._thread.start()
+
+    async def _get_session(self):
+        """Create the session on first use, inside the loop thread"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self.session
+
+    async def post_json(self, url, headers, payload):
+        """
+        POST a JSON payload
+        Returns (status, parsed JSON body or None)
+        """
+        session = await self._get_session()
+        async with session.post(url, headers=headers, json=payload) as response:
+            try:
+                body = await response.json(content_type=None)
+            except ValueError:
+                body = None
+            return response.status, body
+
+    async def stream_events(self, url, headers, payload):
+        """
+        POST a JSON payload and yield the parsed data: lines of a
+        server-sent event stream as they arrive
+        Raises StreamError for a non-200 status
+        """
+        session = await self._get_session()
+        async with session.post(url, headers=headers, json=payload) as response:
+            if response.status != 200:
+                raise StreamError(response.status, await response.text())
+            async for line in response.content:
+                line = line.decode('utf-8').strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                yield json.loads(data)
+
+    async def get_status(self, url, headers, timeout=None):
+        """Return the status code of a GET request"""
+        session = await self._get_session()
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        async with session.get(url, headers=headers, timeout=request_timeout) as response:
+            return response.status
+
+    def run(self, coroutine):
+        """Schedule a coroutine on the client loop, returns a concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run_sync(self, coroutine, timeout=None):
+        """Run a coroutine on the client loop and wait for its result"""
+        return self.run(coroutine).result(timeout)
+
+    def iterate_sync(self, async_iterator):
+        """
+        Consume an async iterator on the client loop from a plain thread,
+        yielding each item as soon as the loop produces it
+        """
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in async_iterator:
+                    items.put((item, None))
+            except BaseException as e:
+                items.put((done, e))
+                raise
+            items.put((done, None))
+
+        future = self.run(pump())
+        try:
+            while True:
+                item, error = items.get()
+                if item is done:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            # The consumer stopped early, stop producing
+            future.cancel()
+
+    async def _close_session(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    def close(self):
+        """Close pooled connections and stop the loop"""
+        if self.loop.is_running():
+            try:
+                self.run_sync(self._close_session(), timeout=5)
+            except Exception:
+                pass
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+
+
+# One client per process, shared by every HuggingFaceAPI instance
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_http_client():
+    """
+    Return the process-wide HTTP client, configured with HF_POOL_SIZE,
+    HF_CONNECT_TIMEOUT and HF_READ_TIMEOUT (seconds)
+    """
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = AsyncHTTPClient(
+                pool_size=int(os.getenv('HF_POOL_SIZE', '20')),
+                connect_timeout=float(os.getenv('HF_CONNECT_TIMEOUT', '5')),
+                read_timeout=float(os.getenv('HF_READ_TIMEOUT', '60'))
+            )
+            atexit.register(_CLIENT.close)
+        return _CLIENT
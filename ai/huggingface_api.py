@@ -1,17 +1,39 @@
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
-import requests
+import aiohttp
 from typing import Optional, Tuple
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from ai.http_client import get_http_client
+from ai.latency_budget import get_latency_budget
+from ai.response_cache import context_hash, get_response_cache
+
+
+class RetryableAPIError(Exception):
+    """Rate limit or temporary server error (e.g. model still loading)"""
+
 
 class HuggingFaceAPI:
     def __init__(self):
         load_dotenv()
         self.api_key = os.getenv('HUGGINGFACE_API_KEY')
-        self.primary_model = "mistralai/Mistral-7B-Instruct-v0.2"
-        self.fallback_model = "google/flan-t5-base"
-        self.api_url = "https://api-inference.huggingface.co/models/"
+        self.primary_model = os.getenv('PRIMARY_MODEL', "mistralai/Mistral-7B-Instruct-v0.2")
+        self.fallback_model = os.getenv('FALLBACK_MODEL', "google/flan-t5-base")
+        self.max_tokens = int(os.getenv('MAX_TOKENS', '500'))
+        self.temperature = float(os.getenv('TEMPERATURE', '0.7'))
+        self.api_url = os.getenv('HUGGINGFACE_API_URL', "https://api-inference.huggingface.co/models/").rstrip("/") + "/"
+        # Pooled keep-alive connections on a background event loop
+        self.http = get_http_client()
+        # Answers to repeated questions, persisted on disk; None when disabled
+        self.cache = get_response_cache()
+        # Adaptive waits before the fallback is asked in parallel; None when hedging is off
+        self.hedge_budget = get_latency_budget(f"{self.primary_model}:response")
+        self.stream_budget = get_latency_budget(f"{self.primary_model}:first_token")
         self.context = []  # Store conversation context
+        # Latency metrics of streamed responses, most recent last
+        self.last_stream_stats = None
+        self.stream_metrics = []
 
     def _get_headers(self) -> dict:
         """Get headers for API request"""
@@ -20,6 +42,10 @@ class HuggingFaceAPI:
             "Content-Type": "application/json"
         }
 
+    def _context_key(self) -> str:
+        """Hash of the context window _format_prompt puts in the prompt"""
+        return context_hash(self.context[-3:])
+
     def _format_prompt(self, query: str) -> str:
         """Format the prompt for the model with context"""
         # Include recent context in the prompt
@@ -34,56 +60,129 @@ class HuggingFaceAPI:
         
         Please provide a professional, detailed, and contextually relevant response. [/INST]</s>"""
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        retry=retry_if_exception_type((RetryableAPIError, aiohttp.ClientError, asyncio.TimeoutError)),
+        reraise=True
+    )
+    async def _post(self, model: str, payload: dict):
+        """
+        Send an inference request with retry logic
+        Returns the parsed JSON response
+        """
+        status, result = await self.http.post_json(f"{self.api_url}{model}", self._get_headers(), payload)
+        if status == 200:
+            return result
+        if status == 429:
+            raise RetryableAPIError("Rate limit exceeded. Retrying...")
+        if status >= 500:
+            raise RetryableAPIError(f"Server error {status}. Retrying...")
+        raise Exception(f"API request failed with status code: {status}")
+
+    def _extract_text(self, result) -> Optional[str]:
+        """Get the generated text from a text-generation or text2text response"""
+        item = result[0] if isinstance(result, list) and result else result
+        if not isinstance(item, dict):
+            return None
+        text = item.get('generated_text') or item.get('summary_text')
+        if not text:
+            return None
+        # Clean up the response by removing the prompt
+        return text.split("[/INST]")[-1].strip()
+
     async def _query_model(self, model: str, query: str) -> Tuple[Optional[str], str]:
         """
-        Query specific model with retry logic
+        Query specific model
         Returns tuple of (response_text or None, model_name)
         """
         try:
-            url = f"{self.api_url}{model}"
-            headers = self._get_headers()
-            formatted_prompt = self._format_prompt(query)
-            
-            response = requests.post(
-                url,
-                headers=headers,
-                json={"inputs": formatted_prompt, "parameters": {"max_length": 500}}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                # Extract generated text based on model response format
-                if model == self.primary_model:
-                    generated_text = result[0]['generated_text']
-                    # Clean up the response by removing the prompt
-                    response_text = generated_text.split("[/INST]")[-1].strip()
-                    return response_text, model
-                else:
-                    return result[0]['summary_text'], model
-                    
-            elif response.status_code == 429:
-                raise Exception("Rate limit exceeded. Retrying...")
-            else:
-                raise Exception(f"API request failed with status code: {response.status_code}")
-                
-            return None, model
-            
+            payload = {
+                "inputs": self._format_prompt(query),
+                "parameters": {"max_new_tokens": self.max_tokens, "temperature": self.temperature}
+            }
+            result = await self._post(model, payload)
+            return self._extract_text(result), model
         except Exception as e:
             print(f"Error querying {model}: {str(e)}")
             return None, model
 
-    async def get_response(self, query: str) -> Tuple[str, str]:
+    async def _timed(self, coroutine, budget):
+        """
+        Await a primary model call and record how long it took. A call
+        cancelled by a hedge records the time waited so far, so a slow
+        primary keeps pushing the budget up
+        """
+        started = time.perf_counter()
+        try:
+            text, model = await coroutine
+        except asyncio.CancelledError:
+            if budget is not None:
+                budget.record(time.perf_counter() - started)
+            raise
+        if text and budget is not None:
+            budget.record(time.perf_counter() - started)
+        return text, model
+
+    async def _hedge(self, primary, query: str, budget) -> Tuple[Optional[str], str]:
+        """
+        Race a primary model call against the fallback model. The fallback
+        starts when the primary fails or, with hedging on, has not answered
+        within the latency budget; the first answer wins and the other call
+        is cancelled
+        Returns tuple of (response_text or None, model_used)
+        """
+        pending = {asyncio.ensure_future(self._timed(primary, budget))}
+        timeout = budget.budget() if budget is not None else None
+        fallback_started = hedged = False
+        text, model = None, self.primary_model
+        if budget is not None:
+            budget.count('requests')
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=None if fallback_started else timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    text, model = task.result()
+                    if text:
+                        if hedged:
+                            budget.count('primary_wins' if model == self.primary_model else 'fallback_wins')
+                        return text, model
+                if not fallback_started:
+                    # Nothing finished in time: hedge, otherwise the primary failed
+                    if not done:
+                        hedged = True
+                        budget.count('hedged')
+                    fallback_started = True
+                    pending.add(asyncio.ensure_future(self._query_model(self.fallback_model, query)))
+            return None, model
+        finally:
+            # Cancel the loser and wait until its connection is released
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def get_response_async(self, query: str) -> Tuple[str, str]:
         """
         Get response from Hugging Face model with fallback
         Returns tuple of (response_text, model_used)
         """
-        # Try primary model first
-        response, model = await self._query_model(self.primary_model, query)
-        
-        # If primary model fails, try fallback model
+        # Repeated question in the same context: answer from the cache
+        context_key = self._context_key()
+        response = None
+        if self.cache is not None:
+            response = await asyncio.to_thread(self.cache.get, query, self.primary_model, context_key)
+        model = self.primary_model
+
+        # Try primary model first, the fallback when it fails or is slow
         if not response:
-            response, model = await self._query_model(self.fallback_model, query)
+            response, model = await self._hedge(
+                self._query_model(self.primary_model, query), query, self.hedge_budget
+            )
+            # Fallback answers are not cached, they must not outlive an outage
+            if response and model == self.primary_model and self.cache is not None:
+                await asyncio.to_thread(self.cache.put, query, model, response, context_key)
             
         # Update conversation context if we got a response
         if response:
@@ -93,20 +192,126 @@ class HuggingFaceAPI:
             
         return response or "I apologize, but I'm unable to process your request at the moment. Please try again later.", model
 
+    def get_response(self, query: str) -> Tuple[str, str]:
+        """
+        Blocking get_response_async for Streamlit scripts
+        Returns tuple of (response_text, model_used)
+        """
+        return self.http.run_sync(self.get_response_async(query))
+
+    async def _stream_model(self, model: str, query: str):
+        """Yield the text of each token as the model generates it"""
+        payload = {
+            "inputs": self._format_prompt(query),
+            "parameters": {"max_new_tokens": self.max_tokens, "temperature": self.temperature},
+            "stream": True
+        }
+        async for event in self.http.stream_events(f"{self.api_url}{model}", self._get_headers(), payload):
+            if event.get('error'):
+                raise Exception(event['error'])
+            token = event.get('token') or {}
+            # End-of-sequence and other control tokens carry no text
+            if token.get('text') and not token.get('special'):
+                yield token['text']
+
+    async def stream_response_async(self, query: str):
+        """
+        Stream the answer token by token, with the cache and fallback of
+        get_response_async. Yields text pieces; time to first token and
+        tokens per second end up in last_stream_stats
+        """
+        started = time.perf_counter()
+        stats = {
+            'model': self.primary_model, 'cached': False, 'ttft_ms': None,
+            'tokens': 0, 'tokens_per_second': None, 'total_ms': None, 'error': None
+        }
+        self.last_stream_stats = stats
+        context_key = self._context_key()
+        pieces = []
+
+        def first_piece():
+            stats['ttft_ms'] = (time.perf_counter() - started) * 1000
+
+        cached = None
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, query, self.primary_model, context_key)
+        if cached:
+            stats['cached'] = True
+            first_piece()
+            pieces.append(cached)
+            yield cached
+        else:
+            stream = self._stream_model(self.primary_model, query)
+
+            async def first_token():
+                try:
+                    return await stream.__anext__(), self.primary_model
+                except StopAsyncIteration:
+                    return None, self.primary_model
+                except Exception as e:
+                    print(f"Error streaming {self.primary_model}: {str(e)}")
+                    stats['error'] = str(e)
+                    return None, self.primary_model
+
+            # The fallback answers in one piece if the first token fails or is late
+            first, model = await self._hedge(first_token(), query, self.stream_budget)
+            stats['model'] = model
+            if first and model == self.primary_model:
+                first_piece()
+                stats['tokens'] += 1
+                pieces.append(first)
+                yield first
+                try:
+                    async for piece in stream:
+                        stats['tokens'] += 1
+                        pieces.append(piece)
+                        yield piece
+                except Exception as e:
+                    # A stream cut off midway keeps what was already shown
+                    print(f"Error streaming {self.primary_model}: {str(e)}")
+                    stats['error'] = str(e)
+
+                if not stats['error'] and self.cache is not None:
+                    await asyncio.to_thread(self.cache.put, query, self.primary_model, "".join(pieces).strip(), context_key)
+            else:
+                await stream.aclose()
+                if first:
+                    stats['error'] = None
+                    first_piece()
+                    pieces.append(first)
+                    yield first
+
+        # Update conversation context if we got a response
+        response = "".join(pieces).strip()
+        if response:
+            self.context.append((query, response))
+            self.context = self.context[-5:]
+
+        stats['total_ms'] = (time.perf_counter() - started) * 1000
+        # Decoding speed after the first token
+        if stats['tokens'] > 1 and stats['total_ms'] > stats['ttft_ms']:
+            stats['tokens_per_second'] = (stats['tokens'] - 1) / ((stats['total_ms'] - stats['ttft_ms']) / 1000)
+        self.stream_metrics = (self.stream_metrics + [stats])[-100:]
+
+    def stream_response(self, query: str):
+        """Blocking iterator over stream_response_async for Streamlit scripts"""
+        return self.http.iterate_sync(self.stream_response_async(query))
+
     def get_model_info(self) -> dict:
         """Get information about currently used models and API status"""
         api_status = "active" if self.api_key else "inactive"
         if api_status == "active":
             try:
                 # Test API connection
-                response = requests.get(
+                status = self.http.run_sync(self.http.get_status(
                     f"{self.api_url}{self.primary_model}",
-                    headers=self._get_headers()
-                )
-                if response.status_code == 200:
+                    self._get_headers(),
+                    timeout=5
+                ))
+                if status == 200:
                     api_status = "connected"
                 else:
-                    api_status = f"error (status: {response.status_code})"
+                    api_status = f"error (status: {status})"
             except Exception as e:
                 api_status = f"error ({str(e)})"
 
@@ -114,7 +319,12 @@ class HuggingFaceAPI:
             "primary_model": self.primary_model,
             "fallback_model": self.fallback_model,
             "api_status": api_status,
-            "context_length": len(self.context)
+            "context_length": len(self.context),
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "hedging": {
+                "response": self.hedge_budget.stats(),
+                "first_token": self.stream_budget.stats()
+            } if self.hedge_budget is not None else None
         }
 
     def clear_context(self):
@@ -122,16 +332,35 @@ class HuggingFaceAPI:
         self.context = []
         return True
 
-    def get_field_suggestion(self, field_name: str, form_type: str) -> str:
+    def _suggestion_prompt(self, field_name: str, form_type: str, variant: int = 0) -> str:
+        """Prompt asking for an example value; variants ask for different examples"""
+        prompt = f"""Please provide a professional example or suggestion for the {field_name} field 
+        in a {form_type} form. Keep it concise and relevant to ISO management systems."""
+        if variant:
+            prompt += f" Give a different example than the usual one (variation {variant + 1})."
+        return prompt
+
+    async def fetch_field_suggestion(self, field_name: str, form_type: str, variant: int = 0) -> Optional[str]:
+        """
+        Ask the model for a field example
+        Returns the suggestion, or None if the model did not answer
+        """
+        response, _ = await self._query_model(
+            self.fallback_model, self._suggestion_prompt(field_name, form_type, variant)
+        )
+        return response
+
+    async def get_field_suggestion_async(self, field_name: str, form_type: str) -> str:
         """
         Get AI suggestion for form fields
         Returns suggested text for the field
         """
-        prompt = f"""Please provide a professional example or suggestion for the {field_name} field 
-        in a {form_type} form. Keep it concise and relevant to ISO management systems."""
-        
         try:
-            response, _ = await self._query_model(self.fallback_model, prompt)
+            response = await self.fetch_field_suggestion(field_name, form_type)
             return response or f"Example {field_name}"
         except:
             return f"Example {field_name}"
+
+    def get_field_suggestion(self, field_name: str, form_type: str) -> str:
+        """Blocking get_field_suggestion_async for Streamlit scripts"""
+        return self.http.run_sync(self.get_field_suggestion_async(field_name, form_type))
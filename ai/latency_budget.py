@@ -0,0 +1,80 @@
+import math
+import os
+import threading
+from collections import deque
+
+from logic.config import env_flag
+
+
+class LatencyBudget:
+    """
+    How long to wait for the primary model before also asking the fallback.
+    Recent primary latencies are kept in a sliding window; once enough are
+    seen the budget is their p95 (clamped to min/max), before that the
+    initial budget. Counters record how often a hedge was fired and which
+    model won it.
+    """
+
+    def __init__(self, initial=5.0, minimum=1.0, maximum=30.0, percentile=95, window=200, min_samples=20):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=window)
+        self.counters = {'requests': 0, 'hedged': 0, 'primary_wins': 0, 'fallback_wins': 0}
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        """Add one observed primary latency"""
+        with self.lock:
+            self.samples.append(seconds)
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def budget(self):
+        """Return the current latency budget in seconds"""
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return self.initial
+            ordered = sorted(self.samples)
+        index = max(math.ceil(len(ordered) * self.percentile / 100) - 1, 0)
+        return min(max(ordered[index], self.minimum), self.maximum)
+
+    def stats(self):
+        """
+        Summarize hedging
+        Returns dict with budget, samples and the request/hedge counters
+        """
+        budget = self.budget()
+        with self.lock:
+            stats = dict(self.counters)
+            stats['samples'] = len(self.samples)
+        stats['budget'] = budget
+        return stats
+
+
+# One budget per model and request kind, shared by every HuggingFaceAPI instance
+_BUDGETS = {}
+_BUDGETS_LOCK = threading.Lock()
+
+
+def get_latency_budget(name):
+    """
+    Return the process-wide budget for name, or None if AI_HEDGING is off.
+    Configured with AI_HEDGE_BUDGET (initial), AI_HEDGE_MIN_BUDGET,
+    AI_HEDGE_MAX_BUDGET (seconds) and AI_HEDGE_PERCENTILE
+    """
+    if not env_flag('AI_HEDGING'):
+        return None
+    with _BUDGETS_LOCK:
+        if name not in _BUDGETS:
+            _BUDGETS[name] = LatencyBudget(
+                initial=float(os.getenv('AI_HEDGE_BUDGET', '5')),
+                minimum=float(os.getenv('AI_HEDGE_MIN_BUDGET', '1')),
+                maximum=float(os.getenv('AI_HEDGE_MAX_BUDGET', '30')),
+                percentile=float(os.getenv('AI_HEDGE_PERCENTILE', '95'))
+            )
+        return _BUDGETS[name]
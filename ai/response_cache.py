@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def normalize_query(query):
+    """Canonical form of a question: case, spacing and end punctuation ignored"""
+    text = unicodedata.normalize('NFKC', str(query or "")).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!. ")
+
+
+def context_hash(context):
+    """Hash of the conversation turns that go into the prompt"""
+    encoded = json.dumps(context, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    Model answers kept in SQLite, keyed by normalized question, model and
+    context hash, so repeated questions skip the remote call and the cache
+    survives restarts. Entries expire after ttl seconds; beyond
+    max_entries the least recently used ones are evicted. Hit and miss
+    counters are stored with the entries.
+    """
+
+    def __init__(self, db_file, max_entries=1000, ttl=7 * 24 * 60 * 60):
+        self.db_file = Path(db_file)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.initialize()
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection that commits on success"""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def initialize(self):
+        """Create schema and indexes"""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            # Eviction walks entries least recently used first
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_stats (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_stats (key, value) VALUES (?, 0)",
+                [('hits',), ('misses',), ('evictions',), ('expired',)]
+            )
+
+    def make_key(self, query, model, context_key=""):
+        """Return the cache key for a question asked of a model in a context"""
+        encoded = json.dumps([normalize_query(query), model, context_key], ensure_ascii=False)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def _count(self, conn, counter, amount=1):
+        conn.execute("UPDATE cache_stats SET value = value + ? WHERE key = ?", (amount, counter))
+
+    def get(self, query, model, context_key=""):
+        """Return the cached answer, or None on a miss or an expired entry"""
+        key = self.make_key(query, model, context_key)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row['created'] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count(conn, 'expired')
+                row = None
+            if row is None:
+                self._count(conn, 'misses')
+                return None
+            conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._count(conn, 'hits')
+            return row['response']
+
+    def put(self, query, model, response, context_key=""):
+        """Store an answer, evicting least recently used entries beyond max_entries"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, query, model, response, created, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (self.make_key(query, model, context_key), normalize_query(query), model, response, now, now)
+            )
+            excess = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                self._count(conn, 'evictions', excess)
+
+    def purge_expired(self):
+        """Delete expired entries, returns how many were removed"""
+        with self._connect() as conn:
+            removed = conn.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+            ).rowcount
+            self._count(conn, 'expired', removed)
+        return removed
+
+    def clear(self):
+        """Drop all cached answers and reset the counters"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+            conn.execute("UPDATE cache_stats SET value = 0")
+
+    def stats(self):
+        """
+        Summarize cache effectiveness
+        Returns dict with entries, hits, misses, hit_rate, evictions and expired
+        """
+        with self._connect() as conn:
+            stats = {row['key']: row['value'] for row in conn.execute("SELECT key, value FROM cache_stats")}
+            stats['entries'] = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+# One cache per database file, shared by every HuggingFaceAPI instance
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Return the process-wide response cache configured with AI_CACHE_PATH,
+    AI_CACHE_MAX_ENTRIES and AI_CACHE_TTL (seconds), or None if
+    AI_CACHE_MAX_ENTRIES is 0
+    """
+    max_entries = int(os.getenv('AI_CACHE_MAX_ENTRIES', '1000'))
+    if max_entries <= 0:
+        return None
+    db_file = str(Path(os.getenv('AI_CACHE_PATH', "data/ai_cache.db")).resolve())
+    with _CACHES_LOCK:
+        if db_file not in _CACHES:
+            _CACHES[db_file] = ResponseCache(
+                db_file, max_entries, int(os.getenv('AI_CACHE_TTL', str(7 * 24 * 60 * 60)))
+            )
+        return _CACHES[db_file]
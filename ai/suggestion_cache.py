@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# (field, form type) pairs behind the help buttons of FormISOPage
+FIELD_SUGGESTIONS = [
+    ("Nomor SOP", "SOP Produksi"),
+    ("Judul SOP", "SOP Produksi"),
+    ("Area Kerja", "HIRARC"),
+    ("Identifikasi Bahaya", "HIRARC"),
+    ("Pengendalian", "HIRARC"),
+    ("Nomor Audit", "Audit Internal"),
+    ("Temuan Audit", "Audit Internal"),
+    ("Tindakan Perbaikan", "Audit Internal")
+]
+
+
+class SuggestionCache:
+    """
+    AI examples for form fields, generated ahead of time. A daemon thread
+    fills several variants per (field, form type) pair at startup and
+    refreshes them periodically; help button clicks are answered from
+    memory, rotating through the variants. The model is only called
+    when a pair has nothing cached yet. Variants are saved to disk so a
+    restart starts warm.
+    """
+
+    def __init__(self, api, cache_file, pairs=None, variants=3, refresh_interval=24 * 60 * 60, concurrency=4):
+        self.api = api
+        self.cache_file = Path(cache_file)
+        self.pairs = pairs or FIELD_SUGGESTIONS
+        self.variants = variants
+        self.refresh_interval = refresh_interval
+        self.concurrency = concurrency
+        # "field|form type" -> {'variants': [...], 'updated': time of the last
+        # warm round, None for a pair only answered by a cold click}
+        self.entries = self._load()
+        self._next_variant = {}
+        self.lock = threading.Lock()
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _key(self, field_name, form_type):
+        return f"{field_name}|{form_type}"
+
+    def _load(self):
+        """Load variants generated by an earlier process"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        """Write variants atomically"""
+        with self.lock:
+            entries = dict(self.entries)
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # A temp file of its own, clicks and the warm thread may save at once
+        fd, temp_path = tempfile.mkstemp(prefix=self.cache_file.name + ".", suffix=".tmp", dir=self.cache_file.parent)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False, indent=4)
+            os.replace(temp_path, self.cache_file)
+        except Exception:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+
+    def get(self, field_name, form_type):
+        """Return a suggestion for a field, from memory whenever possible"""
+        key = self._key(field_name, form_type)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry['variants']:
+                # Each click shows the next example
+                index = self._next_variant.get(key, 0) % len(entry['variants'])
+                self._next_variant[key] = index + 1
+                return entry['variants'][index]
+
+        # Cold pair: ask the model once and keep the answer
+        suggestion = self.api.http.run_sync(self.api.fetch_field_suggestion(field_name, form_type))
+        if not suggestion:
+            return f"Example {field_name}"
+        with self.lock:
+            self.entries.setdefault(key, {'variants': [], 'updated': None})['variants'].append(suggestion)
+        self._save()
+        return suggestion
+
+    def is_stale(self, field_name, form_type):
+        """
+        Check whether a pair was never warmed or is due for a refresh. A warm
+        round may keep fewer variants than asked for, as repeated answers are
+        dropped, so the variant count alone does not make a pair stale
+        """
+        entry = self.entries.get(self._key(field_name, form_type))
+        return (
+            not entry
+            or not entry.get('updated')
+            or time.time() - entry['updated'] > self.refresh_interval
+        )
+
+    async def _generate(self, field_name, form_type, semaphore):
+        """Generate all variants of one pair, at most `concurrency` calls at a time"""
+        async def variant(number):
+            async with semaphore:
+                return await self.api.fetch_field_suggestion(field_name, form_type, number)
+
+        results = await asyncio.gather(*(variant(number) for number in range(self.variants)))
+        # Distinct answers only, in variant order
+        return list(dict.fromkeys(text for text in results if text))
+
+    async def _warm(self, pairs):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._generate(field, form, semaphore) for field, form in pairs))
+        return dict(zip(pairs, results))
+
+    def warm(self, force=False):
+        """
+        Generate variants for every stale pair (all pairs with force)
+        Returns the number of pairs updated
+        """
+        pairs = [pair for pair in self.pairs if force or self.is_stale(*pair)]
+        if not pairs:
+            return 0
+
+        updated = 0
+        for (field_name, form_type), variants in self.api.http.run_sync(self._warm(pairs)).items():
+            # Keep the old variants if the model did not answer
+            if not variants:
+                continue
+            with self.lock:
+                self.entries[self._key(field_name, form_type)] = {'variants': variants, 'updated': time.time()}
+            updated += 1
+        if updated:
+            self._save()
+        return updated
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.warm()
+                self.last_error = None
+            except Exception as e:
+                # Suggestions are a convenience, a failed round is retried later
+                self.last_error = str(e)
+            # Re-check often enough to retry pairs the model did not answer
+            if self._stop_event.wait(min(self.refresh_interval, 15 * 60)):
+                break
+
+    def start(self):
+        """Start warming and refreshing in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="ai-suggestion-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current round"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+# One cache per process, shared by every FormISOPage
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def start_suggestion_cache(api):
+    """
+    Start (once per process) the suggestion cache, configured with
+    AI_SUGGESTIONS_PATH, AI_SUGGESTION_VARIANTS and AI_SUGGESTION_REFRESH (seconds)
+    """
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = SuggestionCache(
+                api,
+                os.getenv('AI_SUGGESTIONS_PATH', "data/ai_suggestions.json"),
+                variants=int(os.getenv('AI_SUGGESTION_VARIANTS', '3')),
+                refresh_interval=int(os.getenv('AI_SUGGESTION_REFRESH', str(24 * 60 * 60)))
+            )
+        # Without an API key every warm-up call would fail
+        if api.api_key:
+            _CACHE.start()
+        return _CACHE
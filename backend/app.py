@@ -4,6 +4,7 @@ from pathlib import Path
 from streamlit_lottie import st_lottie
 import requests
 import json
+from logic.storage_backend import get_upload_path
 
 # Set page config
 st.set_page_config(
@@ -95,7 +96,7 @@ def sidebar_navigation():
         # Enhanced system status
         with st.expander("System Status"):
             # Check if data directory exists
-            data_status = "active" if Path("data/uploads").exists() else "inactive"
+            data_status = "active" if get_upload_path().exists() else "inactive"
             # Check if .env exists for AI service
             ai_status = "active" if Path(".env").exists() else "inactive"
             
@@ -226,7 +227,7 @@ def home_page():
 def main():
     """Main function to run the application"""
     # Create required directories if they don't exist
-    Path("data/uploads").mkdir(parents=True, exist_ok=True)
+    get_upload_path().mkdir(parents=True, exist_ok=True)
     
     # Apply custom CSS for modern styling
     st.markdown("""
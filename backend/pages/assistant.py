@@ -1,12 +1,20 @@
 import streamlit as st
 from ai.huggingface_api import HuggingFaceAPI
-import time
 from datetime import datetime
 
 class AIAssistantPage:
     def __init__(self):
         self.ai = HuggingFaceAPI()
 
+    def format_metrics(self, stats):
+        """Describe the latency of a streamed response"""
+        if stats['cached']:
+            return "⚡ dari cache"
+        metrics = f"⏱️ token pertama {stats['ttft_ms']:.0f} ms"
+        if stats['tokens_per_second']:
+            metrics += f" | {stats['tokens_per_second']:.1f} token/detik"
+        return metrics
+
     def render(self):
         st.header("AI Assistant ISO 24/7")
         
@@ -59,7 +67,10 @@ class AIAssistantPage:
                 if message["role"] == "assistant":
                     # For assistant messages, show timestamp and model info
                     st.markdown(message["content"])
-                    st.caption(f"🕒 {message['timestamp']} | 🤖 {message['model']}")
+                    caption = f"🕒 {message['timestamp']} | 🤖 {message['model']}"
+                    if message.get("metrics"):
+                        caption += f" | {message['metrics']}"
+                    st.caption(caption)
                 else:
                     # For user messages, just show the content
                     st.markdown(message["content"])
@@ -77,50 +88,56 @@ class AIAssistantPage:
             with st.chat_message("user"):
                 st.markdown(prompt)
 
-            # Display assistant response with loading spinner
+            # Display assistant response as it is generated
             with st.chat_message("assistant"):
                 message_placeholder = st.empty()
+                message_placeholder.markdown("▌")
                 full_response = ""
                 
-                with st.spinner("AI Assistant sedang menyiapkan jawaban..."):
-                    try:
-                        response, model = self.ai.get_response(prompt)
+                try:
+                    # Tokens are shown as soon as the model produces them
+                    for piece in self.ai.stream_response(prompt):
+                        full_response += piece
+                        message_placeholder.markdown(full_response + "▌")
+                    response = full_response.strip()
+                    stats = self.ai.last_stream_stats
+                    
+                    if response:
+                        model = stats['model']
+                        metrics = self.format_metrics(stats)
+                        
+                        # Format the final response
+                        timestamp = datetime.now().strftime("%H:%M:%S")
+                        formatted_response = f"{response}\n\n---\n*Response generated using {model}*"
                         
-                        if response:
-                            # Simulate typing effect
-                            for chunk in response.split():
-                                full_response += chunk + " "
-                                time.sleep(0.05)  # Adjust speed as needed
-                                message_placeholder.markdown(full_response + "▌")
-                            
-                            # Format the final response
-                            timestamp = datetime.now().strftime("%H:%M:%S")
-                            formatted_response = f"{response}\n\n---\n*Response generated using {model}*"
-                            
-                            # Add to chat history
-                            st.session_state.chat_history.append({
-                                "role": "assistant",
-                                "content": formatted_response,
-                                "timestamp": timestamp,
-                                "model": model
-                            })
-                            
-                            # Display final response
-                            message_placeholder.markdown(formatted_response)
-                            
-                        else:
-                            error_message = """
-                            Maaf, saya mengalami kesulitan dalam memproses permintaan Anda.
-                            Silakan coba lagi atau ajukan pertanyaan yang berbeda.
-                            """
-                            message_placeholder.error(error_message)
-                            
-                    except Exception as e:
-                        error_message = f"""
-                        Terjadi kesalahan dalam memproses permintaan Anda.
-                        Detail: {str(e)}
+                        # Add to chat history
+                        st.session_state.chat_history.append({
+                            "role": "assistant",
+                            "content": formatted_response,
+                            "timestamp": timestamp,
+                            "model": model,
+                            "metrics": metrics
+                        })
+                        
+                        # Display final response
+                        message_placeholder.markdown(formatted_response)
+                        st.caption(f"🕒 {timestamp} | 🤖 {model} | {metrics}")
+                        if stats['error']:
+                            st.warning("⚠️ Jawaban terputus sebelum selesai")
+                        
+                    else:
+                        error_message = """
+                        Maaf, saya mengalami kesulitan dalam memproses permintaan Anda.
+                        Silakan coba lagi atau ajukan pertanyaan yang berbeda.
                         """
                         message_placeholder.error(error_message)
+                        
+                except Exception as e:
+                    error_message = f"""
+                    Terjadi kesalahan dalam memproses permintaan Anda.
+                    Detail: {str(e)}
+                    """
+                    message_placeholder.error(error_message)
 
         # Sidebar controls
         with st.sidebar:
@@ -160,6 +177,19 @@ class AIAssistantPage:
             st.write(f"📡 Status API: {model_info['api_status']}")
             if 'context_length' in model_info:
                 st.write(f"💭 Konteks: {model_info['context_length']} pesan")
+            if model_info.get('cache'):
+                cache = model_info['cache']
+                st.write(
+                    f"⚡ Cache: {cache['hits']} hit / {cache['misses']} miss "
+                    f"({cache['hit_rate']:.0%}), {cache['entries']} jawaban tersimpan"
+                )
+            if model_info.get('hedging'):
+                hedging = model_info['hedging']['first_token']
+                st.write(
+                    f"🏁 Hedging: batas {hedging['budget']:.1f} detik, "
+                    f"{hedging['hedged']}/{hedging['requests']} permintaan ke model cadangan, "
+                    f"cadangan menang {hedging['fallback_wins']}x"
+                )
 
 def render_page():
     assistant = AIAssistantPage()
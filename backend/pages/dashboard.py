@@ -3,8 +3,12 @@ import pandas as pd
 from datetime import datetime, timedelta
 import json
 from logic.data_handler import DataHandler
-import io
-import base64
+from logic.export import EXPORT_FORMATS, export_file
+from logic.frame_loader import drop_unused_categories
+from logic.search_index import SEARCH_FIELDS
+
+# Days of data shown before the user picks a date range
+DEFAULT_WINDOW_DAYS = 30
 
 class DashboardPage:
     def __init__(self):
@@ -20,24 +24,24 @@ class DashboardPage:
         </div>
         """, unsafe_allow_html=True)
 
-        # Load data
-        data = self.data_handler.load_forms_data()
-        if not data:
+        # Date range of stored data, read from the partition manifest
+        bounds = self.data_handler.get_date_bounds()
+        if not bounds:
             st.info("🔍 Belum ada data tersimpan. Silakan isi form terlebih dahulu.")
             return
 
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-
-        # Filters
-        self.render_filters(df)
+        # Filters, only the selected date range is loaded; None when the
+        # unfiltered view is served from the aggregates alone
+        df = self.render_filters(bounds)
+        if df is not None and df.empty:
+            st.info("🔍 Tidak ada data pada rentang filter yang dipilih.")
+            return
 
         # Summary metrics
         self.render_summary_metrics(df)
 
         # Display metrics and charts in tabs
-        tab1, tab2, tab3 = st.tabs(["📊 Distribusi", "📈 Tren", "📋 Detail Data"])
+        tab1, tab2, tab3, tab4 = st.tabs(["📊 Distribusi", "📈 Tren", "📋 Detail Data", "🔎 Pencarian"])
         
         with tab1:
             self.render_distribution_charts(df)
@@ -48,19 +52,29 @@ class DashboardPage:
         with tab3:
             self.render_detailed_data(df)
 
-    def render_filters(self, df):
-        """Render filter controls"""
+        with tab4:
+            self.render_search()
+
+    def render_filters(self, bounds):
+        """
+        Render filter controls
+        Returns the DataFrame for the selected filters, or None when nothing
+        narrows the data and the aggregates answer everything
+        """
+        aggregates = self.data_handler.get_aggregates()
+
         with st.expander("🔍 Filter Data", expanded=True):
             col1, col2, col3 = st.columns(3)
 
             with col1:
-                # Date range filter
-                min_date = df['timestamp'].min().date()
-                max_date = df['timestamp'].max().date()
+                # Date range filter, defaulting to the most recent days so the
+                # first load reads only the newest partitions
+                min_date = bounds[0].date()
+                max_date = bounds[1].date()
                 
                 start_date = st.date_input(
                     "Dari Tanggal",
-                    value=min_date,
+                    value=max(min_date, max_date - timedelta(days=DEFAULT_WINDOW_DAYS)),
                     min_value=min_date,
                     max_value=max_date,
                     key="dashboard_start_date"
@@ -77,7 +91,7 @@ class DashboardPage:
 
             with col3:
                 # Department filter
-                departments = df['departemen'].unique().tolist()
+                departments = sorted(aggregates['departments'])
                 selected_dept = st.multiselect(
                     "Departemen",
                     departments,
@@ -85,52 +99,78 @@ class DashboardPage:
                 )
 
             # Form type filter
-            form_types = df['jenis_form'].unique().tolist()
+            form_types = sorted(aggregates['form_types'])
             selected_forms = st.multiselect(
                 "Jenis Formulir",
                 form_types,
                 key="dashboard_form_type"
             )
 
-            # Apply filters
-            filtered_df = df.copy()
-            
-            if start_date:
-                filtered_df = filtered_df[filtered_df['timestamp'].dt.date >= start_date]
-            if end_date:
-                filtered_df = filtered_df[filtered_df['timestamp'].dt.date <= end_date]
-            if selected_dept:
-                filtered_df = filtered_df[filtered_df['departemen'].isin(selected_dept)]
-            if selected_forms:
-                filtered_df = filtered_df[filtered_df['jenis_form'].isin(selected_forms)]
+            filters_active = bool(
+                start_date > min_date or end_date < max_date or selected_dept or selected_forms
+            )
+            filtered_df = None
+            if filters_active:
+                # Load only the partitions overlapping the date range
+                filtered_df = self.data_handler.get_dashboard_data(
+                    start_date=start_date,
+                    end_date=datetime.combine(end_date, datetime.max.time())
+                )
+
+                if not filtered_df.empty:
+                    if selected_dept:
+                        filtered_df = filtered_df[filtered_df['departemen'].isin(selected_dept)]
+                    if selected_forms:
+                        filtered_df = filtered_df[filtered_df['jenis_form'].isin(selected_forms)]
+                    filtered_df = drop_unused_categories(filtered_df)
 
             # Update session state with filtered data
             st.session_state.filtered_df = filtered_df
+            st.session_state.dashboard_filters_active = filters_active
+
+        return filtered_df
+
+    def compute_summary_metrics(self, df):
+        """Compute summary counters from a (filtered) DataFrame"""
+        return {
+            'total': len(df),
+            'today': len(df) - len(df[df['timestamp'].dt.date < datetime.now().date()]),
+            'departments': df['departemen'].nunique(),
+            'high_risk': len(df[df['tingkat_risiko'] == 'Tinggi']) if 'tingkat_risiko' in df.columns else 0,
+            'completed': len(df[df['status'] == 'Completed']) if 'status' in df.columns else None
+        }
 
     def render_summary_metrics(self, df):
         """Render summary metrics"""
         if 'filtered_df' in st.session_state:
             df = st.session_state.filtered_df
 
+        # Unfiltered view reads the incrementally maintained aggregates
+        overall = self.data_handler.get_summary_metrics()
+        if st.session_state.get('dashboard_filters_active', True):
+            metrics = self.compute_summary_metrics(df)
+        else:
+            metrics = overall
+
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             st.metric(
                 "Total Form",
-                len(df),
-                f"{len(df) - len(df[df['timestamp'].dt.date < datetime.now().date()])} hari ini"
+                metrics['total'],
+                f"{metrics['today']} hari ini"
             )
             
         with col2:
-            dept_count = df['departemen'].nunique()
+            dept_count = metrics['departments']
             st.metric(
                 "Departemen Aktif",
                 dept_count,
-                f"{dept_count}/{len(df['departemen'].unique())} total"
+                f"{dept_count}/{overall['departments']} total"
             )
             
         with col3:
-            risk_high = len(df[df['tingkat_risiko'] == 'Tinggi']) if 'tingkat_risiko' in df.columns else 0
+            risk_high = metrics['high_risk']
             st.metric(
                 "Risiko Tinggi",
                 risk_high,
@@ -139,8 +179,8 @@ class DashboardPage:
             
         with col4:
             completion_rate = (
-                len(df[df['status'] == 'Completed']) / len(df) * 100
-                if 'status' in df.columns else 100
+                metrics['completed'] / metrics['total'] * 100
+                if metrics['completed'] is not None and metrics['total'] else 100
             )
             st.metric(
                 "Tingkat Penyelesaian",
@@ -153,12 +193,17 @@ class DashboardPage:
         if 'filtered_df' in st.session_state:
             df = st.session_state.filtered_df
 
+        filters_active = st.session_state.get('dashboard_filters_active', True)
+
         col1, col2 = st.columns(2)
         
         with col1:
             # Form type distribution
             st.subheader("Distribusi Jenis Formulir")
-            form_counts = df['jenis_form'].value_counts()
+            if filters_active:
+                form_counts = df['jenis_form'].value_counts()
+            else:
+                form_counts = self.data_handler.get_form_types_count()
             st.pie_chart(form_counts)
             
             # Show counts in a table
@@ -172,16 +217,23 @@ class DashboardPage:
         with col2:
             # Department distribution
             st.subheader("Distribusi per Departemen")
-            dept_counts = df['departemen'].value_counts()
+            if filters_active:
+                dept_counts = df['departemen'].value_counts()
+            else:
+                dept_counts = self.data_handler.get_department_counts()
             st.bar_chart(dept_counts)
             
             # Risk levels by department (if HIRARC data exists)
-            if 'tingkat_risiko' in df.columns:
+            if (filters_active and 'tingkat_risiko' in df.columns) or \
+                    (not filters_active and self.data_handler.get_aggregates()['risk_by_department']):
                 st.markdown("##### Tingkat Risiko per Departemen")
-                risk_by_dept = pd.crosstab(
-                    df['departemen'],
-                    df['tingkat_risiko']
-                )
+                if filters_active:
+                    risk_by_dept = pd.crosstab(
+                        df['departemen'],
+                        df['tingkat_risiko']
+                    )
+                else:
+                    risk_by_dept = self.data_handler.get_risk_levels_by_department()
                 st.bar_chart(risk_by_dept)
 
     def render_trend_charts(self, df):
@@ -192,61 +244,64 @@ class DashboardPage:
         st.subheader("Tren Pengisian Form")
         
         # Daily submissions trend
-        daily_submissions = df.groupby(df['timestamp'].dt.date).size()
+        if df is not None:
+            daily_submissions = df.groupby(df['timestamp'].dt.date).size()
+        else:
+            daily_submissions = self.data_handler.get_submissions_trend()
         st.line_chart(daily_submissions)
         
         col1, col2 = st.columns(2)
         
         with col1:
             # Weekly trend
-            weekly_submissions = df.groupby(df['timestamp'].dt.isocalendar().week).size()
+            if df is not None:
+                weekly_submissions = df.groupby(df['timestamp'].dt.isocalendar().week).size()
+            else:
+                weekly_submissions = daily_submissions.groupby(daily_submissions.index.isocalendar().week).sum()
             st.markdown("##### Tren Mingguan")
             st.line_chart(weekly_submissions)
             
         with col2:
             # Department activity trend
-            dept_weekly = pd.crosstab(
-                df['timestamp'].dt.isocalendar().week,
-                df['departemen']
-            )
             st.markdown("##### Aktivitas Departemen")
-            st.line_chart(dept_weekly)
+            if df is not None:
+                dept_weekly = pd.crosstab(
+                    df['timestamp'].dt.isocalendar().week,
+                    df['departemen']
+                )
+                st.line_chart(dept_weekly)
+            else:
+                st.caption("Pilih rentang tanggal untuk melihat aktivitas per departemen.")
 
     def render_detailed_data(self, df):
         """Render detailed data view with export options"""
         if 'filtered_df' in st.session_state:
-            df = st.session_state.filtered_data
+            df = st.session_state.filtered_df
 
         st.subheader("Data Detail")
-        
+
+        # Rows are only loaded for a narrowed selection
+        if df is None:
+            st.info("📅 Pilih rentang tanggal, departemen atau jenis formulir untuk menampilkan dan mengekspor data.")
+            return
+
         # Export buttons
         col1, col2 = st.columns([1, 4])
         with col1:
             export_format = st.selectbox(
                 "Format Export",
-                ["CSV", "Excel", "JSON"]
+                list(EXPORT_FORMATS.keys())
+            )
+            suffix, mime_type = EXPORT_FORMATS[export_format]
+
+            # Built only when clicked, in a background thread, and handed over
+            # as a file handle; reruns never touch the export
+            st.download_button(
+                "📥 Export Data",
+                lambda: export_file(df, export_format),
+                file_name=f"iso_data{suffix}",
+                mime=mime_type
             )
-            
-            if st.button("📥 Export Data"):
-                if export_format == "CSV":
-                    csv = df.to_csv(index=False)
-                    b64 = base64.b64encode(csv.encode()).decode()
-                    href = f'<a href="data:file/csv;base64,{b64}" download="iso_data.csv">Download CSV</a>'
-                    st.markdown(href, unsafe_allow_html=True)
-                    
-                elif export_format == "Excel":
-                    output = io.BytesIO()
-                    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                        df.to_excel(writer, index=False)
-                    b64 = base64.b64encode(output.getvalue()).decode()
-                    href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="iso_data.xlsx">Download Excel</a>'
-                    st.markdown(href, unsafe_allow_html=True)
-                    
-                else:  # JSON
-                    json_str = df.to_json(orient='records', date_format='iso')
-                    b64 = base64.b64encode(json_str.encode()).decode()
-                    href = f'<a href="data:file/json;base64,{b64}" download="iso_data.json">Download JSON</a>'
-                    st.markdown(href, unsafe_allow_html=True)
 
         # Data table with search and sort
         st.dataframe(
@@ -260,6 +315,43 @@ class DashboardPage:
             }
         )
 
+    def render_search(self):
+        """Render full-text search over hazards, findings and descriptions"""
+        st.subheader("Cari Catatan")
+
+        query = st.text_input(
+            "Kata kunci",
+            placeholder="mis. material jatuh, kalibrasi alat ukur",
+            key="dashboard_search_query"
+        )
+        if not query.strip():
+            st.caption("Mencari di kolom bahaya, risiko, pengendalian, temuan, tindakan perbaikan dan deskripsi.")
+            return
+
+        try:
+            hits, elapsed_ms = self.data_handler.search_entries(query, limit=50)
+        except RuntimeError as e:
+            st.error(str(e))
+            return
+
+        st.caption(f"{len(hits)} hasil dalam {elapsed_ms:.0f} ms")
+        if not hits:
+            st.info("🔍 Tidak ada catatan yang cocok.")
+            return
+
+        # Ranked hits with the narrative fields they were matched on
+        columns = ['score', 'timestamp', 'jenis_form', 'departemen'] + SEARCH_FIELDS
+        results = pd.DataFrame(hits)
+        results = results[[column for column in columns if column in results.columns]]
+        st.dataframe(
+            results,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "score": st.column_config.NumberColumn("Skor", format="%.2f")
+            }
+        )
+
 def render_page():
     dashboard = DashboardPage()
     dashboard.render()
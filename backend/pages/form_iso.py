@@ -5,17 +5,23 @@ from logic.data_handler import DataHandler
 from logic.validation import FormValidator
 from logic.file_storage import FileStorage
 from ai.huggingface_api import HuggingFaceAPI
+from ai.suggestion_cache import start_suggestion_cache
 
 class FormISOPage:
     def __init__(self):
         self.data_handler = DataHandler()
         self.validator = FormValidator()
+        # File uploader settings follow ALLOWED_FILE_TYPES and MAX_UPLOAD_SIZE
+        self.upload_types = [file_type.lstrip('.') for file_type in self.validator.allowed_file_types]
+        self.upload_help = f"Maksimum {self.validator.max_file_size / 1024 / 1024:.0f}MB"
         self.file_storage = FileStorage()
         self.ai_assistant = HuggingFaceAPI()
+        # Field examples generated in the background, clicks read them from memory
+        self.suggestions = start_suggestion_cache(self.ai_assistant)
         
     def get_field_suggestion(self, field_name: str, form_type: str) -> str:
         """Get AI suggestion for form field"""
-        return self.ai_assistant.get_field_suggestion(field_name, form_type)
+        return self.suggestions.get(field_name, form_type)
         
     def render(self):
         # Add custom CSS for form styling
@@ -80,6 +86,9 @@ class FormISOPage:
         """, unsafe_allow_html=True)
 
         st.header("Form ISO Interaktif")
+
+        # Outcome of earlier submissions saved in the background
+        self.render_submission_status()
         
         # Add help text with modern styling
         st.markdown("""
@@ -115,6 +124,39 @@ class FormISOPage:
         elif selected_type == "Audit Internal":
             self.render_audit_form()
 
+    def submit_form(self, form_data, uploaded_file):
+        """Hand a validated form to the data handler and track it in the session"""
+        saved_data = self.data_handler.submit_form_entry(form_data, uploaded_file)
+        if self.data_handler.write_queue is not None:
+            st.session_state.setdefault('pending_submissions', []).append(saved_data['id'])
+        return saved_data
+
+    def report_submitted(self, label):
+        """Confirm a submitted form; with write-behind it is only queued so far"""
+        if self.data_handler.write_queue is not None:
+            st.success(f"✅ Form {label} diterima dan sedang disimpan")
+        else:
+            st.success(f"✅ Form {label} berhasil disimpan!")
+
+    def render_submission_status(self):
+        """Report submissions of this session that finished saving, or failed"""
+        still_pending = []
+        for entry_id in st.session_state.get('pending_submissions', []):
+            status = self.data_handler.get_submission_status(entry_id)
+            if status is None:
+                continue
+            record = status['record'] or {}
+            label = f"{record.get('jenis_form', 'Form')} {entry_id[:15]}"
+            if status['status'] == 'saved':
+                st.success(f"✅ {label} berhasil disimpan")
+            elif status['status'] == 'failed':
+                st.error(f"❌ {label} gagal disimpan: {status['error']}. Silakan kirim ulang.")
+            else:
+                still_pending.append(entry_id)
+        st.session_state['pending_submissions'] = still_pending
+        if still_pending:
+            st.info(f"⏳ {len(still_pending)} form masih dalam proses penyimpanan")
+
     def create_help_text(self, field_name: str, form_type: str) -> None:
         """Create help text with enhanced AI suggestion button"""
         col1, col2 = st.columns([3, 1])
@@ -215,8 +257,8 @@ class FormISOPage:
             # Enhanced file upload with preview
             uploaded_file = st.file_uploader(
                 "Unggah Dokumen SOP (PDF)",
-                type=['pdf'],
-                help="Maksimum 5MB"
+                type=self.upload_types,
+                help=self.upload_help
             )
             
             if uploaded_file:
@@ -259,16 +301,16 @@ class FormISOPage:
                     
                     if is_valid:
                         # Save form data and file
-                        saved_data = self.data_handler.save_form_entry(form_data, uploaded_file)
+                        saved_data = self.submit_form(form_data, uploaded_file)
                         progress.progress(1.0)
-                        st.success("✅ Form SOP berhasil disimpan!")
+                        self.report_submitted("SOP")
                         
                         # Enhanced preview of saved data
                         with st.expander("Lihat Data Tersimpan"):
                             st.markdown("""
                             <div class='custom-box' style='background-color: #f0fdf4; border-color: #86efac;'>
                                 <h4 style='margin:0 0 0.5rem 0; color: #166534;'>
-                                    ✅ Data Berhasil Disimpan
+                                    ✅ Data Diterima
                                 </h4>
                             """, unsafe_allow_html=True)
                             st.json(saved_data)
@@ -385,17 +427,17 @@ class FormISOPage:
             
             uploaded_file = st.file_uploader(
                 "Unggah Dokumen Pendukung (PDF)",
-                type=['pdf'],
-                help="Maksimum 5MB"
+                type=self.upload_types,
+                help=self.upload_help
             )
             
-                if uploaded_file:
-                    st.markdown(f"""
-                    <div class='validation-message' style='background-color: #f0fdf4; border-color: #86efac; color: #166534;'>
-                        <i class="fas fa-check-circle"></i>&nbsp;
-                        File <strong>{uploaded_file.name}</strong> ({uploaded_file.size/1024/1024:.1f} MB) siap diupload
-                    </div>
-                    """, unsafe_allow_html=True)
+            if uploaded_file:
+                st.markdown(f"""
+                <div class='validation-message' style='background-color: #f0fdf4; border-color: #86efac; color: #166534;'>
+                    <i class="fas fa-check-circle"></i>&nbsp;
+                    File <strong>{uploaded_file.name}</strong> ({uploaded_file.size/1024/1024:.1f} MB) siap diupload
+                </div>
+                """, unsafe_allow_html=True)
             
             # Update progress
             progress.progress(0.8)
@@ -425,16 +467,16 @@ class FormISOPage:
                     
                     if is_valid:
                         # Save form data and file
-                        saved_data = self.data_handler.save_form_entry(form_data, uploaded_file)
+                        saved_data = self.submit_form(form_data, uploaded_file)
                         progress.progress(1.0)
-                        st.success("✅ Form HIRARC berhasil disimpan!")
+                        self.report_submitted("HIRARC")
                         
                         # Enhanced preview of saved data
                         with st.expander("Lihat Data Tersimpan"):
                             st.markdown("""
                             <div class='custom-box' style='background-color: #f0fdf4; border-color: #86efac;'>
                                 <h4 style='margin:0 0 0.5rem 0; color: #166534;'>
-                                    ✅ Data Berhasil Disimpan
+                                    ✅ Data Diterima
                                 </h4>
                             """, unsafe_allow_html=True)
                             st.json(saved_data)
@@ -549,8 +591,8 @@ class FormISOPage:
             
             uploaded_file = st.file_uploader(
                 "Unggah Dokumen Audit (PDF)",
-                type=['pdf'],
-                help="Maksimum 5MB"
+                type=self.upload_types,
+                help=self.upload_help
             )
             
             if uploaded_file:
@@ -590,16 +632,16 @@ class FormISOPage:
                     
                     if is_valid:
                         # Save form data and file
-                        saved_data = self.data_handler.save_form_entry(form_data, uploaded_file)
+                        saved_data = self.submit_form(form_data, uploaded_file)
                         progress.progress(1.0)
-                        st.success("✅ Form Audit Internal berhasil disimpan!")
+                        self.report_submitted("Audit Internal")
                         
                         # Enhanced preview of saved data
                         with st.expander("Lihat Data Tersimpan"):
                             st.markdown("""
                             <div class='custom-box' style='background-color: #f0fdf4; border-color: #86efac;'>
                                 <h4 style='margin:0 0 0.5rem 0; color: #166534;'>
-                                    ✅ Data Berhasil Disimpan
+                                    ✅ Data Diterima
                                 </h4>
                             """, unsafe_allow_html=True)
                             st.json(saved_data)
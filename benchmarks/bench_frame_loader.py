@@ -0,0 +1,132 @@
+"""
+Compare pd.DataFrame(records) with the typed records_to_dataframe loader.
+
+Usage: python benchmarks/bench_frame_loader.py [record_count]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from logic.frame_loader import records_to_dataframe  # noqa: E402
+
+DEPARTMENTS = ["Produksi", "Quality Control", "Engineering", "Safety", "Maintenance"]
+
+
+def make_records(count, seed=42):
+    """Generate a realistic mix of SOP, HIRARC and audit records"""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    records = []
+    for i in range(count):
+        timestamp = (start + timedelta(minutes=i * 15)).isoformat()
+        deadline = (start + timedelta(days=i // 50 + 30)).date().isoformat()
+        kind = rng.choice(["SOP Produksi", "HIRARC", "Audit Internal"])
+        department = rng.choice(DEPARTMENTS)
+        if kind == "SOP Produksi":
+            record = {
+                "jenis_form": kind,
+                "nomor_sop": f"PRD-SOP-{i:06d}",
+                "judul_sop": f"Prosedur pengoperasian mesin {i % 300}",
+                "departemen": department,
+                "tanggal_efektif": deadline,
+                "penyusun": f"Penyusun {i % 40}",
+                "reviewer": f"Reviewer {i % 20}",
+                "approver": f"Approver {i % 10}",
+                "deskripsi": "Langkah kerja standar untuk area produksi " * 3
+            }
+        elif kind == "HIRARC":
+            record = {
+                "jenis_form": kind,
+                "area_kerja": f"Area {i % 25}",
+                "aktivitas": "Pengangkatan material dengan forklift",
+                "bahaya": "Material jatuh dari ketinggian",
+                "risiko": "Cedera kepala dan kaki",
+                "tingkat_risiko": rng.choice(["Rendah", "Sedang", "Tinggi"]),
+                "pengendalian": "Gunakan APD lengkap dan batasi area kerja",
+                "pic": f"PIC {i % 30}",
+                "deadline": deadline,
+                "departemen": department
+            }
+        else:
+            record = {
+                "jenis_form": kind,
+                "nomor_audit": f"AUD-2024-{i:06d}",
+                "tanggal_audit": deadline,
+                "departemen": department,
+                "auditor": f"Auditor {i % 15}",
+                "auditee": f"Auditee {i % 60}",
+                "temuan": "Dokumen kalibrasi alat ukur tidak diperbarui",
+                "kategori_temuan": rng.choice(["Major", "Minor", "Observasi"]),
+                "tindakan_perbaikan": "Perbarui jadwal kalibrasi dan lakukan verifikasi",
+                "deadline": deadline
+            }
+        record["timestamp"] = timestamp
+        records.append(record)
+    return records
+
+
+def baseline_loader(records):
+    """What the dashboard did before: inferred columns plus a timestamp parse"""
+    df = pd.DataFrame(records)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    return df
+
+
+def object_loader(records):
+    """Baseline with object columns, the pandas 2.x default"""
+    try:
+        with pd.option_context('future.infer_string', False):
+            return baseline_loader(records)
+    except (KeyError, pd.errors.OptionError):
+        return baseline_loader(records)
+
+
+def measure(loader, records, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        df = loader(records)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return df, best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 150_000
+    records = make_records(count)
+
+    loaders = [
+        ("pd.DataFrame (object)", object_loader),
+        ("pd.DataFrame (default)", baseline_loader),
+        ("records_to_dataframe", records_to_dataframe)
+    ]
+
+    # Typical dashboard work on the loaded frame
+    def dashboard_ops(df):
+        started = time.perf_counter()
+        df['jenis_form'].value_counts()
+        pd.crosstab(df['departemen'], df['tingkat_risiko'])
+        df[df['departemen'].isin(["Produksi", "Safety"])]
+        return time.perf_counter() - started
+
+    print(f"records: {count}, pandas {pd.__version__}")
+    print(f"{'loader':<24}{'build s':>10}{'memory MB':>12}{'ops s':>10}")
+    memory = {}
+    for name, loader in loaders:
+        df, elapsed = measure(loader, records)
+        memory[name] = df.memory_usage(deep=True).sum() / 1024 / 1024
+        print(f"{name:<24}{elapsed:>10.3f}{memory[name]:>12.1f}{dashboard_ops(df):>10.3f}")
+
+    typed = memory["records_to_dataframe"]
+    for name in ["pd.DataFrame (object)", "pd.DataFrame (default)"]:
+        print(f"memory reduction vs {name}: {(1 - typed / memory[name]) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compare the old blocking requests.post call (no session, new connection per
+call) with the pooled aiohttp client of HuggingFaceAPI, against a local mock
+inference server with a fixed generation latency.
+
+Usage: python benchmarks/bench_hf_client.py [requests] [latency_ms] [concurrency]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class MockInferenceServer:
+    """Answers every model with a canned generation after a fixed delay"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        # Client ports seen, one per TCP connection
+        self.connections = set()
+        self.port = None
+        self._ready = threading.Event()
+
+    async def handle(self, request):
+        self.connections.add(request.transport.get_extra_info('peername')[1])
+        payload = await request.json()
+        await asyncio.sleep(self.latency)
+        return web.json_response([{
+            'generated_text': payload['inputs'] + " [/INST] Dokumen wajib ISO 9001 meliputi kebijakan mutu."
+        }])
+
+    def _serve(self):
+        loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_post('/models/{model:.*}', self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._ready.wait()
+        return f"http://127.0.0.1:{self.port}/models/"
+
+
+def summarize(name, latencies, elapsed, connections):
+    latencies = sorted(latencies)
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    print(f"{name:<28}{elapsed:>9.2f}{len(latencies) / elapsed:>10.1f}"
+          f"{statistics.median(latencies) * 1000:>10.1f}{p95 * 1000:>10.1f}{connections:>8}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    server = MockInferenceServer(latency)
+    os.environ['HUGGINGFACE_API_URL'] = server.start()
+    os.environ['HUGGINGFACE_API_KEY'] = "benchmark"
+    # Measure the transport, not the response cache
+    os.environ['AI_CACHE_MAX_ENTRIES'] = "0"
+    from ai.huggingface_api import HuggingFaceAPI  # noqa: E402
+
+    api = HuggingFaceAPI()
+    question = "Apa saja dokumen wajib ISO 9001?"
+    print(f"requests: {count}, server latency: {latency * 1000:.0f} ms, concurrency: {concurrency}")
+    print(f"{'client':<28}{'total s':>9}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'conns':>8}")
+
+    # Before: blocking requests.post without a session
+    server.connections.clear()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(count):
+        call_started = time.perf_counter()
+        requests.post(
+            f"{api.api_url}{api.primary_model}",
+            headers=api._get_headers(),
+            json={"inputs": api._format_prompt(question), "parameters": {"max_length": 500}}
+        ).json()
+        latencies.append(time.perf_counter() - call_started)
+    summarize("requests.post, no session", latencies, time.perf_counter() - started, len(server.connections))
+
+    # After: sync facade over the pooled session, one call at a time
+    server.connections.clear()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(count):
+        call_started = time.perf_counter()
+        api.context = []
+        api.get_response(question)
+        latencies.append(time.perf_counter() - call_started)
+    summarize("aiohttp pooled, sequential", latencies, time.perf_counter() - started, len(server.connections))
+
+    # After: concurrent calls sharing the pool on the client loop
+    async def timed_call(semaphore):
+        async with semaphore:
+            call_started = time.perf_counter()
+            await HuggingFaceAPI().get_response_async(question)
+            return time.perf_counter() - call_started
+
+    async def run_concurrent():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(timed_call(semaphore) for _ in range(count)))
+
+    server.connections.clear()
+    started = time.perf_counter()
+    latencies = api.http.run_sync(run_concurrent())
+    summarize(f"aiohttp pooled, {concurrency} parallel", latencies, time.perf_counter() - started,
+              len(server.connections))
+
+
+if __name__ == "__main__":
+    main()
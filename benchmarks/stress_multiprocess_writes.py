@@ -0,0 +1,144 @@
+"""
+Stress concurrent form submissions from several processes sharing one data
+folder, like Streamlit replicas behind a load balancer, and check that no
+record is lost or duplicated.
+
+Usage: python benchmarks/stress_multiprocess_writes.py [--backend json|sqlite]
+       [--processes 8] [--threads 4] [--records 100] [--write-behind]
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_frame_loader import make_records  # noqa: E402
+
+
+def configure(data_path, backend, write_behind):
+    """Point every process at the same data folder with background work off"""
+    os.environ.update({
+        'UPLOAD_PATH': str(data_path),
+        'FORMS_STORAGE_BACKEND': backend,
+        'FORMS_WRITE_BEHIND': 'true' if write_behind else 'false',
+        'FORMS_COMPACTION_INTERVAL': '0',
+        'RETENTION_DAYS': '0',
+        'RETENTION_POLICIES': '',
+        'COLD_TIER_DAYS': '0'
+    })
+
+
+def submit_worker(data_path, backend, write_behind, worker, threads, records, start_event, results):
+    """One replica: several session threads submitting forms at once"""
+    configure(data_path, backend, write_behind)
+    from logic.data_handler import DataHandler
+
+    handler = DataHandler()
+    forms = make_records(threads * records, seed=worker)
+    ids = []
+    ids_lock = threading.Lock()
+
+    def session(offset):
+        for form in forms[offset::threads]:
+            form.pop('timestamp', None)
+            form['penyusun'] = f"worker {worker}"
+            entry_id = handler.submit_form_entry(form)['id']
+            with ids_lock:
+                ids.append(entry_id)
+
+    start_event.wait()
+    started = time.perf_counter()
+    sessions = [threading.Thread(target=session, args=(i,)) for i in range(threads)]
+    for thread in sessions:
+        thread.start()
+    for thread in sessions:
+        thread.join()
+    submitted = time.perf_counter() - started
+
+    # Write-behind replicas keep draining until the shared queue is empty
+    if handler.write_queue is not None:
+        while handler.write_queue.pending_count():
+            handler.write_queue.drain()
+            time.sleep(0.05)
+    results.put((worker, ids, submitted, time.perf_counter() - started))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process write stress test")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=4, help="Concurrent sessions per process")
+    parser.add_argument('--records', type=int, default=100, help="Submissions per session")
+    parser.add_argument('--write-behind', action='store_true', help="Submit through the write-behind queue")
+    args = parser.parse_args()
+
+    data_path = Path(tempfile.mkdtemp(prefix="iso_stress_"))
+    configure(data_path, args.backend, args.write_behind)
+    from logic.data_handler import DataHandler
+
+    # Create the layout once, so replicas do not race to initialize it
+    DataHandler()
+
+    context = multiprocessing.get_context('spawn')
+    start_event = context.Event()
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=submit_worker,
+            args=(data_path, args.backend, args.write_behind, worker,
+                  args.threads, args.records, start_event, results)
+        )
+        for worker in range(args.processes)
+    ]
+    for process in workers:
+        process.start()
+    time.sleep(1)
+    start_event.set()
+
+    submitted_ids = []
+    slowest_submit = slowest_done = 0
+    for _ in workers:
+        while True:
+            try:
+                _, ids, submitted, done = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if any(process.exitcode not in (None, 0) for process in workers):
+                    print("FAILED: a worker process crashed")
+                    sys.exit(1)
+        submitted_ids.extend(ids)
+        slowest_submit = max(slowest_submit, submitted)
+        slowest_done = max(slowest_done, done)
+    for process in workers:
+        process.join()
+
+    # Fresh handler reads everything back from disk
+    handler = DataHandler()
+    stored = handler.load_forms_data()
+    stored_ids = [record['id'] for record in stored]
+    expected = args.processes * args.threads * args.records
+    missing = set(submitted_ids) - set(stored_ids)
+    duplicates = len(stored_ids) - len(set(stored_ids))
+    aggregates_total = handler.get_aggregates()['total']
+
+    print(f"backend: {args.backend}, write-behind: {args.write_behind}, data: {data_path}")
+    print(f"{args.processes} processes x {args.threads} sessions x {args.records} submissions = {expected}")
+    print(f"submit phase: {slowest_submit:.2f}s ({expected / slowest_submit:.0f} submissions/s)")
+    print(f"all written:  {slowest_done:.2f}s ({expected / slowest_done:.0f} records/s)")
+    print(f"stored: {len(stored)}, missing: {len(missing)}, duplicates: {duplicates}, "
+          f"aggregates total: {aggregates_total}")
+
+    ok = (len(submitted_ids) == expected and not missing and not duplicates
+          and len(stored) == expected and aggregates_total == expected)
+    print("OK: no lost or duplicated records" if ok else "FAILED: records lost or duplicated")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import json
+import os
+
+
+def _normalize_version(version):
+    """Make a store data version comparable with one read back from JSON"""
+    return json.loads(json.dumps(version))
+
+
+def _bump(counter, key, delta):
+    """Add delta to counter[key], dropping keys that reach zero"""
+    if key is None:
+        return
+    key = str(key)
+    counter[key] = counter.get(key, 0) + delta
+    if counter[key] <= 0:
+        del counter[key]
+
+
+class FormAggregates:
+    """
+    Dashboard counters persisted next to the form data and updated
+    incrementally on every write, so reading them does not depend on
+    the number of stored records.
+    """
+
+    def __init__(self, stats_file):
+        self.stats_file = stats_file
+        self.stats = self.empty()
+
+    @staticmethod
+    def empty():
+        """Return an empty aggregates document"""
+        return {
+            'data_version': None,
+            'total': 0,
+            'form_types': {},
+            'departments': {},
+            'status': {},
+            'risk_by_department': {},
+            'daily': {}
+        }
+
+    def load(self):
+        """Reload aggregates from disk, falling back to empty ones"""
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                self.stats = {**self.empty(), **json.load(f)}
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.stats = self.empty()
+        return self.stats
+
+    def save(self):
+        """Write aggregates atomically"""
+        temp_file = self.stats_file.with_name(self.stats_file.name + ".tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.stats, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.stats_file)
+
+    def is_current(self, data_version):
+        """Check whether the aggregates reflect the given store version"""
+        return self.stats['data_version'] == _normalize_version(data_version)
+
+    def set_version(self, data_version):
+        """Record which store version the aggregates reflect"""
+        self.stats['data_version'] = _normalize_version(data_version)
+
+    def apply(self, record, sign=1):
+        """Fold a record into the counters (sign=-1 removes it)"""
+        self.stats['total'] = max(self.stats['total'] + sign, 0)
+        _bump(self.stats['form_types'], record.get('jenis_form'), sign)
+        _bump(self.stats['departments'], record.get('departemen'), sign)
+        _bump(self.stats['status'], record.get('status'), sign)
+
+        department = record.get('departemen')
+        risk = record.get('tingkat_risiko')
+        if department is not None and risk is not None:
+            risks = self.stats['risk_by_department'].setdefault(str(department), {})
+            _bump(risks, risk, sign)
+            if not risks:
+                del self.stats['risk_by_department'][str(department)]
+
+        if record.get('timestamp'):
+            _bump(self.stats['daily'], str(record['timestamp'])[:10], sign)
+
+    def rebuild(self, store):
+        """Recompute all counters from the store's GROUP BY queries"""
+        stats = self.empty()
+        stats['total'] = store.count()
+        stats['form_types'] = {str(key): count for key, count in store.count_by_form_type()}
+        stats['departments'] = {str(key): count for key, count in store.count_by_department()}
+        stats['status'] = {str(key): count for key, count in store.count_by_status()}
+        for department, risk, count in store.risk_by_department():
+            stats['risk_by_department'].setdefault(str(department), {})[str(risk)] = count
+        stats['daily'] = {str(day): count for day, count in store.daily_counts()}
+        self.stats = stats
+        self.set_version(store.data_version())
+        return self.stats
@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from pathlib import Path
+
+# File suffixes understood by iter_import_rows
+IMPORT_FORMATS = {
+    '.csv': 'csv',
+    '.xlsx': 'excel',
+    '.xlsm': 'excel',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl'
+}
+
+
+def detect_format(source):
+    """Guess the import format from a path or an uploaded file's name"""
+    name = source if isinstance(source, (str, Path)) else getattr(source, 'name', '')
+    file_format = IMPORT_FORMATS.get(Path(str(name)).suffix.lower())
+    if not file_format:
+        raise ValueError(f"Format impor tidak dikenal: {name}")
+    return file_format
+
+
+def _clean_value(value):
+    """
+    Convert spreadsheet cell and JSON values to the strings a form
+    submission would hold: dates as ISO, numbers as typed
+    """
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        # Excel stores plain dates as midnight datetimes
+        if value.time() == datetime.min.time():
+            return value.date().isoformat()
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        # Excel keeps every number as a float, 12 must not become "12.0"
+        return str(int(value))
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value).strip()
+
+
+def _clean_row(row):
+    """Drop unnamed columns and normalize values"""
+    return {
+        str(key).strip(): _clean_value(value)
+        for key, value in row.items()
+        if key is not None and str(key).strip()
+    }
+
+
+def _open_text(source):
+    """Open a path or binary file-like object as text"""
+    if isinstance(source, (str, Path)):
+        return open(source, 'r', encoding='utf-8-sig', newline='')
+    return io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+
+
+def iter_csv_rows(source):
+    """Yield (row_number, record) from a CSV file with a header row"""
+    f = _open_text(source)
+    try:
+        for row_number, row in enumerate(csv.DictReader(f), start=2):
+            yield row_number, _clean_row(row)
+    finally:
+        if isinstance(source, (str, Path)):
+            f.close()
+        else:
+            # Leave the caller's file object open
+            f.detach()
+
+
+def iter_excel_rows(source):
+    """Yield (row_number, record) from the first sheet using openpyxl read-only mode"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None for value in values):
+                continue
+            yield row_number, _clean_row(dict(zip(header, values)))
+    finally:
+        workbook.close()
+
+
+def iter_jsonl_rows(source):
+    """Yield (row_number, record) from a JSON-lines file"""
+    f = _open_text(source)
+    try:
+        for row_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, ValueError(f"JSON tidak valid: {e.msg}")
+                continue
+            if not isinstance(record, dict):
+                yield row_number, ValueError("Baris JSON harus berupa object")
+                continue
+            yield row_number, _clean_row(record)
+    finally:
+        if isinstance(source, (str, Path)):
+            f.close()
+        else:
+            f.detach()
+
+
+def iter_import_rows(source, file_format=None):
+    """
+    Stream rows from a CSV, Excel or JSONL source
+    Yields (row_number, record); record is a ValueError for unreadable rows
+    """
+    file_format = file_format or detect_format(source)
+    readers = {
+        'csv': iter_csv_rows,
+        'excel': iter_excel_rows,
+        'jsonl': iter_jsonl_rows
+    }
+    if file_format not in readers:
+        raise ValueError(f"Format impor tidak dikenal: {file_format}")
+    return readers[file_format](source)
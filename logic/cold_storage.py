@@ -0,0 +1,225 @@
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# zstd compresses and decompresses faster than gzip; used when installed
+try:
+    import zstandard
+    COLD_COMPRESSION = 'zstd'
+except ImportError:
+    zstandard = None
+    COLD_COMPRESSION = 'gzip'
+
+# Compression -> suffix of the compressed blob file
+COMPRESSED_SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst'
+}
+
+# Marks a blob that was tried and did not shrink enough to be worth it
+INCOMPRESSIBLE = 'incompressible'
+
+# Copy buffer for streaming (de)compression
+CHUNK_SIZE = 1024 * 1024
+
+
+def compress_file(source, destination, compression=COLD_COMPRESSION):
+    """Compress source into destination, streaming, and fsync the result"""
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        if compression == 'zstd':
+            zstandard.ZstdCompressor(level=10).copy_stream(src, dst, read_size=CHUNK_SIZE)
+        else:
+            with gzip.GzipFile(fileobj=dst, mode='wb', compresslevel=6, mtime=0) as out:
+                shutil.copyfileobj(src, out, CHUNK_SIZE)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+
+def decompress_file(source, destination, compression):
+    """Decompress source into destination, streaming"""
+    if compression == 'zstd' and zstandard is None:
+        raise RuntimeError("File tersimpan dengan zstd, install paket zstandard untuk membacanya")
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        if compression == 'zstd':
+            zstandard.ZstdDecompressor().copy_stream(src, dst, read_size=CHUNK_SIZE)
+        else:
+            with gzip.GzipFile(fileobj=src, mode='rb') as f:
+                shutil.copyfileobj(f, dst, CHUNK_SIZE)
+
+
+class DecompressedCache:
+    """
+    Small LRU of decompressed cold files (and downloads from object
+    storage), so reading the same document again does not pay for it
+    twice. Evicted copies are deleted. The folder may be shared by
+    several processes; copies on disk are picked up, not thrown away.
+    """
+
+    # Temp files of interrupted decompressions older than this are removed
+    STALE_TEMP_SECONDS = 60 * 60
+
+    def __init__(self, cache_dir, max_files=32):
+        self.cache_dir = Path(cache_dir)
+        self.max_files = max_files
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Rebuild the LRU from copies on disk, least recently used first"""
+        stale_before = time.time() - self.STALE_TEMP_SECONDS
+        copies = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                mtime = entry.stat().st_mtime
+                if entry.name.endswith(".tmp"):
+                    # Another process may still be writing it
+                    if mtime < stale_before:
+                        os.unlink(entry.path)
+                    continue
+                copies.append((mtime, entry.name.partition(".")[0], Path(entry.path)))
+
+        for _, digest, path in sorted(copies):
+            self.entries[digest] = path
+        self._evict()
+
+    def _evict(self):
+        """Delete the least recently used copies beyond max_files"""
+        while len(self.entries) > self.max_files:
+            _, evicted = self.entries.popitem(last=False)
+            evicted.unlink(missing_ok=True)
+
+    def get(self, digest, suffix, compressed_path, compression):
+        """Return the path of a decompressed copy, creating it if needed"""
+        return self.fetch(
+            digest, suffix,
+            lambda destination: decompress_file(compressed_path, destination, compression)
+        )
+
+    def fetch(self, digest, suffix, write):
+        """
+        Return the path of a cached copy, calling write(destination) to
+        create it if needed (decompression, download from object storage)
+        """
+        with self.lock:
+            path = self.entries.get(digest) or self.cache_dir / f"{digest}{suffix}"
+            if path.exists():
+                # Possibly written by another process; the mtime keeps the
+                # LRU order across restarts
+                os.utime(path)
+                self.entries[digest] = path
+                self.entries.move_to_end(digest)
+                return path
+
+            # Unique temp name, other processes may decompress the same file
+            fd, temp_path = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=self.cache_dir)
+            os.close(fd)
+            temp_path = Path(temp_path)
+            try:
+                write(temp_path)
+            except Exception:
+                temp_path.unlink(missing_ok=True)
+                raise
+            os.replace(temp_path, path)
+            self.entries[digest] = path
+            self._evict()
+            return path
+
+    def discard(self, digest):
+        """Forget a cached copy, e.g. when its blob becomes hot again"""
+        with self.lock:
+            path = self.entries.pop(digest, None)
+            if path is not None:
+                path.unlink(missing_ok=True)
+
+
+# One cache per folder, shared by all FileStorage instances of the process
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_decompressed_cache(cache_dir, max_files=32):
+    """Return the process-wide decompressed-file cache for a folder"""
+    key = str(Path(cache_dir).resolve())
+    with _CACHES_LOCK:
+        if key not in _CACHES:
+            _CACHES[key] = DecompressedCache(cache_dir, max_files)
+        return _CACHES[key]
+
+
+class ColdTierWorker:
+    """Compresses uploads nobody saved again for a while, in a daemon thread"""
+
+    def __init__(self, file_storage, min_age_days, interval=3600, batch_size=50):
+        self.file_storage = file_storage
+        self.min_age_days = min_age_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_result = None
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """Compress eligible blobs batch by batch until none are left"""
+        total = {'blobs': 0, 'bytes_before': 0, 'bytes_after': 0}
+        try:
+            while not self._stop_event.is_set():
+                result = self.file_storage.compress_cold_files(self.min_age_days, self.batch_size)
+                for key in total:
+                    total[key] += result[key]
+                # Blobs that vanished stay candidates, leave them to reconcile
+                if result['candidates'] < self.batch_size or not (result['blobs'] or result['incompressible']):
+                    break
+            self.last_error = None
+        except Exception as e:
+            # Compression is an optimization, a failed round must not stop the app
+            self.last_error = str(e)
+        self.last_result = total
+        return total
+
+    def _loop(self):
+        while True:
+            self.run_once()
+            if self._stop_event.wait(self.interval):
+                break
+
+    def start(self):
+        """Start compressing periodically in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="upload-cold-tier", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current blob"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+# One worker per upload folder, shared by all DataHandlers
+_WORKERS = {}
+_WORKERS_LOCK = threading.Lock()
+
+
+def start_cold_tier_worker(file_storage, min_age_days, interval):
+    """Start (once per process) the cold tier worker for an upload folder"""
+    key = str(Path(file_storage.base_path).resolve())
+    with _WORKERS_LOCK:
+        worker = _WORKERS.get(key)
+        if worker is None:
+            worker = ColdTierWorker(file_storage, min_age_days, interval)
+            _WORKERS[key] = worker
+        worker.start()
+    return worker
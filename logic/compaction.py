@@ -0,0 +1,119 @@
+import argparse
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from logic.form_store import JsonlFormStore, SQLiteFormStore
+from logic.storage_backend import get_upload_path
+
+# Stores that can be compacted, keyed like FORMS_STORAGE_BACKEND
+COMPACTABLE_STORES = {
+    'json': JsonlFormStore,
+    'sqlite': SQLiteFormStore
+}
+
+
+class FormStoreCompactor:
+    """
+    Reclaims space taken by superseded record versions and tombstones.
+    Each monthly partition log is a segment; compacting it writes a
+    snapshot holding only the live records, while new submits keep
+    appending to the same partition.
+    """
+
+    def __init__(self, store, min_garbage_ratio=0.2, interval=3600):
+        self.store = store
+        self.min_garbage_ratio = min_garbage_ratio
+        self.interval = interval
+        self.last_run = None
+        self.last_result = {}
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def run_once(self, force=False):
+        """
+        Compact the store once
+        Returns {segment: (size_before, size_after)}
+        """
+        try:
+            self.last_result = self.store.compact(self.min_garbage_ratio, force=force)
+            self.last_error = None
+        except Exception as e:
+            # Compaction is an optimization, a failed round must not stop the app
+            self.last_error = str(e)
+            self.last_result = {}
+        self.last_run = datetime.now()
+        return self.last_result
+
+    def _loop(self):
+        while not self._stop_event.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        """Start compacting periodically in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="form-store-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+# One background compactor per store file, shared by all DataHandlers
+_COMPACTORS = {}
+_COMPACTORS_LOCK = threading.Lock()
+
+
+def start_background_compactor(store, interval, min_garbage_ratio=0.2):
+    """Start (once per process) a background compactor for a store"""
+    key = (type(store).__name__, str(Path(store.base_path).resolve()))
+    with _COMPACTORS_LOCK:
+        compactor = _COMPACTORS.get(key)
+        if compactor is None:
+            compactor = FormStoreCompactor(store, min_garbage_ratio, interval)
+            _COMPACTORS[key] = compactor
+        compactor.start()
+    return compactor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact form record storage")
+    parser.add_argument('--backend', choices=sorted(COMPACTABLE_STORES), default='json')
+    parser.add_argument('--path', default=str(get_upload_path()), help="Folder with the form data")
+    parser.add_argument('--min-garbage-ratio', type=float, default=0.2,
+                        help="Share of superseded lines a partition needs before it is compacted")
+    parser.add_argument('--force', action='store_true', help="Compact every partition")
+    parser.add_argument('--watch', type=int, metavar='SECONDS',
+                        help="Keep running, compacting every SECONDS")
+    args = parser.parse_args()
+
+    store = COMPACTABLE_STORES[args.backend](Path(args.path))
+    store.initialize()
+    compactor = FormStoreCompactor(store, args.min_garbage_ratio, args.watch or 0)
+
+    while True:
+        started = time.perf_counter()
+        result = compactor.run_once(force=args.force)
+        if compactor.last_error:
+            print(f"Kompaksi gagal: {compactor.last_error}")
+        elif not result:
+            print("Tidak ada partisi yang perlu dikompaksi")
+        for segment, (before, after) in sorted(result.items()):
+            print(f"{segment}: {before} -> {after}")
+        print(f"Selesai dalam {time.perf_counter() - started:.2f} detik")
+
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
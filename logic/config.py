@@ -0,0 +1,7 @@
+import os
+
+
+def env_flag(name, default=False):
+    """Read an on/off setting: 1, true or yes (any case) mean on"""
+    value = os.getenv(name, "").split("#")[0].strip().lower()
+    return value in ('1', 'true', 'yes') if value else default
@@ -1,112 +1,405 @@
-import json
 import pandas as pd
-from pathlib import Path
 from datetime import datetime
 import os
+import sqlite3
+import time
+from dotenv import load_dotenv
+from logic.form_store import JsonlFormStore, SQLiteFormStore, assign_record_id
+from logic.aggregates import FormAggregates
+from logic.compaction import start_background_compactor
+from logic.cold_storage import start_cold_tier_worker
+from logic.file_storage import FileStorage
+from logic.retention import parse_policies, start_background_sweeper
+from logic.search_index import FormSearchIndex
+from logic.storage_backend import get_upload_path
+from logic.bulk_import import iter_import_rows
+from logic.config import env_flag
+from logic.frame_loader import records_to_dataframe
+from logic.validation import FormValidator
+from logic.write_queue import SAVED, start_write_queue
+
+# FormValidator method used for each form type during bulk import
+FORM_VALIDATORS = {
+    'SOP Produksi': 'validate_sop_form',
+    'HIRARC': 'validate_hirarc_form',
+    'Audit Internal': 'validate_audit_form'
+}
+
+# Selectable record storage engines, chosen with FORMS_STORAGE_BACKEND
+STORAGE_BACKENDS = {
+    'json': JsonlFormStore,
+    'sqlite': SQLiteFormStore
+}
 
 class DataHandler:
-    def __init__(self):
-        self.base_path = Path("data/uploads")
-        self.forms_data_file = self.base_path / "forms_data.json"
+    def __init__(self, backend=None):
+        load_dotenv()
+        self.base_path = get_upload_path()
+        self.backend = (backend or os.getenv('FORMS_STORAGE_BACKEND', 'json')).lower()
+        if self.backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown forms storage backend: {self.backend}")
+        self.store = STORAGE_BACKENDS[self.backend](self.base_path)
+        self.aggregates = FormAggregates(self.base_path / "forms_stats.json")
+        self.search_index = FormSearchIndex(self.base_path / "forms_search.db")
+        # Uploads are cut off at the same limit the form validator enforces
+        self.file_storage = FileStorage(max_upload_size=FormValidator().max_file_size)
         self.initialize_storage()
 
+        # Reclaim superseded record versions in the background
+        compaction_interval = int(os.getenv('FORMS_COMPACTION_INTERVAL', '0'))
+        if compaction_interval > 0:
+            start_background_compactor(self.store, compaction_interval)
+
+        # Remove uploads past their retention period in the background
+        retention_days = int(os.getenv('RETENTION_DAYS', '0'))
+        retention_policies = parse_policies(os.getenv('RETENTION_POLICIES', ''))
+        if retention_days > 0 or any(days > 0 for days in retention_policies.values()):
+            self.retention_sweeper = start_background_sweeper(
+                self.file_storage,
+                retention_policies,
+                retention_days,
+                interval=int(os.getenv('RETENTION_SWEEP_INTERVAL', '3600')),
+                max_files_per_second=float(os.getenv('RETENTION_MAX_FILES_PER_SECOND', '20'))
+            )
+        else:
+            self.retention_sweeper = None
+
+        # Compress uploads nobody saved again for a while
+        cold_tier_days = int(os.getenv('COLD_TIER_DAYS', '0'))
+        if cold_tier_days > 0:
+            start_cold_tier_worker(
+                self.file_storage, cold_tier_days,
+                interval=int(os.getenv('COLD_TIER_INTERVAL', '3600'))
+            )
+
+        # Form submissions are written in the background
+        if env_flag('FORMS_WRITE_BEHIND'):
+            self.write_queue = start_write_queue(self)
+        else:
+            self.write_queue = None
+
     def initialize_storage(self):
         """Initialize storage directories and files"""
         self.base_path.mkdir(parents=True, exist_ok=True)
-        if not self.forms_data_file.exists():
-            self.save_forms_data([])
+        self.store.initialize()
+
+        # Import existing JSON records the first time SQLite is selected
+        if self.backend == 'sqlite' and self.store.is_empty():
+            json_store = JsonlFormStore(self.base_path)
+            if json_store.has_data():
+                json_store.initialize()
+                self.store.append_many(json_store.load_all())
+
+        try:
+            self.search_index.initialize()
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5, search is unavailable
+            self.search_index = None
 
     def save_forms_data(self, data):
-        """Save forms data to JSON file"""
-        with open(self.forms_data_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4, default=str)
+        """Replace all stored forms data"""
+        self.store.rewrite(data)
 
     def load_forms_data(self):
-        """Load forms data from JSON file"""
-        if self.forms_data_file.exists():
-            with open(self.forms_data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
+        """Load all forms data"""
+        return self.store.load_all()
 
     def save_form_entry(self, form_data, uploaded_file=None):
-        """Save a new form entry and its associated file"""
+        """
+        Save a new form entry and its associated file
+        Raises ValueError if the entry comes with an invalid ID
+        """
         # Add timestamp to form data
         form_data['timestamp'] = datetime.now().isoformat()
         
+        assign_record_id(form_data)
+
         # Handle file upload if present
         if uploaded_file:
-            file_path = self.save_uploaded_file(uploaded_file, form_data['jenis_form'])
-            form_data['file_path'] = str(file_path)
+            form_data['file_path'] = self.save_uploaded_file(uploaded_file, form_data['jenis_form'], form_data['id'])
 
-        # Load existing data
-        existing_data = self.load_forms_data()
-        
-        # Add new entry
-        existing_data.append(form_data)
-        
-        # Save updated data
-        self.save_forms_data(existing_data)
+        # Append new entry to the store
+        self._commit_entries([form_data])
         
         return form_data
 
-    def save_uploaded_file(self, uploaded_file, form_type):
-        """Save uploaded file to appropriate directory"""
-        # Create directory for form type if it doesn't exist
-        form_dir = self.base_path / form_type
-        form_dir.mkdir(exist_ok=True)
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{timestamp}_{uploaded_file.name}"
-        file_path = form_dir / filename
-        
-        # Save file
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-            
-        return file_path
+    def submit_form_entry(self, form_data, uploaded_file=None):
+        """
+        Accept a validated form entry for saving
+        With FORMS_WRITE_BEHIND it is queued and written in the background,
+        follow it with get_submission_status(form_data['id'])
+        Returns the form data with its ID assigned
+        """
+        if self.write_queue is None:
+            return self.save_form_entry(form_data, uploaded_file)
+        return self.write_queue.submit(form_data, uploaded_file)
+
+    def get_submission_status(self, entry_id):
+        """
+        Report whether a submitted entry has been written
+        Returns dict with status (queued, saved or failed), error and record, or None
+        """
+        if self.write_queue is not None:
+            return self.write_queue.status(entry_id)
+        record = self.get_entry(entry_id)
+        return {'status': SAVED, 'error': None, 'record': record} if record else None
+
+    def _apply_write(self, write, added=(), removed=()):
+        """Run a store write and fold the change into the aggregates"""
+        with self.store.write_lock():
+            old_version = self.store.data_version()
+            write()
+
+            # Incremental update unless someone else wrote in between
+            self.aggregates.load()
+            if self.aggregates.is_current(old_version):
+                for entry in removed:
+                    self.aggregates.apply(entry, sign=-1)
+                for entry in added:
+                    self.aggregates.apply(entry)
+                self.aggregates.set_version(self.store.data_version())
+            else:
+                self.aggregates.rebuild(self.store)
+            self.aggregates.save()
+
+            # Full-text index follows the same incremental-or-rebuild rule
+            if self.search_index is not None:
+                new_version = self.store.data_version()
+                if self.search_index.is_current(old_version):
+                    self.search_index.apply(added, removed, new_version)
+                else:
+                    self.search_index.rebuild(self.store.load_all(), new_version)
+
+    def _commit_entries(self, entries):
+        """
+        Append new entries to the store, assigning their stable IDs
+        Raises ValueError before writing anything if a supplied ID is invalid
+        """
+        for entry in entries:
+            assign_record_id(entry)
+        self._apply_write(lambda: self.store.append_many(entries), added=entries)
+
+    def get_entry(self, entry_id):
+        """Get a single entry by its ID, or None"""
+        return self.store.get(entry_id)
+
+    def update_entry(self, entry_id, changes):
+        """
+        Update fields of an existing entry without rewriting the dataset
+        Returns the updated entry, or None if it does not exist
+        """
+        with self.store.write_lock():
+            current = self.store.get(entry_id)
+            if current is None:
+                return None
+
+            # ID and submission time are stable, they locate the record
+            updated = {**current, **changes}
+            updated['id'] = current['id']
+            if 'timestamp' in current:
+                updated['timestamp'] = current['timestamp']
+            updated['updated_at'] = datetime.now().isoformat()
+
+            self._apply_write(lambda: self.store.put(updated), added=[updated], removed=[current])
+        return updated
+
+    def delete_entry(self, entry_id):
+        """
+        Delete an entry without rewriting the dataset
+        Returns True if the entry existed
+        """
+        with self.store.write_lock():
+            current = self.store.get(entry_id)
+            if current is None:
+                return False
+            self._apply_write(lambda: self.store.delete(entry_id), removed=[current])
+        return True
+
+    def bulk_import(self, source, file_format=None, batch_size=1000):
+        """
+        Stream historical records from a CSV, Excel or JSONL file.
+        Each batch is validated with FormValidator and committed in one write;
+        invalid rows are reported and skipped without stopping the load.
+        Returns dict with imported, failed and errors [(row_number, message)]
+        """
+        validator = FormValidator()
+        report = {'imported': 0, 'failed': 0, 'errors': []}
+        batch = []
+
+        def reject(row_number, message):
+            report['failed'] += 1
+            report['errors'].append((row_number, message))
+
+        def prepare(record):
+            """Validate and normalize one row, returns an error message or None"""
+            # Validate with the rules of the record's form type
+            validator_name = FORM_VALIDATORS.get(record.get('jenis_form'))
+            if not validator_name:
+                return f"Jenis form tidak dikenal: {record.get('jenis_form', '')}"
+            is_valid, error_message = getattr(validator, validator_name)(record)
+            if not is_valid:
+                return error_message
+
+            # Imported records always get a fresh stable ID
+            record.pop('id', None)
+
+            # Keep the original submission time of historical records
+            if record.get('timestamp'):
+                try:
+                    record['timestamp'] = datetime.fromisoformat(str(record['timestamp'])).isoformat()
+                except ValueError:
+                    return "Format timestamp tidak valid"
+            else:
+                record['timestamp'] = datetime.now().isoformat()
+            return None
+
+        for row_number, record in iter_import_rows(source, file_format):
+            if isinstance(record, Exception):
+                reject(row_number, str(record))
+                continue
+
+            # One unexpected value must not abort the whole import
+            try:
+                error_message = prepare(record)
+            except Exception as e:
+                error_message = f"Baris tidak dapat diproses: {e}"
+            if error_message:
+                reject(row_number, error_message)
+                continue
+
+            batch.append(record)
+            if len(batch) >= batch_size:
+                self._commit_entries(batch)
+                report['imported'] += len(batch)
+                batch = []
+
+        if batch:
+            self._commit_entries(batch)
+            report['imported'] += len(batch)
+
+        return report
+
+    def get_aggregates(self):
+        """Return dashboard aggregates, rebuilding them if they are stale"""
+        self.aggregates.load()
+        if not self.aggregates.is_current(self.store.data_version()):
+            with self.store.write_lock():
+                self.aggregates.rebuild(self.store)
+                self.aggregates.save()
+        return self.aggregates.stats
+
+    def search_entries(self, query, limit=20):
+        """
+        Full-text search over the narrative fields of all entries
+        Returns (hits, elapsed_ms); hits are entries with a 'score', best first
+        """
+        if self.search_index is None:
+            raise RuntimeError("Pencarian tidak tersedia: SQLite tanpa dukungan FTS5")
+
+        started = time.perf_counter()
+        data_version = self.store.data_version()
+        if not self.search_index.is_current(data_version):
+            with self.store.write_lock():
+                self.search_index.rebuild(self.store.load_all(), self.store.data_version())
+
+        hits = []
+        for record_id, score in self.search_index.search(query, limit):
+            entry = self.store.get(record_id)
+            if entry is not None:
+                hits.append({**entry, 'score': score})
+        return hits, (time.perf_counter() - started) * 1000
+
+    def save_uploaded_file(self, uploaded_file, form_type, record_id=None, filename=None):
+        """
+        Save uploaded file to appropriate directory, deduplicated by content
+        Returns its path relative to the upload folder, the key records keep
+        """
+        return self.file_storage.save_file(
+            uploaded_file, form_type, record_id=record_id, filename=filename
+        )
+
+    def get_uploaded_file_path(self, entry):
+        """
+        Resolve the file attached to an entry to a local path; cold files are
+        decompressed and files in object storage downloaded on demand
+        Returns None if the entry has no file
+        """
+        if not entry.get('file_path'):
+            return None
+        relative_path = self.file_storage.storage_key(entry['file_path'])
+        if self.file_storage.index.get_file(relative_path) is None:
+            # Moved since, or an older record holding a path that is gone
+            saved = self.file_storage.index.files_for_record(entry.get('id'))
+            if saved:
+                relative_path = saved[0]
+        return self.file_storage.get_file_path(relative_path)
 
     def get_dashboard_data(self, start_date=None, end_date=None, form_type=None, department=None):
         """Get filtered data for dashboard"""
-        data = self.load_forms_data()
-        df = pd.DataFrame(data)
-        
+        # Filters are pushed down to the store
+        data = self.store.query(start_date, end_date, form_type, department)
         if not data:
             return pd.DataFrame()
-        
-        # Convert timestamp to datetime
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        # Apply filters
-        if start_date:
-            df = df[df['timestamp'] >= pd.to_datetime(start_date)]
-        if end_date:
-            df = df[df['timestamp'] <= pd.to_datetime(end_date)]
-        if form_type:
-            df = df[df['jenis_form'] == form_type]
-        if department:
-            df = df[df['departemen'] == department]
-            
-        return df
+
+        # Typed columns: categoricals, datetime64 and strings
+        return records_to_dataframe(data)
+
+    def get_date_bounds(self):
+        """
+        Get the earliest and latest submission timestamps
+        Returns (min_datetime, max_datetime) or None when there is no data
+        """
+        bounds = self.store.date_bounds()
+        if not bounds:
+            return None
+        return tuple(datetime.fromisoformat(value) for value in bounds)
 
     def get_form_types_count(self):
         """Get count of forms by type"""
-        df = pd.DataFrame(self.load_forms_data())
-        if df.empty:
+        counts = self.get_aggregates()['form_types']
+        if not counts:
             return pd.Series()
-        return df['jenis_form'].value_counts()
+        series = pd.Series(counts, name='count').sort_values(ascending=False)
+        return series.rename_axis('jenis_form')
+
+    def get_department_counts(self):
+        """Get count of forms by department"""
+        counts = self.get_aggregates()['departments']
+        if not counts:
+            return pd.Series()
+        series = pd.Series(counts, name='count').sort_values(ascending=False)
+        return series.rename_axis('departemen')
 
     def get_risk_levels_by_department(self):
         """Get risk levels count by department"""
-        df = pd.DataFrame(self.load_forms_data())
-        if df.empty:
+        risk_by_department = self.get_aggregates()['risk_by_department']
+        if not risk_by_department:
             return pd.DataFrame()
-        return pd.crosstab(df['departemen'], df['tingkat_risiko'])
+        df = pd.DataFrame.from_dict(risk_by_department, orient='index').fillna(0).astype(int)
+        df = df.sort_index().sort_index(axis=1)
+        return df.rename_axis(index='departemen', columns='tingkat_risiko')
 
     def get_submissions_trend(self):
         """Get trend of form submissions over time"""
-        df = pd.DataFrame(self.load_forms_data())
-        if df.empty:
+        daily = self.get_aggregates()['daily']
+        if not daily:
             return pd.Series()
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df.resample('D', on='timestamp').size()
+        trend = pd.Series(daily)
+        trend.index = pd.to_datetime(trend.index)
+        # Fill days without submissions, like resample('D')
+        return trend.sort_index().asfreq('D', fill_value=0).rename_axis('timestamp')
+
+    def get_summary_metrics(self):
+        """
+        Get dashboard summary counters from the aggregates
+        Returns dict with total, today, departments, high_risk and completed
+        """
+        stats = self.get_aggregates()
+        return {
+            'total': stats['total'],
+            'today': stats['daily'].get(datetime.now().date().isoformat(), 0),
+            'departments': len(stats['departments']),
+            'high_risk': sum(risks.get('Tinggi', 0) for risks in stats['risk_by_department'].values()),
+            # None when no record carries a status, like a missing column
+            'completed': stats['status'].get('Completed', 0) if stats['status'] else None
+        }
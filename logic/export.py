@@ -0,0 +1,117 @@
+import math
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Export format -> (file suffix, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('.csv', 'text/csv'),
+    'Excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'JSON': ('.json', 'application/json'),
+    'JSONL': ('.jsonl', 'application/x-ndjson')
+}
+
+
+def _excel_value(value):
+    """Convert a DataFrame cell to something openpyxl can write"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    if isinstance(value, datetime):
+        # Excel has no time zone support
+        return value.replace(tzinfo=None)
+    if isinstance(value, (list, dict)):
+        return str(value)
+    return value
+
+
+def _iter_chunks(df, chunk_size):
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _write_csv(df, path, chunk_size):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if df.empty:
+            df.to_csv(f, index=False)
+        for position, chunk in enumerate(_iter_chunks(df, chunk_size)):
+            chunk.to_csv(f, index=False, header=(position == 0))
+
+
+def _write_json(df, path, chunk_size):
+    # One array, as before, written a chunk of records at a time
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for position, chunk in enumerate(_iter_chunks(df, chunk_size)):
+            records = chunk.to_json(orient='records', date_format='iso', force_ascii=False)
+            if position:
+                f.write(",")
+            f.write(records[1:-1])
+        f.write("]")
+
+
+def _write_jsonl(df, path, chunk_size):
+    with open(path, 'w', encoding='utf-8') as f:
+        for chunk in _iter_chunks(df, chunk_size):
+            lines = chunk.to_json(orient='records', lines=True, date_format='iso', force_ascii=False)
+            f.write(lines if lines.endswith("\n") else lines + "\n")
+
+
+def _write_excel(df, path, chunk_size):
+    from openpyxl import Workbook
+
+    # Write-only mode streams rows out instead of building the sheet in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([str(column) for column in df.columns])
+    for chunk in _iter_chunks(df, chunk_size):
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append([_excel_value(value) for value in row])
+    workbook.save(path)
+
+
+def export_dataframe(df, export_format, chunk_size=5000):
+    """
+    Write df to a temporary file chunk by chunk
+    Returns (path, file_name, mime_type); the caller removes the file
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Format export tidak dikenal: {export_format}")
+    suffix, mime_type = EXPORT_FORMATS[export_format]
+
+    fd, path = tempfile.mkstemp(prefix="iso_export_", suffix=suffix)
+    os.close(fd)
+    path = Path(path)
+
+    writers = {
+        'CSV': _write_csv,
+        'Excel': _write_excel,
+        'JSON': _write_json,
+        'JSONL': _write_jsonl
+    }
+    try:
+        writers[export_format](df, path, chunk_size)
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+
+    return path, f"iso_data{suffix}", mime_type
+
+
+def export_file(df, export_format, chunk_size=5000):
+    """
+    Build an export through a temporary file and return it opened for reading.
+    The file is unlinked right away, so nothing piles up in /tmp and the
+    content is read from disk by whoever consumes the handle
+    """
+    path, _, _ = export_dataframe(df, export_format, chunk_size)
+    try:
+        return open(path, 'rb')
+    finally:
+        path.unlink(missing_ok=True)
@@ -1,11 +1,123 @@
+import argparse
+import hashlib
+import json
 import os
+import tempfile
+import uuid
 from pathlib import Path
 from datetime import datetime
 import shutil
+from dotenv import load_dotenv
+from logic.cold_storage import (
+    COLD_COMPRESSION, COMPRESSED_SUFFIXES, INCOMPRESSIBLE, compress_file, decompress_file,
+    get_decompressed_cache
+)
+from logic.form_store import get_write_lock
+from logic.storage_backend import get_object_store, get_upload_path
+from logic.upload_index import UploadIndex
+
+# Read size used when streaming uploads through the hasher
+CHUNK_SIZE = 1024 * 1024
+
+# Folders under data/uploads that hold no uploads: blobs, decompressed
+# copies of cold files, the form records and queued submissions
+RESERVED_DIRS = {'blobs', 'cold_cache', 'forms', 'write_queue'}
+
+# Compressed blobs must be at most this share of the original to be kept
+COLD_MIN_SAVING_RATIO = 0.9
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
+
+
+def stream_upload(source, directory, max_bytes=None, chunk_size=CHUNK_SIZE):
+    """
+    Copy a file-like upload into a temporary file in directory in fixed-size
+    chunks, hashing and counting bytes on the way; memory use stays at one
+    chunk however large the upload is. The caller renames the temp file
+    into place, which is atomic within the directory's filesystem.
+    Returns (temp_path, sha256_hex, size)
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    digest = hashlib.sha256()
+    size = 0
+    # One reusable buffer instead of a new bytes object per chunk
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    fd, temp_path = tempfile.mkstemp(prefix="upload_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                if hasattr(source, 'readinto'):
+                    read = source.readinto(buffer)
+                    chunk = view[:read]
+                else:
+                    chunk = source.read(chunk_size)
+                    read = len(chunk)
+                if not read:
+                    break
+                size += read
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(
+                        f"Ukuran file melebihi batas {max_bytes / 1024 / 1024:.1f} MB"
+                    )
+                digest.update(chunk)
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+    finally:
+        view.release()
+    return Path(temp_path), digest.hexdigest(), size
+
+
+def file_checksum(path, chunk_size=CHUNK_SIZE):
+    """Return the SHA-256 of a file, read in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
 class FileStorage:
-    def __init__(self):
-        self.base_path = Path("data/uploads")
+    """
+    Uploaded files stored once per unique content. Each blob lives under
+    blobs/<sha256[:2]>/<sha256>; the per-form paths are hardlinks to it.
+    A SQLite index holds per-file metadata and blob reference counts, so
+    listing and cleanup never walk the upload tree.
+    Blobs nobody saved for a while move to a cold tier: compressed, with
+    their per-form links removed, and decompressed on demand.
+    With FILE_STORAGE_BACKEND=s3 the blobs live in a bucket instead; the
+    per-form paths then exist only in the index and are downloaded on read.
+    The index itself stays under UPLOAD_PATH like the form records, so
+    replicas still share that folder.
+    """
+
+    # Temp files of interrupted uploads older than this are removed by reconcile
+    STALE_UPLOAD_SECONDS = 24 * 60 * 60
+
+    # Index meta key naming the blob store the index was last reconciled with
+    RECONCILED_KEY = 'reconciled_store'
+
+    def __init__(self, max_upload_size=None):
+        load_dotenv()
+        self.base_path = get_upload_path()
+        # Largest accepted upload in bytes, None for no limit
+        self.max_upload_size = max_upload_size
+        self.blobs_dir = self.base_path / "blobs"
+        self.blobs = get_object_store(self.blobs_dir)
+        # Reference index used before the SQLite index, only read for migration
+        self.legacy_index_file = self.blobs_dir / "index.json"
+        self.index = UploadIndex(self.base_path / "uploads_index.db")
+        self.cold_cache = get_decompressed_cache(self.base_path / "cold_cache")
         self.initialize_storage()
 
     def initialize_storage(self):
@@ -18,75 +130,306 @@ class FileStorage:
         for form_type in form_types:
             (self.base_path / form_type).mkdir(exist_ok=True)
 
-    def save_file(self, uploaded_file, form_type, identifier):
+        self.blobs_dir.mkdir(exist_ok=True)
+        self.index.initialize()
+
+        # Index uploads saved before the index existed, or move them to a
+        # newly configured object store; once, not on every start
+        if self._needs_reconcile():
+            with self._index_lock():
+                if self._needs_reconcile():
+                    self.reconcile_index()
+
+    def _needs_reconcile(self):
+        """Check whether the index was never reconciled with the current blob store"""
+        return (
+            self.legacy_index_file.exists()
+            or self.index.get_meta(self.RECONCILED_KEY) != self.blobs.name
+        )
+
+    def _index_lock(self):
+        return get_write_lock(self.index.db_file)
+
+    def blob_path(self, digest):
+        """Return the path of the blob with this SHA-256 digest"""
+        return self.blobs_dir / digest[:2] / digest
+
+    def _link(self, blob, file_path):
+        """Point file_path at a blob, copying if hardlinks are unsupported"""
+        try:
+            os.link(blob, file_path)
+        except OSError:
+            shutil.copyfile(blob, file_path)
+
+    def compressed_blob_path(self, digest, compression):
+        """Return the path of a blob's compressed copy"""
+        return self.blobs_dir / digest[:2] / f"{digest}{COMPRESSED_SUFFIXES[compression]}"
+
+    def _is_cold(self, blob_info):
+        return bool(blob_info) and blob_info['compression'] in COMPRESSED_SUFFIXES
+
+    def _remove_blob(self, digest):
+        """Delete a blob that lost its last reference"""
+        self.cold_cache.discard(digest)
+        if not self.blobs.local:
+            # The bucket cannot tell whether another upload index still
+            # references the object, so objects are never deleted
+            return
+        self.blobs.delete(digest)
+        for compression in COMPRESSED_SUFFIXES:
+            self.compressed_blob_path(digest, compression).unlink(missing_ok=True)
+        try:
+            self.blob_path(digest).parent.rmdir()
+        except OSError:
+            # Other blobs still share the folder
+            pass
+
+    def save_file(self, uploaded_file, form_type, identifier=None, record_id=None, filename=None):
         """
         Save uploaded file with proper naming and organization
+        filename overrides uploaded_file.name, e.g. for spooled uploads
         Returns the relative path to the saved file
+        Raises UploadTooLargeError if it exceeds max_upload_size
         """
         if not uploaded_file:
             return None
 
         # Clean form type string for directory name
-        form_dir = self.base_path / form_type.replace(" ", "_")
+        form_folder = form_type.replace(" ", "_")
+        form_dir = self.base_path / form_folder
         form_dir.mkdir(exist_ok=True)
 
-        # Generate unique filename with timestamp and identifier
+        # Generate unique filename with timestamp and identifier; the timestamp
+        # alone repeats for uploads of the same name within one second
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        clean_filename = uploaded_file.name.replace(" ", "_")
+        clean_filename = Path(filename or uploaded_file.name).name.replace(" ", "_")
+        identifier = identifier or record_id or uuid.uuid4().hex[:12]
         filename = f"{timestamp}_{identifier}_{clean_filename}"
         file_path = form_dir / filename
 
-        # Save the file
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        # Hash while streaming to disk, outside the index lock
+        temp_path, digest, size = stream_upload(uploaded_file, self.blobs_dir, self.max_upload_size)
+        relative_path = str(file_path.relative_to(self.base_path))
+
+        if not self.blobs.local:
+            return self._save_remote(temp_path, digest, size, relative_path, form_folder, record_id)
+
+        with self._index_lock():
+            blob = self.blob_path(digest)
+            blob_info = self.index.blob_info(digest)
+            if self._is_cold(blob_info):
+                # Content saved again is hot again, restore its links
+                self._thaw_blob(digest, blob_info, temp_path)
+            elif blob_info and blob.exists():
+                # Same content already stored once
+                temp_path.unlink()
+            else:
+                self.blobs.put_file(digest, temp_path)
+
+            # Re-saving to the same name replaces the previous reference
+            if file_path.exists():
+                file_path.unlink()
+            self._link(blob, file_path)
+
+            orphan = self.index.add_file(
+                relative_path, form_folder, digest, size,
+                mtime=file_path.stat().st_mtime,
+                created=datetime.now().timestamp(),
+                record_id=record_id
+            )
+            if orphan:
+                self._remove_blob(orphan)
 
         # Return relative path from base_path
-        return str(file_path.relative_to(self.base_path))
+        return relative_path
+
+    def _save_remote(self, temp_path, digest, size, relative_path, form_folder, record_id):
+        """Upload content to the object store once and index the per-form path"""
+        # Objects are immutable and named by content, uploading twice is harmless,
+        # so the (possibly multipart) upload runs outside the index lock
+        if self.index.blob_info(digest) is None and not self.blobs.exists(digest):
+            self.blobs.put_file(digest, temp_path)
+        else:
+            temp_path.unlink()
+
+        now = datetime.now().timestamp()
+        with self._index_lock():
+            orphan = self.index.add_file(
+                relative_path, form_folder, digest, size,
+                mtime=now, created=now, record_id=record_id
+            )
+            if orphan:
+                self._remove_blob(orphan)
+        return relative_path
+
+    def storage_key(self, file_path):
+        """
+        Return the path relative to the upload folder that a record's
+        file_path names; older records hold absolute or working-directory
+        relative paths
+        """
+        path = Path(file_path)
+        for root in (self.base_path, self.base_path.resolve()):
+            try:
+                return str(path.relative_to(root))
+            except ValueError:
+                continue
+        return str(path)
 
     def get_file_path(self, relative_path):
-        """Get absolute file path from relative path"""
-        return self.base_path / relative_path
+        """
+        Get absolute file path from relative path
+        Cold files are decompressed, and files in object storage downloaded,
+        into a small LRU cache on first access
+        """
+        file_path = self.base_path / relative_path
+        if file_path.exists():
+            return file_path
+
+        row = self.index.get_file(str(relative_path))
+        if row is None:
+            return file_path
+        if not self.blobs.local:
+            return self.cold_cache.fetch(
+                row['checksum'],
+                Path(row['path']).suffix,
+                lambda destination: self.blobs.get_file(row['checksum'], destination)
+            )
+        if row['compression'] not in COMPRESSED_SUFFIXES:
+            return file_path
+        return self.cold_cache.get(
+            row['checksum'],
+            Path(row['path']).suffix,
+            self.compressed_blob_path(row['checksum'], row['compression']),
+            row['compression']
+        )
+
+    def read_file(self, relative_path):
+        """Return the content of a stored file, hot or cold"""
+        with open(self.get_file_path(relative_path), 'rb') as f:
+            return f.read()
+
+    def _thaw_blob(self, digest, blob_info, source_path):
+        """
+        Move a cold blob back to the hot tier, relinking its files
+        source_path holds the uncompressed content and is consumed
+        """
+        blob = self.blob_path(digest)
+        blob.parent.mkdir(exist_ok=True)
+        os.replace(source_path, blob)
+        for relative_path in self.index.paths_for_blob(digest):
+            file_path = self.base_path / relative_path
+            if not file_path.exists():
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                self._link(blob, file_path)
+        self.index.set_compression(digest, None, None)
+        self.compressed_blob_path(digest, blob_info['compression']).unlink(missing_ok=True)
+        self.cold_cache.discard(digest)
+
+    def compress_cold_files(self, min_age_days, batch_size=50):
+        """
+        Compress one batch of blobs whose newest file is older than min_age_days
+        Returns dict with candidates, blobs compressed, incompressible blobs
+        and bytes before/after
+        """
+        cutoff = datetime.now().timestamp() - min_age_days * 24 * 60 * 60
+        # Object stores have their own storage classes and lifecycle rules
+        candidates = self.index.cold_candidates(cutoff, batch_size) if self.blobs.local else []
+        result = {
+            'candidates': len(candidates), 'blobs': 0, 'incompressible': 0,
+            'bytes_before': 0, 'bytes_after': 0
+        }
+
+        for candidate in candidates:
+            digest = candidate['digest']
+            blob = self.blob_path(digest)
+            if not blob.exists():
+                continue
+
+            # Compress outside the lock, uploads keep flowing meanwhile
+            compressed = self.compressed_blob_path(digest, COLD_COMPRESSION)
+            fd, temp_path = tempfile.mkstemp(prefix=compressed.name + ".", suffix=".tmp", dir=compressed.parent)
+            os.close(fd)
+            temp_path = Path(temp_path)
+            try:
+                compress_file(blob, temp_path, COLD_COMPRESSION)
+            except Exception:
+                temp_path.unlink(missing_ok=True)
+                raise
+            stored_size = temp_path.stat().st_size
+
+            with self._index_lock():
+                if stored_size > candidate['size'] * COLD_MIN_SAVING_RATIO:
+                    # Already compressed formats (most scanned PDFs) stay as they are
+                    temp_path.unlink()
+                    self.index.set_compression(digest, INCOMPRESSIBLE, None, candidate['refs'])
+                    result['incompressible'] += 1
+                    continue
+
+                # Skip blobs that gained a reference while compressing
+                if not self.index.set_compression(digest, COLD_COMPRESSION, stored_size, candidate['refs']):
+                    temp_path.unlink()
+                    continue
+                os.replace(temp_path, compressed)
+                for relative_path in self.index.paths_for_blob(digest):
+                    (self.base_path / relative_path).unlink(missing_ok=True)
+                blob.unlink()
+
+            result['blobs'] += 1
+            result['bytes_before'] += candidate['size']
+            result['bytes_after'] += stored_size
+
+        return result
+
+    def get_cold_tier_stats(self):
+        """
+        Report cold tier savings per form type folder
+        Returns {form_type: {files, cold_files, cold_bytes, stored_bytes, saved_bytes}}
+        """
+        return self.index.cold_stats()
 
     def delete_file(self, relative_path):
         """Delete file by relative path"""
         file_path = self.base_path / relative_path
-        if file_path.exists():
-            file_path.unlink()
-            return True
-        return False
+        with self._index_lock():
+            existed = file_path.exists()
+            file_path.unlink(missing_ok=True)
+            indexed, orphan = self.index.remove_file(str(relative_path))
+            if orphan:
+                self._remove_blob(orphan)
+        return existed or indexed
 
     def list_files(self, form_type=None):
         """
         List all files or files for specific form type
         Returns list of relative paths
         """
-        if form_type:
-            search_path = self.base_path / form_type.replace(" ", "_")
-        else:
-            search_path = self.base_path
+        return self.index.list_files(form_type.replace(" ", "_") if form_type else None)
 
-        files = []
-        if search_path.exists():
-            for file_path in search_path.rglob("*"):
-                if file_path.is_file():
-                    files.append(str(file_path.relative_to(self.base_path)))
-        return files
+    def get_storage_stats(self):
+        """
+        Summarize deduplication
+        Returns dict with reference count, unique blobs and bytes saved
+        """
+        return self.index.stats()
 
     def get_file_info(self, relative_path):
         """
         Get file information
         Returns dict with file details
         """
-        file_path = self.base_path / relative_path
-        if not file_path.exists():
+        row = self.index.get_file(str(relative_path))
+        if row is None:
             return None
 
         return {
-            'name': file_path.name,
-            'size': file_path.stat().st_size,
-            'created': datetime.fromtimestamp(file_path.stat().st_ctime),
-            'modified': datetime.fromtimestamp(file_path.stat().st_mtime),
-            'path': str(relative_path)
+            'name': Path(row['path']).name,
+            'size': row['size'],
+            'created': datetime.fromtimestamp(row['created']),
+            'modified': datetime.fromtimestamp(row['mtime']),
+            'path': str(relative_path),
+            'checksum': row['checksum'],
+            'record_id': row['record_id']
         }
 
     def move_file(self, relative_path, new_form_type):
@@ -95,15 +438,22 @@ class FileStorage:
         Returns new relative path
         """
         current_path = self.base_path / relative_path
-        if not current_path.exists():
+        # Cold files have no per-form link, only their index row moves
+        cold = not current_path.exists()
+        if cold and self.index.get_file(str(relative_path)) is None:
             return None
 
-        new_dir = self.base_path / new_form_type.replace(" ", "_")
+        new_folder = new_form_type.replace(" ", "_")
+        new_dir = self.base_path / new_folder
         new_dir.mkdir(exist_ok=True)
         new_path = new_dir / current_path.name
+        new_relative_path = str(new_path.relative_to(self.base_path))
 
-        shutil.move(str(current_path), str(new_path))
-        return str(new_path.relative_to(self.base_path))
+        with self._index_lock():
+            if not cold:
+                shutil.move(str(current_path), str(new_path))
+            self.index.move_file(str(relative_path), new_relative_path, new_folder)
+        return new_relative_path
 
     def cleanup_old_files(self, days_old=30):
         """
@@ -113,9 +463,277 @@ class FileStorage:
         cutoff = datetime.now().timestamp() - (days_old * 24 * 60 * 60)
         count = 0
 
-        for file_path in self.base_path.rglob("*"):
-            if file_path.is_file() and file_path.stat().st_mtime < cutoff:
-                file_path.unlink()
+        # Hardlinks share the blob's mtime, so age is the indexed save time
+        for relative_path in self.index.files_created_before(cutoff):
+            if self.delete_file(relative_path):
                 count += 1
 
         return count
+
+    def _scan_uploads(self):
+        """Yield os.DirEntry objects for every file in the form type folders"""
+        pending = [
+            entry.path for entry in os.scandir(self.base_path)
+            if entry.is_dir(follow_symlinks=False) and entry.name not in RESERVED_DIRS
+        ]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+
+    def _load_legacy_index(self):
+        """Return {path: {digest, created}} from the old JSON reference index"""
+        try:
+            with open(self.legacy_index_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('refs', {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _remove_stale_uploads(self):
+        """Delete temp files of uploads interrupted more than a day ago"""
+        stale_before = datetime.now().timestamp() - self.STALE_UPLOAD_SECONDS
+        with os.scandir(self.blobs_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.startswith("upload_") and entry.stat().st_mtime < stale_before:
+                    os.unlink(entry.path)
+
+    def _reconcile_remote(self):
+        """
+        Reconcile the index with the object store. Files still in the form
+        folders or in local blobs (from before switching to s3) are
+        uploaded and removed locally; rows whose object is gone are dropped.
+        Returns dict with counts of files, hashed and uploaded blobs
+        """
+        result = {'files': 0, 'hashed': 0, 'uploaded': 0}
+        with self._index_lock():
+            known = self.index.all_files()
+            known_blobs = self.index.all_blobs()
+            legacy = self._load_legacy_index()
+            stored = set(self.blobs.list_keys())
+            rows = {}
+
+            for entry in self._scan_uploads():
+                relative_path = str(Path(entry.path).relative_to(self.base_path))
+                stat = entry.stat(follow_symlinks=False)
+                digest = file_checksum(entry.path)
+                result['hashed'] += 1
+                if digest not in stored:
+                    # put_file consumes its source, upload a copy
+                    temp_path = self.blobs_dir / f"upload_{digest}.tmp"
+                    shutil.copyfile(entry.path, temp_path)
+                    self.blobs.put_file(digest, temp_path)
+                    stored.add(digest)
+                    result['uploaded'] += 1
+                row = known.get(relative_path) or {}
+                rows[relative_path] = {
+                    'path': relative_path,
+                    'form_type': Path(relative_path).parts[0],
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime,
+                    'checksum': digest,
+                    'record_id': row.get('record_id'),
+                    'created': row.get('created') or legacy.get(relative_path, {}).get('created') or stat.st_mtime
+                }
+                os.unlink(entry.path)
+
+            for relative_path, row in known.items():
+                if relative_path in rows:
+                    continue
+                digest = row['checksum']
+                if digest not in stored:
+                    # Hot or cold blob left from local storage
+                    blob_info = known_blobs.get(digest) or {}
+                    blob = self.blob_path(digest)
+                    temp_path = self.blobs_dir / f"upload_{digest}.tmp"
+                    if blob.exists():
+                        shutil.copyfile(blob, temp_path)
+                    elif self._is_cold(blob_info) and \
+                            self.compressed_blob_path(digest, blob_info['compression']).exists():
+                        decompress_file(
+                            self.compressed_blob_path(digest, blob_info['compression']),
+                            temp_path, blob_info['compression']
+                        )
+                    else:
+                        continue
+                    self.blobs.put_file(digest, temp_path)
+                    stored.add(digest)
+                    result['uploaded'] += 1
+                rows[relative_path] = row
+
+            rows = [{key: row[key] for key in (
+                'path', 'form_type', 'size', 'mtime', 'checksum', 'record_id', 'created'
+            )} for row in rows.values()]
+            self.index.replace_all(rows)
+            result['files'] = len(rows)
+
+            # Local blobs are all uploaded by now
+            with os.scandir(self.blobs_dir) as shards:
+                for shard in shards:
+                    if shard.is_dir():
+                        shutil.rmtree(shard.path)
+            self._remove_stale_uploads()
+
+            if self.legacy_index_file.exists():
+                self.legacy_index_file.rename(self.legacy_index_file.with_name("index.json.migrated"))
+            self.index.set_meta(self.RECONCILED_KEY, self.blobs.name)
+
+        return result
+
+    def reconcile_index(self):
+        """
+        Rebuild the metadata index from the upload folders using os.scandir.
+        Files whose size and mtime match the index keep their checksum, others
+        are hashed; copies of stored content are turned into hardlinks and
+        blobs nobody references are removed. Cold files, which have no
+        per-form link, are kept while their compressed blob exists.
+        With object storage see _reconcile_remote.
+        Returns dict with counts of files, hashed, linked and removed blobs
+        """
+        if not self.blobs.local:
+            return self._reconcile_remote()
+
+        result = {'files': 0, 'hashed': 0, 'linked': 0, 'blobs_removed': 0}
+        with self._index_lock():
+            known = self.index.all_files()
+            known_blobs = self.index.all_blobs()
+            legacy = self._load_legacy_index()
+            rows = []
+
+            for entry in self._scan_uploads():
+                relative_path = str(Path(entry.path).relative_to(self.base_path))
+                stat = entry.stat(follow_symlinks=False)
+                row = known.get(relative_path)
+
+                if row and row['size'] == stat.st_size and row['mtime'] == stat.st_mtime:
+                    digest = row['checksum']
+                else:
+                    digest = file_checksum(entry.path)
+                    result['hashed'] += 1
+
+                blob = self.blob_path(digest)
+                if not blob.exists():
+                    blob.parent.mkdir(exist_ok=True)
+                    self._link(Path(entry.path), blob)
+                elif blob.stat().st_ino != stat.st_ino:
+                    # Separate copy of stored content, share the blob instead
+                    temp_link = Path(entry.path + ".link")
+                    self._link(blob, temp_link)
+                    os.replace(temp_link, entry.path)
+                    stat = os.stat(entry.path)
+                    result['linked'] += 1
+
+                created = (row or {}).get('created') or legacy.get(relative_path, {}).get('created') or stat.st_mtime
+                rows.append({
+                    'path': relative_path,
+                    'form_type': Path(relative_path).parts[0],
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime,
+                    'checksum': digest,
+                    'record_id': (row or {}).get('record_id'),
+                    'created': created
+                })
+
+            # Cold files: relink if their content is hot again, else keep the row
+            seen = {row['path'] for row in rows}
+            for relative_path, row in known.items():
+                blob_info = known_blobs.get(row['checksum'])
+                if relative_path in seen or not self._is_cold(blob_info):
+                    continue
+                blob = self.blob_path(row['checksum'])
+                if blob.exists():
+                    self._link(blob, self.base_path / relative_path)
+                elif not self.compressed_blob_path(row['checksum'], blob_info['compression']).exists():
+                    continue
+                rows.append(row)
+
+            # How each referenced blob is stored now
+            blob_storage = {}
+            for digest in {row['checksum'] for row in rows}:
+                blob_info = known_blobs.get(digest) or {}
+                if not self.blob_path(digest).exists():
+                    blob_storage[digest] = (blob_info['compression'], blob_info['stored_size'])
+                elif blob_info.get('compression') == INCOMPRESSIBLE:
+                    blob_storage[digest] = (INCOMPRESSIBLE, None)
+
+            rows = [{key: row[key] for key in (
+                'path', 'form_type', 'size', 'mtime', 'checksum', 'record_id', 'created'
+            )} for row in rows]
+            self.index.replace_all(rows, blob_storage)
+            result['files'] = len(rows)
+
+            # Drop unreferenced blobs, stale compressed copies of hot blobs
+            # and temp files of interrupted uploads or compressions
+            referenced = {row['checksum'] for row in rows}
+            stale_before = datetime.now().timestamp() - self.STALE_UPLOAD_SECONDS
+            with os.scandir(self.blobs_dir) as shards:
+                for shard in shards:
+                    if shard.is_file() and shard.name.startswith("upload_"):
+                        if shard.stat().st_mtime < stale_before:
+                            os.unlink(shard.path)
+                        continue
+                    if not shard.is_dir():
+                        continue
+                    with os.scandir(shard.path) as blobs:
+                        for blob in blobs:
+                            digest, _, suffix = blob.name.partition(".")
+                            if suffix.endswith("tmp"):
+                                if blob.stat().st_mtime < stale_before:
+                                    os.unlink(blob.path)
+                            elif digest not in referenced:
+                                self._remove_blob(digest)
+                                result['blobs_removed'] += 1
+                            elif suffix and digest not in blob_storage:
+                                os.unlink(blob.path)
+
+            if self.legacy_index_file.exists():
+                self.legacy_index_file.rename(self.legacy_index_file.with_name("index.json.migrated"))
+            self.index.set_meta(self.RECONCILED_KEY, self.blobs.name)
+
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the uploaded file store")
+    parser.add_argument('command', choices=['reconcile', 'stats', 'compress'])
+    parser.add_argument('--min-age-days', type=int, default=30,
+                        help="Compress files nobody saved for this many days")
+    args = parser.parse_args()
+
+    storage = FileStorage()
+    if args.command == 'reconcile':
+        result = storage.reconcile_index()
+        if storage.blobs.local:
+            print(
+                f"{result['files']} file terindeks, {result['hashed']} di-hash ulang, "
+                f"{result['linked']} duplikat digabung, {result['blobs_removed']} blob dihapus"
+            )
+        else:
+            print(
+                f"{result['files']} file terindeks, {result['uploaded']} diunggah ke S3"
+            )
+    elif args.command == 'compress':
+        compressed = 0
+        while True:
+            result = storage.compress_cold_files(args.min_age_days)
+            compressed += result['blobs']
+            if result['candidates'] < 50 or not (result['blobs'] or result['incompressible']):
+                break
+        print(f"{compressed} blob dikompresi")
+    stats = storage.get_storage_stats()
+    print(
+        f"{stats['files']} file, {stats['blobs']} blob unik, "
+        f"{stats['stored_bytes'] / 1024 / 1024:.1f} MB tersimpan, "
+        f"{stats['saved_bytes'] / 1024 / 1024:.1f} MB dihemat"
+    )
+    for form_type, cold in storage.get_cold_tier_stats().items():
+        print(
+            f"{form_type}: {cold['cold_files']}/{cold['files']} file dingin, "
+            f"{cold['saved_bytes'] / 1024 / 1024:.1f} MB dihemat oleh kompresi"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1013 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from pathlib import Path
+
+# Advisory file locks coordinate replicas on POSIX; elsewhere writers are
+# only serialized within the process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Parsed datasets shared by every DataHandler (and Streamlit session) in the
+# process, keyed by store file and tagged with the data version they reflect
+_DATASET_CACHE = {}
+_DATASET_CACHE_LOCK = threading.Lock()
+
+class WriteLock:
+    """
+    Re-entrant lock for one writer at a time across threads and processes.
+    Threads queue on an in-process lock; the outermost holder then takes
+    an exclusive flock on <path>.lock, so several app processes (e.g.
+    Streamlit replicas behind a load balancer) never interleave a
+    read-modify-write. The OS drops the flock if the holder dies.
+    """
+
+    def __init__(self, path):
+        self.lock_file = Path(str(path) + ".lock")
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        """Take the lock; with blocking=False return False instead of waiting"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if self._depth == 0 and fcntl is not None:
+            try:
+                if self._fd is None:
+                    self._fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._thread_lock.release()
+                return False
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+# One writer at a time per store file, within the process and across
+# processes. Re-entrant so DataHandler can hold it around a store write
+# plus its bookkeeping
+_WRITE_LOCKS = {}
+_WRITE_LOCKS_GUARD = threading.Lock()
+
+
+def get_write_lock(path):
+    """Return the write lock for a store file, shared by the whole process"""
+    key = str(path)
+    with _WRITE_LOCKS_GUARD:
+        if key not in _WRITE_LOCKS:
+            _WRITE_LOCKS[key] = WriteLock(path)
+        return _WRITE_LOCKS[key]
+
+
+def get_cached_dataset(path, version):
+    """Return the cached records for path if they match version, else None"""
+    with _DATASET_CACHE_LOCK:
+        cached = _DATASET_CACHE.get(str(path))
+    if cached and cached[0] == version:
+        return cached[1]
+    return None
+
+
+def set_cached_dataset(path, version, data):
+    """Store parsed records for path at version"""
+    with _DATASET_CACHE_LOCK:
+        _DATASET_CACHE[str(path)] = (version, data)
+
+
+def update_cached_dataset(path, old_version, new_version, update):
+    """
+    Carry a cached dataset forward across our own write with update(data).
+    Drops the entry instead if someone else changed the data in between.
+    update must return a new object so readers holding the old one are unaffected.
+    """
+    with _DATASET_CACHE_LOCK:
+        cached = _DATASET_CACHE.get(str(path))
+        if cached and cached[0] == old_version:
+            _DATASET_CACHE[str(path)] = (new_version, update(cached[1]))
+        else:
+            _DATASET_CACHE.pop(str(path), None)
+
+
+def roundtrip(entries):
+    """Serialize and parse entries so cached records look exactly like replayed ones"""
+    return [json.loads(json.dumps(entry, ensure_ascii=False, default=str)) for entry in entries]
+
+
+def invalidate_cached_dataset(path):
+    """Forget the cached dataset for path"""
+    with _DATASET_CACHE_LOCK:
+        _DATASET_CACHE.pop(str(path), None)
+
+
+# Partition for records without a usable timestamp
+UNDATED_PARTITION = "undated"
+
+
+def partition_key(record):
+    """Return the YYYY-MM partition for a record"""
+    timestamp = str(record.get('timestamp') or '')
+    try:
+        return datetime.fromisoformat(timestamp).strftime("%Y-%m")
+    except ValueError:
+        return UNDATED_PARTITION
+
+
+def new_record_id(record):
+    """
+    Generate a stable record ID. The ID starts with the record's partition
+    (e.g. 2024-05-3f2a...), so the JSON store can find it without an index.
+    """
+    return f"{partition_key(record)}-{uuid.uuid4().hex}"
+
+
+# YYYY-MM or undated, followed by a hex UUID
+RECORD_ID_PATTERN = re.compile(r'^(\d{4}-\d{2}|' + UNDATED_PARTITION + r')-[0-9a-f]{32}$')
+
+
+def partition_of_id(record_id):
+    """Return the partition encoded in a record ID, or None if it is malformed"""
+    match = RECORD_ID_PATTERN.match(str(record_id))
+    return match.group(1) if match else None
+
+
+def assign_record_id(record):
+    """
+    Give a record a new stable ID, or check the one it was supplied with
+    Returns the ID; raises ValueError if a supplied ID is malformed or names
+    another partition than the record's timestamp, as lookups would miss it
+    """
+    record_id = record.get('id')
+    if not record_id:
+        record['id'] = new_record_id(record)
+    elif partition_of_id(record_id) != partition_key(record):
+        raise ValueError(f"ID record tidak valid: {record_id}")
+    return record['id']
+
+
+def with_record_ids(entries):
+    """Return entries with an ID assigned to any that lack one"""
+    return [entry if entry.get('id') else {**entry, 'id': new_record_id(entry)} for entry in entries]
+
+
+def to_iso_bound(value):
+    """
+    Normalize a date filter value to an ISO string comparable with stored timestamps.
+    Dates are treated as midnight, matching pd.to_datetime semantics.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return datetime.combine(value, time.min).isoformat()
+    return datetime.fromisoformat(str(value)).isoformat()
+
+
+def record_matches(record, start=None, end=None, form_type=None, department=None):
+    """Check a record against normalized dashboard filters"""
+    timestamp = str(record.get('timestamp', ''))
+    if start and timestamp < start:
+        return False
+    if end and timestamp > end:
+        return False
+    if form_type and record.get('jenis_form') != form_type:
+        return False
+    if department and record.get('departemen') != department:
+        return False
+    return True
+
+
+class PartitionSnapshot:
+    """Live records of one partition after replaying its log"""
+
+    def __init__(self, by_id=None):
+        # Primary-key index: record ID -> latest version of the record
+        self.by_id = by_id or {}
+        self.records = list(self.by_id.values())
+
+    def replay(self, entries):
+        """Return a new snapshot with log entries (versions and tombstones) applied"""
+        by_id = dict(self.by_id)
+        for entry in entries:
+            if entry.get('_deleted'):
+                by_id.pop(entry.get('id'), None)
+            else:
+                # Rows written before IDs existed get a placeholder key
+                # until the format upgrade assigns real IDs
+                by_id[entry.get('id') or object()] = entry
+        return PartitionSnapshot(by_id)
+
+
+class JsonlFormStore:
+    """
+    Form records kept in append-only JSON-lines logs, one per calendar
+    month, plus a small manifest of per-partition timestamp ranges so
+    date-range queries only open the partitions they overlap.
+    """
+
+    UNDATED_PARTITION = UNDATED_PARTITION
+
+    # Manifest format 2: every record carries a stable ID
+    MANIFEST_FORMAT = 2
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        # Legacy single-document store, only read for migration
+        self.legacy_file = self.base_path / "forms_data.json"
+        # Legacy single append-only log, only read for migration
+        self.log_file = self.base_path / "forms_data.jsonl"
+        # Monthly partitions: forms/YYYY-MM.jsonl
+        self.partitions_dir = self.base_path / "forms"
+        self.manifest_file = self.partitions_dir / "manifest.json"
+
+    def initialize(self):
+        """Create the partition layout, migrating older layouts if present"""
+        self.partitions_dir.mkdir(parents=True, exist_ok=True)
+        if self.manifest_file.exists():
+            if self._manifest_format() < self.MANIFEST_FORMAT:
+                # Assign IDs to records written before they existed
+                with self.write_lock():
+                    self.rewrite(self.load_all())
+            return
+
+        with self.write_lock():
+            if self.log_file.exists() or self.legacy_file.exists():
+                self.migrate_legacy()
+            else:
+                self.rebuild_manifest()
+
+    def migrate_legacy(self):
+        """
+        Convert a legacy forms_data.json or forms_data.jsonl into partitions.
+        Old files are kept with a .migrated suffix for reference.
+        """
+        data = []
+        if self.log_file.exists():
+            data = self._read_lines(self.log_file)
+        elif self.legacy_file.exists():
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+        self.rewrite(data)
+
+        for legacy in [self.log_file, self.legacy_file]:
+            if legacy.exists():
+                legacy.rename(legacy.with_name(legacy.name + ".migrated"))
+
+    def has_data(self):
+        """Check whether there is anything on disk to import from"""
+        return (
+            self.manifest_file.exists()
+            or self.log_file.exists()
+            or self.legacy_file.exists()
+        )
+
+    def write_lock(self):
+        """Lock serializing writers of this store across threads and processes"""
+        return get_write_lock(self.partitions_dir)
+
+    def compaction_lock(self):
+        """
+        Lock held by the one compactor of this store, across threads and
+        processes; a single lock file however many partitions get compacted
+        """
+        return get_write_lock(self.partitions_dir.with_name(self.partitions_dir.name + ".compact"))
+
+    def data_version(self):
+        """
+        Logical version of the store: a sequence number bumped by every
+        write but not by compaction, which leaves the records unchanged.
+        The generation changes whenever the manifest is created afresh.
+        """
+        document = self._load_manifest_document()
+        if document is None:
+            return None
+        return [document.get('generation'), document.get('sequence', 0)]
+
+    def partition_key(self, record):
+        """Return the YYYY-MM partition for a record"""
+        return partition_key(record)
+
+    def partition_file(self, key):
+        """Return the log file for a partition"""
+        return self.partitions_dir / f"{key}.jsonl"
+
+    def _load_manifest_document(self):
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def load_manifest(self):
+        """Return {partition: {min_timestamp, max_timestamp, count, lines}}"""
+        document = self._load_manifest_document()
+        return document.get('partitions', {}) if document else {}
+
+    def _manifest_format(self):
+        document = self._load_manifest_document()
+        return document.get('format', 1) if document else 1
+
+    def _save_manifest(self, partitions, bump_sequence=True):
+        """Write the manifest atomically"""
+        previous = self._load_manifest_document() or {}
+        sequence = previous.get('sequence', 0) + (1 if bump_sequence else 0)
+        document = {
+            'format': self.MANIFEST_FORMAT,
+            'generation': previous.get('generation') or uuid.uuid4().hex,
+            'sequence': sequence,
+            'partitions': partitions
+        }
+        temp_file = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.manifest_file)
+
+    def _fold_into_manifest(self, partitions, key, entries, count_delta=None, lines_delta=None):
+        """Update a partition's manifest entry with written records"""
+        info = partitions.setdefault(key, {'min_timestamp': None, 'max_timestamp': None, 'count': 0, 'lines': 0})
+        # Manifests written before compaction existed lack a line count
+        info['lines'] = info.get('lines', info['count']) + (len(entries) if lines_delta is None else lines_delta)
+        info['count'] += len(entries) if count_delta is None else count_delta
+        timestamps = [str(entry['timestamp']) for entry in entries if entry.get('timestamp')]
+        if timestamps:
+            info['min_timestamp'] = min([ts for ts in [info['min_timestamp'], *timestamps] if ts])
+            info['max_timestamp'] = max([ts for ts in [info['max_timestamp'], *timestamps] if ts])
+
+    def rebuild_manifest(self):
+        """Recompute the manifest by scanning every partition file"""
+        partitions = {}
+        for partition_file in sorted(self.partitions_dir.glob("*.jsonl")):
+            with open(partition_file, 'rb') as f:
+                lines = sum(1 for line in f if line.strip())
+            self._fold_into_manifest(
+                partitions, partition_file.stem, self.load_partition(partition_file.stem), lines_delta=lines
+            )
+        self._save_manifest(partitions)
+
+    def _group_by_partition(self, entries):
+        grouped = {}
+        for entry in entries:
+            grouped.setdefault(self.partition_key(entry), []).append(entry)
+        return grouped
+
+    def rewrite(self, data):
+        """Rewrite all partitions atomically per file (used for migration)"""
+        with self.write_lock():
+            grouped = self._group_by_partition(with_record_ids(data))
+            for partition_file in self.partitions_dir.glob("*.jsonl"):
+                if partition_file.stem not in grouped:
+                    partition_file.unlink()
+                    invalidate_cached_dataset(partition_file)
+
+            partitions = {}
+            for key, entries in grouped.items():
+                partition_file = self.partition_file(key)
+                temp_file = partition_file.with_name(partition_file.name + ".tmp")
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, partition_file)
+                invalidate_cached_dataset(partition_file)
+                self._fold_into_manifest(partitions, key, entries)
+
+            self._save_manifest(partitions)
+
+    def _ends_with_torn_line(self, path):
+        """Check whether a log's last line lacks its newline (interrupted write)"""
+        try:
+            with open(path, 'rb') as f:
+                if f.seek(0, os.SEEK_END) == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except FileNotFoundError:
+            return False
+
+    def _append_to_partition(self, key, entries):
+        """
+        Append log entries to one partition with a single fsync'd write.
+        Callers hold the write lock.
+        """
+        partition_file = self.partition_file(key)
+        lines = "".join(
+            json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in entries
+        )
+        # Close a torn last line first, or the new records would be glued onto it
+        if self._ends_with_torn_line(partition_file):
+            lines = "\n" + lines
+        old_version = self._file_version(partition_file)
+        with open(partition_file, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        parsed = roundtrip(entries)
+        update_cached_dataset(
+            partition_file, old_version, self._file_version(partition_file),
+            lambda snapshot: snapshot.replay(parsed)
+        )
+
+    def append_many(self, entries):
+        """Append new entries to their partitions with one fsync'd write per partition"""
+        with self.write_lock():
+            partitions = self.load_manifest()
+            for key, group in self._group_by_partition(with_record_ids(entries)).items():
+                self._append_to_partition(key, group)
+                self._fold_into_manifest(partitions, key, group)
+            self._save_manifest(partitions)
+
+    def append(self, entry):
+        """Append a single entry"""
+        self.append_many([entry])
+
+    def get(self, record_id):
+        """Return the live record with this ID, or None"""
+        key = partition_of_id(record_id)
+        if key is None or not self.partition_file(key).exists():
+            return None
+        return self._load_snapshot(key).by_id.get(record_id)
+
+    def put(self, record):
+        """Append a new version of an existing record to its partition"""
+        with self.write_lock():
+            key = partition_of_id(record['id'])
+            partitions = self.load_manifest()
+            self._append_to_partition(key, [record])
+            self._fold_into_manifest(partitions, key, [record], count_delta=0)
+            self._save_manifest(partitions)
+
+    def delete(self, record_id):
+        """Append a tombstone for a record"""
+        with self.write_lock():
+            key = partition_of_id(record_id)
+            partitions = self.load_manifest()
+            tombstone = {'id': record_id, '_deleted': True, 'deleted_at': datetime.now().isoformat()}
+            self._append_to_partition(key, [tombstone])
+            self._fold_into_manifest(partitions, key, [], count_delta=-1, lines_delta=1)
+            self._save_manifest(partitions)
+
+    def _file_version(self, path):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _read_lines(self, path):
+        """Replay a JSON-lines file"""
+        data = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    data.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn trailing write from an interrupted submit
+                    continue
+        return data
+
+    def _load_snapshot(self, key):
+        """Replay one partition's log, using the process-wide cache"""
+        partition_file = self.partition_file(key)
+        version = self._file_version(partition_file)
+        if version is None:
+            return PartitionSnapshot()
+
+        snapshot = get_cached_dataset(partition_file, version)
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = PartitionSnapshot().replay(self._read_lines(partition_file))
+        # Only cache if no append landed while we were reading
+        if self._file_version(partition_file) == version:
+            set_cached_dataset(partition_file, version, snapshot)
+        return snapshot
+
+    def load_partition(self, key):
+        """
+        Load the live records of one partition.
+        The list is shared process-wide until the partition changes,
+        so callers must treat it as read-only.
+        """
+        return self._load_snapshot(key).records
+
+    def compaction_candidates(self, min_garbage_ratio=0.2):
+        """Return partitions whose log has at least this share of superseded lines"""
+        candidates = []
+        for key, info in sorted(self.load_manifest().items()):
+            lines = info.get('lines', info['count'])
+            if lines and (lines - info['count']) / lines >= min_garbage_ratio:
+                candidates.append(key)
+        return candidates
+
+    def compact_partition(self, key):
+        """
+        Rewrite a partition's log with only its live records.
+        The bulk of the work happens without the write lock; submits are only
+        held up while the lines appended in the meantime are copied over and
+        the compacted file is renamed into place.
+        Returns (lines_before, lines_after) or None if there was nothing to do
+        """
+        # One compactor at a time; a second one (another replica or a
+        # manual run) skips instead of doing the same work twice
+        compaction_lock = self.compaction_lock()
+        if not compaction_lock.acquire(blocking=False):
+            return None
+        try:
+            return self._compact_partition(key)
+        finally:
+            compaction_lock.release()
+
+    def _compact_partition(self, key):
+        """Compact one partition; callers hold its compaction lock"""
+        partition_file = self.partition_file(key)
+        try:
+            stat = partition_file.stat()
+        except FileNotFoundError:
+            return None
+
+        # Unique name, so an interrupted run never clashes with the next one
+        fd, temp_file = tempfile.mkstemp(
+            prefix=partition_file.name + ".", suffix=".compact", dir=self.partitions_dir
+        )
+        os.close(fd)
+        temp_file = Path(temp_file)
+        os.chmod(temp_file, stat.st_mode & 0o777)
+
+        try:
+            # Phase 1: replay the complete lines present right now
+            entries = []
+            prefix_size = 0
+            lines_before = 0
+            with open(partition_file, 'rb') as f:
+                while prefix_size < stat.st_size:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        # Partial line from a write in progress, leave it to phase 2
+                        break
+                    prefix_size += len(line)
+                    if not line.strip():
+                        continue
+                    lines_before += 1
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+            snapshot = PartitionSnapshot().replay(entries)
+            del entries
+
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for record in snapshot.by_id.values():
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+            # Phase 2: copy whatever was appended meanwhile, then swap files
+            with self.write_lock():
+                current = partition_file.stat()
+                if current.st_ino != stat.st_ino:
+                    # Partition was rewritten under us, try again next round
+                    return None
+
+                with open(partition_file, 'rb') as src:
+                    src.seek(prefix_size)
+                    tail = src.read()
+                tail_entries = []
+                for line in tail.splitlines():
+                    if not line.strip():
+                        continue
+                    try:
+                        tail_entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        tail_entries.append({})
+                tail_lines = len(tail_entries)
+
+                with open(temp_file, 'ab') as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, partition_file)
+                invalidate_cached_dataset(partition_file)
+
+                partitions = self.load_manifest()
+                if key in partitions:
+                    partitions[key]['lines'] = len(snapshot.by_id) + tail_lines
+                    # Deleted records no longer widen the timestamp range
+                    timestamps = [
+                        str(record['timestamp'])
+                        for record in snapshot.replay(tail_entries).records
+                        if record.get('timestamp')
+                    ]
+                    partitions[key]['min_timestamp'] = min(timestamps, default=None)
+                    partitions[key]['max_timestamp'] = max(timestamps, default=None)
+                    self._save_manifest(partitions, bump_sequence=False)
+        finally:
+            # Already renamed away after a successful swap
+            temp_file.unlink(missing_ok=True)
+
+        return lines_before + tail_lines, len(snapshot.by_id) + tail_lines
+
+    def compact(self, min_garbage_ratio=0.2, force=False):
+        """
+        Compact every partition with enough superseded lines (all of them if force)
+        Returns {partition: (lines_before, lines_after)}
+        """
+        keys = sorted(self.load_manifest()) if force else self.compaction_candidates(min_garbage_ratio)
+        results = {}
+        for key in keys:
+            result = self.compact_partition(key)
+            if result:
+                results[key] = result
+        return results
+
+    def partitions_in_range(self, start=None, end=None):
+        """Return partition keys whose timestamp range overlaps [start, end]"""
+        keys = []
+        for key, info in sorted(self.load_manifest().items()):
+            if key == self.UNDATED_PARTITION:
+                # Undated records never match a date filter
+                if start or end:
+                    continue
+            else:
+                if start and info['max_timestamp'] and info['max_timestamp'] < start:
+                    continue
+                if end and info['min_timestamp'] and info['min_timestamp'] > end:
+                    continue
+            keys.append(key)
+        return keys
+
+    def load_all(self):
+        """Load all records, partition by partition"""
+        data = []
+        for key in self.partitions_in_range():
+            data.extend(self.load_partition(key))
+        return data
+
+    def query(self, start_date=None, end_date=None, form_type=None, department=None):
+        """Return records matching the dashboard filters, reading only overlapping partitions"""
+        start = to_iso_bound(start_date) if start_date else None
+        end = to_iso_bound(end_date) if end_date else None
+        return [
+            record
+            for key in self.partitions_in_range(start, end)
+            for record in self.load_partition(key)
+            if record_matches(record, start, end, form_type, department)
+        ]
+
+    def date_bounds(self):
+        """Return (min_timestamp, max_timestamp) over all records, or None"""
+        # Whatever undated records carry as timestamp is not a date
+        partitions = [
+            info for key, info in self.load_manifest().items() if key != self.UNDATED_PARTITION
+        ]
+        minimums = [info['min_timestamp'] for info in partitions if info['min_timestamp']]
+        maximums = [info['max_timestamp'] for info in partitions if info['max_timestamp']]
+        if not minimums:
+            return None
+        return min(minimums), max(maximums)
+
+    def count(self):
+        """Return the number of records"""
+        return sum(info['count'] for info in self.load_manifest().values())
+
+    def _count_field(self, field):
+        counts = Counter(
+            record[field] for record in self.load_all()
+            if record.get(field) is not None
+        )
+        return list(counts.items())
+
+    def count_by_form_type(self):
+        """Return (jenis_form, count) pairs"""
+        return self._count_field('jenis_form')
+
+    def count_by_department(self):
+        """Return (departemen, count) pairs"""
+        return self._count_field('departemen')
+
+    def count_by_status(self):
+        """Return (status, count) pairs"""
+        return self._count_field('status')
+
+    def risk_by_department(self):
+        """Return (departemen, tingkat_risiko, count) triples"""
+        counts = Counter(
+            (record['departemen'], record['tingkat_risiko'])
+            for record in self.load_all()
+            if record.get('departemen') is not None and record.get('tingkat_risiko') is not None
+        )
+        return [(dept, risk, count) for (dept, risk), count in counts.items()]
+
+    def daily_counts(self):
+        """Return (YYYY-MM-DD, count) pairs"""
+        counts = Counter(
+            str(record['timestamp'])[:10] for record in self.load_all()
+            if record.get('timestamp')
+        )
+        return list(counts.items())
+
+
+class SQLiteFormStore:
+    """Form records kept in SQLite with indexed filter columns"""
+
+    # Fields promoted to real columns so filters and GROUP BY can use indexes
+    INDEXED_FIELDS = ['timestamp', 'jenis_form', 'departemen', 'tingkat_risiko']
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.db_file = self.base_path / "forms_data.db"
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection that commits on success"""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def initialize(self):
+        """Create schema and indexes"""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS forms (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    record_id TEXT,
+                    timestamp TEXT,
+                    jenis_form TEXT,
+                    departemen TEXT,
+                    tingkat_risiko TEXT,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_forms_timestamp ON forms(timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_forms_jenis_form ON forms(jenis_form)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_forms_departemen ON forms(departemen)")
+            # Write counter used to key the in-process dataset cache
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', 0)")
+
+            # Databases created before stable IDs lack the record_id column
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(forms)")]
+            if 'record_id' not in columns:
+                conn.execute("ALTER TABLE forms ADD COLUMN record_id TEXT")
+            self._backfill_record_ids(conn)
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_forms_record_id ON forms(record_id)")
+
+    def _backfill_record_ids(self, conn):
+        """Assign IDs to rows written before they existed"""
+        rows = conn.execute("SELECT id, data FROM forms WHERE record_id IS NULL").fetchall()
+        if not rows:
+            return
+        updates = []
+        for row_id, data in rows:
+            record = json.loads(data)
+            record['id'] = record.get('id') or new_record_id(record)
+            updates.append((record['id'], json.dumps(record, ensure_ascii=False, default=str), row_id))
+        conn.executemany("UPDATE forms SET record_id = ?, data = ? WHERE id = ?", updates)
+        self._bump_version(conn)
+
+    def write_lock(self):
+        """Lock serializing writers of this store across threads and processes"""
+        return get_write_lock(self.db_file)
+
+    def data_version(self):
+        """Write counter, bumped in every write transaction"""
+        with self._connect() as conn:
+            return self._read_version(conn)
+
+    def _read_version(self, conn):
+        row = conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+
+    def _bump_version(self, conn):
+        """Increment the write counter, returning (old, new)"""
+        old_version = self._read_version(conn)
+        conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+        return old_version, self._read_version(conn)
+
+    def is_empty(self):
+        """Check whether the forms table has no rows"""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM forms LIMIT 1").fetchone() is None
+
+    def _row_values(self, entry):
+        """Build column values for an insert"""
+        values = [entry.get(field) for field in ['id'] + self.INDEXED_FIELDS]
+        values = [str(value) if value is not None else None for value in values]
+        values.append(json.dumps(entry, ensure_ascii=False, default=str))
+        return values
+
+    def append_many(self, entries):
+        """Insert several entries in one transaction"""
+        entries = with_record_ids(entries)
+        with get_write_lock(self.db_file):
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO forms (record_id, timestamp, jenis_form, departemen, tingkat_risiko, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [self._row_values(entry) for entry in entries]
+                )
+                old_version, new_version = self._bump_version(conn)
+            parsed = roundtrip(entries)
+            update_cached_dataset(self.db_file, old_version, new_version, lambda data: data + parsed)
+
+    def append(self, entry):
+        """Insert a single entry"""
+        self.append_many([entry])
+
+    def rewrite(self, data):
+        """Replace all records in one transaction"""
+        data = with_record_ids(data)
+        with get_write_lock(self.db_file):
+            with self._connect() as conn:
+                conn.execute("DELETE FROM forms")
+                conn.executemany(
+                    "INSERT INTO forms (record_id, timestamp, jenis_form, departemen, tingkat_risiko, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [self._row_values(entry) for entry in data]
+                )
+                self._bump_version(conn)
+            invalidate_cached_dataset(self.db_file)
+
+    def get(self, record_id):
+        """Return the record with this ID, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM forms WHERE record_id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, record):
+        """Replace an existing record in place"""
+        values = self._row_values(record)
+        with get_write_lock(self.db_file):
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE forms SET timestamp = ?, jenis_form = ?, departemen = ?, "
+                    "tingkat_risiko = ?, data = ? WHERE record_id = ?",
+                    values[1:] + values[:1]
+                )
+                self._bump_version(conn)
+            invalidate_cached_dataset(self.db_file)
+
+    def delete(self, record_id):
+        """Delete a record"""
+        with get_write_lock(self.db_file):
+            with self._connect() as conn:
+                conn.execute("DELETE FROM forms WHERE record_id = ?", (record_id,))
+                self._bump_version(conn)
+            invalidate_cached_dataset(self.db_file)
+
+    def compact(self, min_garbage_ratio=0.2, force=False):
+        """
+        SQLite's counterpart of partition compaction: checkpoint the WAL
+        into the database and VACUUM once enough pages are free
+        Returns {'database': (pages_before, pages_after)} if it vacuumed
+        """
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            # PASSIVE never blocks readers or writers
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            conn.execute("PRAGMA optimize")
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not page_count or (not force and free_pages / page_count < min_garbage_ratio):
+                return {}
+            # VACUUM rewrites the file and cannot run inside a transaction
+            with get_write_lock(self.db_file):
+                conn.execute("VACUUM")
+            return {'database': (page_count, conn.execute("PRAGMA page_count").fetchone()[0])}
+        finally:
+            conn.close()
+
+    def load_all(self):
+        """
+        Load all records in insertion order.
+        The parsed records are shared process-wide until the next write, so
+        callers get their own list but must treat the records as read-only.
+        """
+        with self._connect() as conn:
+            # Read version and rows from the same snapshot
+            conn.execute("BEGIN")
+            version = self._read_version(conn)
+            data = get_cached_dataset(self.db_file, version)
+            if data is not None:
+                return list(data)
+            rows = conn.execute("SELECT data FROM forms ORDER BY id").fetchall()
+
+        data = [json.loads(row[0]) for row in rows]
+        set_cached_dataset(self.db_file, version, data)
+        return list(data)
+
+    def query(self, start_date=None, end_date=None, form_type=None, department=None):
+        """Return records matching the dashboard filters using the column indexes"""
+        clauses = []
+        params = []
+        if start_date:
+            clauses.append("timestamp >= ?")
+            params.append(to_iso_bound(start_date))
+        if end_date:
+            clauses.append("timestamp <= ?")
+            params.append(to_iso_bound(end_date))
+        if form_type:
+            clauses.append("jenis_form = ?")
+            params.append(form_type)
+        if department:
+            clauses.append("departemen = ?")
+            params.append(department)
+
+        sql = "SELECT data FROM forms"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def date_bounds(self):
+        """Return (min_timestamp, max_timestamp) over all records, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT MIN(timestamp), MAX(timestamp) FROM forms").fetchone()
+        return tuple(row) if row[0] else None
+
+    def count(self):
+        """Return the number of records"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM forms").fetchone()[0]
+
+    def count_by_form_type(self):
+        """Return (jenis_form, count) pairs"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT jenis_form, COUNT(*) FROM forms "
+                "WHERE jenis_form IS NOT NULL GROUP BY jenis_form"
+            ).fetchall()
+
+    def count_by_department(self):
+        """Return (departemen, count) pairs"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT departemen, COUNT(*) FROM forms "
+                "WHERE departemen IS NOT NULL GROUP BY departemen"
+            ).fetchall()
+
+    def count_by_status(self):
+        """Return (status, count) pairs"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT json_extract(data, '$.status') AS status, COUNT(*) FROM forms "
+                "WHERE status IS NOT NULL GROUP BY status"
+            ).fetchall()
+
+    def risk_by_department(self):
+        """Return (departemen, tingkat_risiko, count) triples"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT departemen, tingkat_risiko, COUNT(*) FROM forms "
+                "WHERE departemen IS NOT NULL AND tingkat_risiko IS NOT NULL "
+                "GROUP BY departemen, tingkat_risiko"
+            ).fetchall()
+
+    def daily_counts(self):
+        """Return (YYYY-MM-DD, count) pairs"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT substr(timestamp, 1, 10) AS day, COUNT(*) FROM forms "
+                "WHERE timestamp IS NOT NULL GROUP BY day"
+            ).fetchall()
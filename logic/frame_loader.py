@@ -0,0 +1,78 @@
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality fields stored as pandas categoricals
+CATEGORICAL_FIELDS = ['jenis_form', 'departemen', 'tingkat_risiko', 'kategori_temuan', 'status']
+
+# ISO timestamp/date strings parsed straight to datetime64
+DATETIME_FIELDS = ['timestamp', 'deadline', 'tanggal_audit', 'tanggal_efektif']
+
+# Arrow-backed strings are far more compact than Python objects; without
+# pyarrow the python-backed "string" dtype is no smaller, so keep inference
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = None
+
+
+def _column_values(records, field):
+    return [record.get(field) for record in records]
+
+
+def _parse_dates(field, values, unparsed):
+    """Parse a date column; values that are not ISO dates become NaT and are counted"""
+    parsed = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    failed = [value for value, result in zip(values, parsed) if pd.isna(result) and value not in (None, "")]
+    if failed:
+        unparsed[field] = len(failed)
+        logger.warning("%d nilai %s bukan tanggal ISO, dibaca kosong (mis. %r)", len(failed), field, failed[0])
+    return parsed
+
+
+def _build_column(field, values, unparsed):
+    """Build a typed column for a form field"""
+    if field in CATEGORICAL_FIELDS:
+        return pd.Categorical(values)
+    if field in DATETIME_FIELDS:
+        return _parse_dates(field, values, unparsed)
+    if STRING_DTYPE and all(value is None or isinstance(value, str) for value in values):
+        return pd.array(values, dtype=STRING_DTYPE)
+    # Mixed values (numbers from imports, nested data) keep pandas inference
+    return pd.Series(values)
+
+
+def records_to_dataframe(records):
+    """
+    Build a DataFrame from form records with categorical, datetime64 and
+    string columns instead of object dtype everywhere
+    Dates that fail to parse are NaT; their count per field is logged and
+    kept in df.attrs['unparsed_dates']
+    """
+    if not records:
+        return pd.DataFrame()
+
+    # Column order follows first appearance, like pd.DataFrame(records)
+    fields = {}
+    for record in records:
+        for field in record:
+            fields.setdefault(field, None)
+
+    unparsed = {}
+    df = pd.DataFrame({
+        field: _build_column(field, _column_values(records, field), unparsed)
+        for field in fields
+    })
+    df.attrs['unparsed_dates'] = unparsed
+    return df
+
+
+def drop_unused_categories(df):
+    """Forget categories that no longer occur after filtering"""
+    return df.assign(**{
+        column: df[column].cat.remove_unused_categories()
+        for column in df.select_dtypes(include='category').columns
+    })
@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+def parse_policies(text):
+    """
+    Parse per-form-type retention, e.g. "HIRARC=365,SOP Produksi=0"
+    Returns {form type folder: days}; 0 days keeps files forever
+    """
+    policies = {}
+    for item in (text or "").split(","):
+        if not item.strip():
+            continue
+        form_type, _, days = item.partition("=")
+        try:
+            policies[form_type.strip().replace(" ", "_")] = int(days)
+        except ValueError:
+            raise ValueError(f"Kebijakan retensi tidak valid: {item.strip()}")
+    return policies
+
+
+class RetentionSweeper:
+    """
+    Removes uploads past their retention period in the background.
+    Work proceeds oldest first in small batches taken from the age index
+    of the upload metadata, with deletes paced so live uploads keep
+    getting disk time. Every batch is final once done, so a restart
+    simply resumes with whatever is still expired.
+    """
+
+    def __init__(self, file_storage, policies=None, default_days=None,
+                 batch_size=100, max_files_per_second=20, interval=3600):
+        self.file_storage = file_storage
+        # Form type folder -> days; form types not listed use default_days
+        self.policies = policies or {}
+        self.default_days = default_days
+        self.batch_size = batch_size
+        self.max_files_per_second = max_files_per_second
+        self.interval = interval
+        self.state_file = file_storage.base_path / "retention_state.json"
+        self.progress = self._load_state()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _load_state(self):
+        """Load totals of earlier sweeps so progress survives restarts"""
+        state = {
+            'running': False,
+            'current_form_type': None,
+            'files_removed': 0,
+            'bytes_reclaimed': 0,
+            'last_sweep': None,
+            'last_removed': 0,
+            'last_error': None
+        }
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state.update(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        state['running'] = False
+        return state
+
+    def _save_state(self):
+        """Write progress atomically"""
+        temp_file = self.state_file.with_name(self.state_file.name + ".tmp")
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.progress, f, ensure_ascii=False, default=str)
+        os.replace(temp_file, self.state_file)
+
+    def retention_days(self, form_type):
+        """Return the retention period for a form type folder, None to keep forever"""
+        days = self.policies.get(form_type, self.default_days)
+        return days if days else None
+
+    def _pace(self, started, removed):
+        """Sleep until removing `removed` files fits the rate limit; False if stopping"""
+        if not self.max_files_per_second:
+            return not self._stop_event.is_set()
+        due = started + removed / self.max_files_per_second
+        delay = due - time.monotonic()
+        if delay > 0:
+            return not self._stop_event.wait(delay)
+        return not self._stop_event.is_set()
+
+    def sweep(self):
+        """
+        Remove every expired upload once, batch by batch
+        Returns (files_removed, bytes_reclaimed) for this sweep
+        """
+        index = self.file_storage.index
+        now = datetime.now().timestamp()
+        removed = 0
+        reclaimed = 0
+        started = time.monotonic()
+        # Totals before this sweep, progress adds the sweep's counts to them
+        self._totals = (self.progress['files_removed'], self.progress['bytes_reclaimed'])
+        self.progress['running'] = True
+        self.progress['last_error'] = None
+
+        try:
+            for form_type in index.form_types():
+                days = self.retention_days(form_type)
+                if days is None:
+                    continue
+                cutoff = now - days * 24 * 60 * 60
+                self.progress['current_form_type'] = form_type
+
+                position = None
+                while True:
+                    batch = index.oldest_files(form_type, cutoff, after=position, limit=self.batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        if not self._pace(started, removed):
+                            return removed, reclaimed
+                        if self.file_storage.delete_file(row['path']):
+                            removed += 1
+                            # Shared content only frees space with its last reference
+                            if not index.has_blob(row['checksum']):
+                                reclaimed += row['size']
+                    # Rows that could not be removed are skipped, not retried forever
+                    position = (batch[-1]['created'], batch[-1]['path'])
+                    self._record(removed, reclaimed)
+        except Exception as e:
+            # A failed sweep is retried next interval
+            self.progress['last_error'] = str(e)
+        finally:
+            self._record(removed, reclaimed, finished=True)
+        return removed, reclaimed
+
+    def _record(self, removed, reclaimed, finished=False):
+        """Publish progress of the running sweep"""
+        progress = self.progress
+        progress['files_removed'] = self._totals[0] + removed
+        progress['bytes_reclaimed'] = self._totals[1] + reclaimed
+        progress['last_removed'] = removed
+        if finished:
+            progress['running'] = False
+            progress['current_form_type'] = None
+            progress['last_sweep'] = datetime.now().isoformat()
+        self._save_state()
+
+    def get_progress(self):
+        """Return a copy of the sweep progress"""
+        return dict(self.progress)
+
+    def _loop(self):
+        while True:
+            self.sweep()
+            if self._stop_event.wait(self.interval):
+                break
+
+    def start(self):
+        """Start sweeping periodically in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="upload-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current file"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+# One sweeper per upload folder, shared by all DataHandlers
+_SWEEPERS = {}
+_SWEEPERS_LOCK = threading.Lock()
+
+
+def start_background_sweeper(file_storage, policies, default_days, interval, max_files_per_second):
+    """Start (once per process) the retention sweeper for an upload folder"""
+    key = str(Path(file_storage.base_path).resolve())
+    with _SWEEPERS_LOCK:
+        sweeper = _SWEEPERS.get(key)
+        if sweeper is None:
+            sweeper = RetentionSweeper(
+                file_storage, policies, default_days,
+                max_files_per_second=max_files_per_second, interval=interval
+            )
+            _SWEEPERS[key] = sweeper
+        sweeper.start()
+    return sweeper
@@ -0,0 +1,201 @@
+import json
+import re
+import sqlite3
+import unicodedata
+from contextlib import contextmanager
+
+# Narrative form fields covered by full-text search
+SEARCH_FIELDS = ['bahaya', 'risiko', 'pengendalian', 'temuan', 'tindakan_perbaikan', 'deskripsi']
+
+# bm25 column weights, in SEARCH_FIELDS order: hazards and findings rank highest
+FIELD_WEIGHTS = [2.0, 1.5, 1.0, 2.0, 1.0, 1.0]
+
+# Indonesian inflection stripped before indexing, longest first
+PARTICLES = ('lah', 'kah', 'tah', 'pun')
+POSSESSIVES = ('nya', 'ku', 'mu')
+SUFFIXES = ('kan', 'an', 'i')
+PREFIXES = (
+    ('meng', ''), ('meny', 's'), ('mem', 'p'), ('men', 't'), ('me', ''),
+    ('peng', ''), ('peny', 's'), ('pem', 'p'), ('pen', 't'), ('per', ''), ('pe', ''),
+    ('ber', ''), ('ter', ''), ('di', ''), ('ke', ''), ('se', '')
+)
+
+# Function words that carry no meaning for search
+STOPWORDS = {
+    'dan', 'atau', 'yang', 'di', 'ke', 'dari', 'dengan', 'untuk', 'pada', 'dalam',
+    'ini', 'itu', 'tidak', 'ada', 'oleh', 'sebagai', 'akan', 'juga', 'agar', 'saat'
+}
+
+# Shortest stem the affix rules may leave behind
+MIN_STEM_LENGTH = 4
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _strip_suffix(word, suffixes):
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def stem_word(word):
+    """
+    Reduce an Indonesian word to an approximate root, e.g. pengangkatan,
+    mengangkat and diangkatnya all become angkat. Rules only, no
+    dictionary: the same function runs on documents and queries, so
+    consistency matters more than linguistic precision.
+    """
+    if len(word) <= MIN_STEM_LENGTH or word.isdigit():
+        return word
+    word = _strip_suffix(word, PARTICLES)
+    word = _strip_suffix(word, POSSESSIVES)
+    word = _strip_suffix(word, SUFFIXES)
+    for prefix, replacement in PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) + len(replacement) >= MIN_STEM_LENGTH:
+            rest = word[len(prefix):]
+            # meny-/peny-/mem-/pen- replace a dropped initial consonant only before a vowel
+            if replacement and rest[:1] not in 'aiueo':
+                continue
+            return replacement + rest
+    return word
+
+
+def normalize_text(text):
+    """Lowercase, drop accents and stop words, and stem every word of a text"""
+    text = unicodedata.normalize('NFKD', str(text or "")).encode('ascii', 'ignore').decode('ascii')
+    return [
+        stem_word(token) for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+class FormSearchIndex:
+    """
+    SQLite FTS5 index over the narrative fields of form records. Text is
+    stemmed before it is stored, so searches match other word forms, and
+    results are ranked with bm25.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection that commits on success"""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def initialize(self):
+        """Create the full-text table; needs SQLite built with FTS5"""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FTS rows are keyed by docs.rowid so updates find them without a scan
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS docs (
+                    rowid INTEGER PRIMARY KEY,
+                    record_id TEXT NOT NULL UNIQUE
+                )
+            """)
+            conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS form_text USING fts5("
+                f"{', '.join(SEARCH_FIELDS)}, tokenize='unicode61')"
+            )
+            # Store version the index reflects, like the dashboard aggregates
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS index_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+    def data_version(self):
+        """Return the store version the index was last brought up to"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM index_meta WHERE key = 'data_version'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def is_current(self, data_version):
+        """Check whether the index reflects the given store version"""
+        return self.data_version() == json.loads(json.dumps(data_version))
+
+    def _set_version(self, conn, data_version):
+        conn.execute(
+            "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('data_version', ?)",
+            (json.dumps(data_version),)
+        )
+
+    def _document(self, record):
+        return [" ".join(normalize_text(record.get(field))) for field in SEARCH_FIELDS]
+
+    def _remove(self, conn, record_id):
+        row = conn.execute("SELECT rowid FROM docs WHERE record_id = ?", (record_id,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM form_text WHERE rowid = ?", row)
+            conn.execute("DELETE FROM docs WHERE rowid = ?", row)
+
+    def _add(self, conn, record):
+        document = self._document(record)
+        if not any(document):
+            return
+        rowid = conn.execute("INSERT INTO docs (record_id) VALUES (?)", (record['id'],)).lastrowid
+        conn.execute(
+            f"INSERT INTO form_text (rowid, {', '.join(SEARCH_FIELDS)}) "
+            f"VALUES (?, {', '.join('?' for _ in SEARCH_FIELDS)})",
+            [rowid] + document
+        )
+
+    def apply(self, added=(), removed=(), data_version=None):
+        """Fold a write into the index in one transaction"""
+        with self._connect() as conn:
+            for record in removed:
+                self._remove(conn, record['id'])
+            for record in added:
+                self._remove(conn, record['id'])
+                self._add(conn, record)
+            self._set_version(conn, data_version)
+
+    def rebuild(self, records, data_version):
+        """Re-index all records from scratch"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM form_text")
+            conn.execute("DELETE FROM docs")
+            for record in records:
+                if record.get('id'):
+                    self._add(conn, record)
+            self._set_version(conn, data_version)
+            conn.execute("INSERT INTO form_text(form_text) VALUES ('optimize')")
+
+    def build_query(self, text):
+        """
+        Turn user input into an FTS5 query: every stemmed word must match,
+        the last one as a prefix so results follow typing
+        """
+        tokens = normalize_text(text)
+        if not tokens:
+            return None
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += "*"
+        return " AND ".join(terms)
+
+    def search(self, text, limit=20):
+        """
+        Search the narrative fields
+        Returns [(record_id, score)], best match first
+        """
+        query = self.build_query(text)
+        if query is None:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT docs.record_id, bm25(form_text, {', '.join(str(w) for w in FIELD_WEIGHTS)}) AS score "
+                "FROM form_text JOIN docs ON docs.rowid = form_text.rowid "
+                "WHERE form_text MATCH ? ORDER BY score LIMIT ?",
+                (query, limit)
+            ).fetchall()
+        # bm25 is lower-is-better, report higher-is-better
+        return [(record_id, -score) for record_id, score in rows]
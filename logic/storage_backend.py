@@ -0,0 +1,165 @@
+import os
+import shutil
+import threading
+from pathlib import Path
+
+
+def get_upload_path():
+    """Root folder for form records and uploads, from UPLOAD_PATH"""
+    return Path(os.getenv('UPLOAD_PATH', "data/uploads").split("#")[0].strip() or "data/uploads")
+
+
+class LocalObjectStore:
+    """
+    Content blobs as files under a local folder, blobs/<key[:2]>/<key>.
+    Being local, FileStorage may also hardlink and compress them in place.
+    """
+
+    local = True
+
+    def __init__(self, root):
+        self.root = Path(root)
+        # Identifies where blobs live, e.g. for the index's reconcile marker
+        self.name = "local"
+
+    def path(self, key):
+        """Return the file holding an object"""
+        return self.root / key[:2] / key
+
+    def exists(self, key):
+        return self.path(key).exists()
+
+    def put_file(self, key, source_path):
+        """Move a finished temp file into the store"""
+        path = self.path(key)
+        path.parent.mkdir(exist_ok=True)
+        os.replace(source_path, path)
+
+    def get_file(self, key, destination):
+        """Copy an object to a local file"""
+        shutil.copyfile(self.path(key), destination)
+
+    def delete(self, key):
+        self.path(key).unlink(missing_ok=True)
+
+    def list_keys(self):
+        """Yield the keys of all stored objects"""
+        with os.scandir(self.root) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as entries:
+                    for entry in entries:
+                        # Skip compressed copies and temp files
+                        if entry.is_file() and "." not in entry.name:
+                            yield entry.name
+
+
+class S3ObjectStore:
+    """
+    Content blobs in an S3-compatible bucket (AWS S3, MinIO, ...), which
+    keeps upload content off the app's disk. Objects are immutable and
+    named by their SHA-256, which makes concurrent writers safe.
+    """
+
+    local = False
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, max_pool_connections=20,
+                 multipart_threshold=8 * 1024 * 1024, multipart_concurrency=8):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError:
+            raise ImportError("Penyimpanan S3 membutuhkan paket boto3 (pip install boto3)")
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.name = f"s3://{bucket}/{prefix}"
+        # Clients are thread-safe; one per process keeps a pool of keep-alive connections
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                retries={'max_attempts': 5, 'mode': 'adaptive'}
+            )
+        )
+        # Large files go up and down as parallel multipart transfers
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_threshold,
+            max_concurrency=multipart_concurrency,
+            use_threads=True
+        )
+
+    def key(self, key):
+        """Return the object name for a blob key"""
+        return f"{self.prefix}blobs/{key[:2]}/{key}"
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(key))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def put_file(self, key, source_path):
+        """Upload a finished temp file and remove it locally"""
+        self.client.upload_file(str(source_path), self.bucket, self.key(key), Config=self.transfer_config)
+        Path(source_path).unlink(missing_ok=True)
+
+    def get_file(self, key, destination):
+        """Download an object to a local file"""
+        self.client.download_file(self.bucket, self.key(key), str(destination), Config=self.transfer_config)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(key))
+
+    def list_keys(self):
+        """Yield the keys of all stored objects"""
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}blobs/"):
+            for item in page.get('Contents', []):
+                yield item['Key'].rsplit("/", 1)[-1]
+
+
+# One object store per configuration, shared by all FileStorage instances
+_OBJECT_STORES = {}
+_OBJECT_STORES_LOCK = threading.Lock()
+
+
+def get_object_store(blobs_dir):
+    """
+    Return the blob store selected with FILE_STORAGE_BACKEND (local or s3)
+    S3 settings: S3_BUCKET, S3_PREFIX, S3_ENDPOINT_URL, S3_MAX_POOL_CONNECTIONS,
+    S3_MULTIPART_CONCURRENCY; credentials come from the usual AWS variables
+    """
+    backend = os.getenv('FILE_STORAGE_BACKEND', 'local').lower()
+    if backend == 'local':
+        return LocalObjectStore(blobs_dir)
+    if backend != 's3':
+        raise ValueError(f"Unknown file storage backend: {backend}")
+
+    bucket = os.getenv('S3_BUCKET')
+    if not bucket:
+        raise ValueError("S3_BUCKET harus diisi untuk FILE_STORAGE_BACKEND=s3")
+    settings = (
+        bucket,
+        os.getenv('S3_PREFIX', ""),
+        os.getenv('S3_ENDPOINT_URL') or None,
+        int(os.getenv('S3_MAX_POOL_CONNECTIONS', '20')),
+        int(os.getenv('S3_MULTIPART_CONCURRENCY', '8'))
+    )
+    with _OBJECT_STORES_LOCK:
+        if settings not in _OBJECT_STORES:
+            _OBJECT_STORES[settings] = S3ObjectStore(
+                settings[0], settings[1], settings[2],
+                max_pool_connections=settings[3],
+                multipart_concurrency=settings[4]
+            )
+        return _OBJECT_STORES[settings]
@@ -0,0 +1,323 @@
+import sqlite3
+from contextlib import contextmanager
+
+
+class UploadIndex:
+    """
+    Metadata of every uploaded file and content blob kept in SQLite, so
+    listing, file info and age queries never walk or stat the upload tree.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+
+    @contextmanager
+    def _connect(self):
+        """Open a short-lived connection that commits on success"""
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def initialize(self):
+        """Create schema and indexes"""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    refs INTEGER NOT NULL,
+                    compression TEXT,
+                    stored_size INTEGER
+                )
+            """)
+            # Indexes created before the cold tier lack its columns
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(blobs)")]
+            if 'compression' not in columns:
+                conn.execute("ALTER TABLE blobs ADD COLUMN compression TEXT")
+                conn.execute("ALTER TABLE blobs ADD COLUMN stored_size INTEGER")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    form_type TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    checksum TEXT NOT NULL,
+                    record_id TEXT,
+                    created REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_files_form_type ON files(form_type)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_files_created ON files(created)")
+            # Age order within a form type, walked by the retention sweeper
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_files_form_type_created ON files(form_type, created, path)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_files_checksum ON files(checksum)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_files_record_id ON files(record_id)")
+            # Small key/value facts about the index itself, e.g. reconcile markers
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+
+    def is_empty(self):
+        """Check whether no files are indexed"""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is None
+
+    def get_meta(self, key, default=None):
+        """Return a value from the meta table, or default"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else default
+
+    def set_meta(self, key, value):
+        """Store a value in the meta table"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def has_blob(self, digest):
+        """Check whether a blob with this digest is stored"""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def blob_info(self, digest):
+        """Return the blob row as a dict, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        return dict(row) if row else None
+
+    def paths_for_blob(self, digest):
+        """Return the paths of files referencing a blob"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT path FROM files WHERE checksum = ?", (digest,))
+            return [row['path'] for row in rows]
+
+    def cold_candidates(self, cutoff, limit=50):
+        """
+        Return uncompressed blobs whose newest reference was saved before
+        cutoff, oldest first, as dicts with digest, size and refs
+        """
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT b.digest, b.size, b.refs
+                FROM blobs b JOIN files f ON f.checksum = b.digest
+                WHERE b.compression IS NULL
+                GROUP BY b.digest
+                HAVING MAX(f.created) < ?
+                ORDER BY MAX(f.created)
+                LIMIT ?
+            """, (cutoff, limit))
+            return [dict(row) for row in rows]
+
+    def set_compression(self, digest, compression, stored_size, expected_refs=None):
+        """
+        Record how a blob is stored; with expected_refs only if its
+        reference count is unchanged. Returns True if the row was updated
+        """
+        query = "UPDATE blobs SET compression = ?, stored_size = ? WHERE digest = ?"
+        params = [compression, stored_size, digest]
+        if expected_refs is not None:
+            query += " AND refs = ?"
+            params.append(expected_refs)
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount > 0
+
+    def cold_stats(self):
+        """
+        Summarize the cold tier per form type folder
+        Returns {form_type: {files, cold_files, cold_bytes, stored_bytes, saved_bytes}}
+        """
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT
+                    f.form_type,
+                    COUNT(*) AS files,
+                    SUM(CASE WHEN b.compression IN ('gzip', 'zstd') THEN 1 ELSE 0 END) AS cold_files,
+                    SUM(CASE WHEN b.compression IN ('gzip', 'zstd') THEN f.size ELSE 0 END) AS cold_bytes,
+                    SUM(CASE WHEN b.compression IN ('gzip', 'zstd') THEN b.stored_size ELSE 0 END) AS stored_bytes
+                FROM files f LEFT JOIN blobs b ON b.digest = f.checksum
+                GROUP BY f.form_type
+                ORDER BY f.form_type
+            """).fetchall()
+        # Content shared between files is counted once per file
+        return {
+            row['form_type']: {
+                'files': row['files'],
+                'cold_files': row['cold_files'],
+                'cold_bytes': row['cold_bytes'],
+                'stored_bytes': row['stored_bytes'],
+                'saved_bytes': row['cold_bytes'] - row['stored_bytes']
+            }
+            for row in rows
+        }
+
+    def _release(self, conn, path):
+        """
+        Drop the file row for path and its blob reference
+        Returns the digest if that was the blob's last reference
+        """
+        row = conn.execute("SELECT checksum FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        conn.execute("UPDATE blobs SET refs = refs - 1 WHERE digest = ?", (row['checksum'],))
+        deleted = conn.execute(
+            "DELETE FROM blobs WHERE digest = ? AND refs <= 0", (row['checksum'],)
+        ).rowcount
+        return row['checksum'] if deleted else None
+
+    def add_file(self, path, form_type, digest, size, mtime, created, record_id=None):
+        """
+        Record a file referencing a blob, replacing any previous row for path
+        Returns the digest of a blob that lost its last reference, or None
+        """
+        with self._connect() as conn:
+            orphan = self._release(conn, path)
+            conn.execute(
+                "INSERT INTO blobs (digest, size, refs) VALUES (?, ?, 1) "
+                "ON CONFLICT(digest) DO UPDATE SET refs = refs + 1",
+                (digest, size)
+            )
+            conn.execute(
+                "INSERT INTO files (path, form_type, size, mtime, checksum, record_id, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, form_type, size, mtime, digest, record_id, created)
+            )
+        return None if orphan == digest else orphan
+
+    def remove_file(self, path):
+        """
+        Forget a file
+        Returns (was_indexed, digest of a blob that lost its last reference)
+        """
+        with self._connect() as conn:
+            found = conn.execute("SELECT 1 FROM files WHERE path = ?", (path,)).fetchone() is not None
+            return found, self._release(conn, path)
+
+    def move_file(self, path, new_path, form_type):
+        """Point a file row at its new location"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE files SET path = ?, form_type = ? WHERE path = ?",
+                (new_path, form_type, path)
+            )
+
+    def get_file(self, path):
+        """Return the metadata row for a file as a dict, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT f.*, b.compression FROM files f LEFT JOIN blobs b ON b.digest = f.checksum "
+                "WHERE f.path = ?", (path,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_files(self, form_type=None):
+        """Return indexed paths, optionally for one form type folder"""
+        with self._connect() as conn:
+            if form_type:
+                rows = conn.execute(
+                    "SELECT path FROM files WHERE form_type = ? ORDER BY path", (form_type,)
+                )
+            else:
+                rows = conn.execute("SELECT path FROM files ORDER BY path")
+            return [row['path'] for row in rows]
+
+    def files_created_before(self, cutoff):
+        """Return paths of files saved before a POSIX timestamp, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path FROM files WHERE created < ? ORDER BY created", (cutoff,)
+            )
+            return [row['path'] for row in rows]
+
+    def form_types(self):
+        """Return the form type folders that have indexed files"""
+        with self._connect() as conn:
+            return [row['form_type'] for row in conn.execute("SELECT DISTINCT form_type FROM files")]
+
+    def oldest_files(self, form_type, cutoff, after=None, limit=100):
+        """
+        Return up to limit rows of one form type saved before cutoff, oldest
+        first, continuing after the (created, path) position of a previous batch
+        """
+        query = "SELECT path, size, checksum, created FROM files WHERE form_type = ? AND created < ?"
+        params = [form_type, cutoff]
+        if after is not None:
+            query += " AND (created > ? OR (created = ? AND path > ?))"
+            params += [after[0], after[0], after[1]]
+        query += " ORDER BY created, path LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def files_for_record(self, record_id):
+        """Return paths of files attached to a form record"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT path FROM files WHERE record_id = ?", (record_id,))
+            return [row['path'] for row in rows]
+
+    def stats(self):
+        """
+        Summarize deduplication
+        Returns dict with file count, unique blobs and bytes saved
+        """
+        with self._connect() as conn:
+            files, blobs, stored, referenced = conn.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM files),
+                    COUNT(*),
+                    COALESCE(SUM(size), 0),
+                    COALESCE(SUM(size * refs), 0)
+                FROM blobs
+            """).fetchone()
+        return {
+            'files': files,
+            'blobs': blobs,
+            'stored_bytes': stored,
+            'saved_bytes': referenced - stored
+        }
+
+    def replace_all(self, files, blob_storage=None):
+        """
+        Replace the whole index in one transaction (used by reconcile)
+        files: iterable of dicts with the files table columns
+        blob_storage: {digest: (compression, stored_size)} to carry over
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM blobs")
+            conn.executemany(
+                "INSERT INTO files (path, form_type, size, mtime, checksum, record_id, created) "
+                "VALUES (:path, :form_type, :size, :mtime, :checksum, :record_id, :created)",
+                files
+            )
+            # Blob reference counts follow from the file rows
+            conn.execute("""
+                INSERT INTO blobs (digest, size, refs)
+                SELECT checksum, MAX(size), COUNT(*) FROM files GROUP BY checksum
+            """)
+            conn.executemany(
+                "UPDATE blobs SET compression = ?, stored_size = ? WHERE digest = ?",
+                [(compression, stored_size, digest)
+                 for digest, (compression, stored_size) in (blob_storage or {}).items()]
+            )
+
+    def all_files(self):
+        """Return every file row as a dict keyed by path"""
+        with self._connect() as conn:
+            return {row['path']: dict(row) for row in conn.execute("SELECT * FROM files")}
+
+    def all_blobs(self):
+        """Return every blob row as a dict keyed by digest"""
+        with self._connect() as conn:
+            return {row['digest']: dict(row) for row in conn.execute("SELECT * FROM blobs")}
@@ -1,10 +1,42 @@
+import os
 import re
 from pathlib import Path
+from dotenv import load_dotenv
+
+# Bytes read from each end of an upload for content sniffing
+SNIFF_HEAD_BYTES = 4096
+SNIFF_TAIL_BYTES = 4096
+
+# Leading bytes of each allowed file type
+FILE_SIGNATURES = {
+    '.pdf': b"%PDF-",
+    '.docx': b"PK\x03\x04"
+}
+
+# OLE compound file: what Office writes for password-protected documents
+OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+def _env_int(name, default):
+    """Read an integer setting, ignoring trailing text such as comments"""
+    value = os.getenv(name, "").split("#")[0].strip()
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+def _env_file_types(name, default):
+    """Read a comma-separated list of extensions as ['.pdf', ...]"""
+    value = os.getenv(name, "").split("#")[0].strip() or default
+    return ['.' + item.strip().lower().lstrip('.') for item in value.split(",") if item.strip()]
+
 
 class FormValidator:
     def __init__(self):
-        self.allowed_file_types = ['.pdf']
-        self.max_file_size = 5 * 1024 * 1024  # 5MB
+        load_dotenv()
+        self.allowed_file_types = _env_file_types('ALLOWED_FILE_TYPES', 'pdf')
+        self.max_file_size = _env_int('MAX_UPLOAD_SIZE', 5 * 1024 * 1024)  # 5MB
 
     def validate_required_fields(self, form_data, required_fields):
         """
@@ -36,8 +68,63 @@ class FormValidator:
             return False, f"Format file tidak valid. Format yang diizinkan: {', '.join(self.allowed_file_types)}"
 
         # Check file size
-        if uploaded_file.size > self.max_file_size:
+        size = self._file_size(uploaded_file)
+        if size > self.max_file_size:
             return False, f"Ukuran file terlalu besar. Maksimum: {self.max_file_size/1024/1024}MB"
+        if size == 0:
+            return False, "File kosong"
+
+        # Check content, reading only the first and last few KB
+        head, tail = self._read_head_tail(uploaded_file, size)
+        return self.validate_file_content(file_ext, head, tail)
+
+    def _file_size(self, uploaded_file):
+        """Size from the upload object, or by seeking to the end"""
+        size = getattr(uploaded_file, 'size', None)
+        if size is None:
+            uploaded_file.seek(0, os.SEEK_END)
+            size = uploaded_file.tell()
+            uploaded_file.seek(0)
+        return size
+
+    def _read_head_tail(self, uploaded_file, size):
+        """Read the start and end of a file, leaving its position at 0"""
+        uploaded_file.seek(0)
+        head = uploaded_file.read(SNIFF_HEAD_BYTES)
+        if size > SNIFF_HEAD_BYTES:
+            uploaded_file.seek(max(size - SNIFF_TAIL_BYTES, 0))
+            tail = uploaded_file.read(SNIFF_TAIL_BYTES)
+        else:
+            tail = head
+        uploaded_file.seek(0)
+        return head, tail
+
+    def validate_file_content(self, file_ext, head, tail):
+        """
+        Check that the file content matches its extension
+        Returns (is_valid, error_message)
+        """
+        if head.startswith(OLE_SIGNATURE):
+            return False, "Dokumen terenkripsi atau berformat lama tidak dapat diproses"
+
+        if file_ext == '.pdf':
+            # The header may follow a little junk, the trailer ends the file
+            if FILE_SIGNATURES['.pdf'] not in head[:1024]:
+                return False, "File bukan PDF yang valid"
+            if b"%%EOF" not in tail:
+                return False, "File PDF tidak lengkap atau rusak"
+            # The trailer (or the first-page trailer of linearized files) names the encryption dictionary
+            if b"/Encrypt" in tail or b"/Encrypt" in head:
+                return False, "File PDF dilindungi password tidak dapat diproses"
+
+        elif file_ext == '.docx':
+            if not head.startswith(FILE_SIGNATURES['.docx']):
+                return False, "File bukan dokumen Word yang valid"
+            # End of the ZIP central directory, which lists the word/ parts
+            if b"PK\x05\x06" not in tail:
+                return False, "File dokumen Word tidak lengkap atau rusak"
+            if b"word/" not in tail and b"word/" not in head:
+                return False, "File bukan dokumen Word yang valid"
 
         return True, ""
 
@@ -57,7 +144,7 @@ class FormValidator:
         Returns (is_valid, error_message)
         """
         date_pattern = r'^\d{4}-\d{2}-\d{2}$'
-        if not re.match(date_pattern, date_str):
+        if not re.match(date_pattern, str(date_str)):
             return False, "Format tanggal harus YYYY-MM-DD"
         return True, ""
 
@@ -0,0 +1,276 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from logic.file_storage import stream_upload
+from logic.form_store import assign_record_id, get_write_lock
+
+# Submission states reported back to the Streamlit session
+QUEUED = 'queued'
+SAVED = 'saved'
+FAILED = 'failed'
+
+
+class WriteBehindQueue:
+    """
+    Form submissions written in the background. submit() stores the
+    upload and a small intent file (both fsynced) and returns at once; a
+    daemon thread saves uploads in parallel and commits whole batches of
+    records in one store write (group commit). Intents still pending
+    after a crash are replayed on the next start.
+    Replicas sharing the data folder share the queue; one process at a
+    time drains it, so a record is never committed twice.
+    """
+
+    def __init__(self, data_handler, batch_size=50, linger=0.05, upload_workers=4, max_statuses=1000):
+        self.data_handler = data_handler
+        self.batch_size = batch_size
+        # Wait this long for more submissions before committing a small batch
+        self.linger = linger
+        self.upload_workers = upload_workers
+        self.max_statuses = max_statuses
+        self.queue_dir = data_handler.base_path / "write_queue"
+        self.pending_dir = self.queue_dir / "pending"
+        self.failed_dir = self.queue_dir / "failed"
+        self.spool_dir = self.queue_dir / "spool"
+        for folder in (self.pending_dir, self.failed_dir, self.spool_dir):
+            folder.mkdir(parents=True, exist_ok=True)
+        self.drain_lock = get_write_lock(self.pending_dir)
+        # record_id -> {'status', 'error', 'record'} of recent submissions
+        self.statuses = OrderedDict()
+        self.lock = threading.Lock()
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _write_json(self, path, data):
+        """Write a JSON file atomically and durably"""
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _set_status(self, record_id, status, error=None, record=None):
+        with self.lock:
+            self.statuses[record_id] = {'status': status, 'error': error, 'record': record}
+            self.statuses.move_to_end(record_id)
+            while len(self.statuses) > self.max_statuses:
+                self.statuses.popitem(last=False)
+
+    def submit(self, form_data, uploaded_file=None):
+        """
+        Queue a validated form entry and its file
+        Returns the form data with its ID and timestamp assigned
+        Raises UploadTooLargeError if the file exceeds the upload limit and
+        ValueError if a supplied ID is invalid
+        """
+        form_data['timestamp'] = datetime.now().isoformat()
+        assign_record_id(form_data)
+        intent = {'record': form_data, 'upload': None}
+
+        # The upload only lives in the session's memory, spool it first
+        if uploaded_file:
+            temp_path, _, _ = stream_upload(
+                uploaded_file, self.spool_dir, self.data_handler.file_storage.max_upload_size
+            )
+            spool_path = self.spool_dir / f"{form_data['id']}.upload"
+            os.replace(temp_path, spool_path)
+            intent['upload'] = {'spool': spool_path.name, 'filename': Path(uploaded_file.name).name}
+
+        # Nanosecond prefix keeps intents in submission order
+        self._write_json(self.pending_dir / f"{time.time_ns()}_{form_data['id']}.json", intent)
+        self._set_status(form_data['id'], QUEUED, record=form_data)
+        self._wake.set()
+        return form_data
+
+    def status(self, record_id):
+        """
+        Return {'status', 'error', 'record'} for a submission
+        Falls back to the queue folders and the store after a restart
+        """
+        with self.lock:
+            status = self.statuses.get(record_id)
+        # Another replica may have written a submission queued here
+        if status is not None and status['status'] != QUEUED:
+            return dict(status)
+
+        if any(self.pending_dir.glob(f"*_{record_id}.json")):
+            return {'status': QUEUED, 'error': None, 'record': status and status['record']}
+        for path in self.failed_dir.glob(f"*_{record_id}.json"):
+            with open(path, 'r', encoding='utf-8') as f:
+                intent = json.load(f)
+            return {'status': FAILED, 'error': intent.get('error'), 'record': intent['record']}
+        record = self.data_handler.get_entry(record_id)
+        if record is not None:
+            return {'status': SAVED, 'error': None, 'record': record}
+        return None
+
+    def pending_count(self):
+        """Return the number of submissions not yet written"""
+        return sum(1 for _ in self.pending_dir.glob("*.json"))
+
+    def _next_batch(self):
+        """Return up to batch_size pending intent files, oldest first"""
+        pending = sorted(self.pending_dir.glob("*.json"))
+        if pending and len(pending) < self.batch_size and self.linger:
+            # Give concurrent submitters a moment to join this commit
+            time.sleep(self.linger)
+            pending = sorted(self.pending_dir.glob("*.json"))
+        return pending[:self.batch_size]
+
+    def _fail(self, intent_path, intent, error):
+        """Move an intent to the failed folder and report the error"""
+        intent['error'] = str(error)
+        self._write_json(self.failed_dir / intent_path.name, intent)
+        intent_path.unlink(missing_ok=True)
+        if intent.get('upload'):
+            (self.spool_dir / intent['upload']['spool']).unlink(missing_ok=True)
+        self._set_status(intent['record']['id'], FAILED, error=str(error), record=intent['record'])
+
+    def _done(self, intent_path, intent):
+        """Remove a written intent and its spooled upload"""
+        intent_path.unlink(missing_ok=True)
+        if intent.get('upload'):
+            (self.spool_dir / intent['upload']['spool']).unlink(missing_ok=True)
+        self._set_status(intent['record']['id'], SAVED, record=intent['record'])
+
+    def _store_upload(self, intent):
+        """Save the spooled file of an intent, once even when replayed"""
+        upload = intent.get('upload')
+        if not upload:
+            return
+        record = intent['record']
+        file_storage = self.data_handler.file_storage
+        saved = file_storage.index.files_for_record(record['id'])
+        if saved:
+            record['file_path'] = saved[0]
+            return
+        with open(self.spool_dir / upload['spool'], 'rb') as f:
+            record['file_path'] = self.data_handler.save_uploaded_file(
+                f, record['jenis_form'], record['id'], filename=upload['filename']
+            )
+
+    def process_batch(self, intent_paths):
+        """
+        Write one batch: uploads in parallel, then all records in one commit
+        Returns the number of records saved
+        """
+        intents = []
+        for path in intent_paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    intents.append((path, json.load(f)))
+            except json.JSONDecodeError as e:
+                # Unreadable intent, keep it aside for inspection
+                os.replace(path, self.failed_dir / path.name)
+                self.last_error = f"{path.name}: {e}"
+
+        def store(item):
+            try:
+                self._store_upload(item[1])
+                return None
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.upload_workers) as pool:
+            errors = list(pool.map(store, intents))
+
+        ready = []
+        for item, error in zip(intents, errors):
+            if error is None:
+                ready.append(item)
+            else:
+                self._fail(item[0], item[1], error)
+
+        # A replayed intent may have been committed just before a crash
+        records = [
+            intent['record'] for _, intent in ready
+            if self.data_handler.get_entry(intent['record']['id']) is None
+        ]
+        try:
+            if records:
+                self.data_handler._commit_entries(records)
+        except Exception as e:
+            saved = 0
+            for path, intent in ready:
+                record_id = intent['record']['id']
+                if self.data_handler.get_entry(record_id) is not None:
+                    # Committed earlier (replayed intent), its upload is in use
+                    self._done(path, intent)
+                    saved += 1
+                    continue
+                for relative_path in self.data_handler.file_storage.index.files_for_record(record_id):
+                    self.data_handler.file_storage.delete_file(relative_path)
+                self._fail(path, intent, e)
+            return saved
+
+        for path, intent in ready:
+            self._done(path, intent)
+        return len(ready)
+
+    def drain(self):
+        """Write everything pending now, returns the number of records saved"""
+        if not self.drain_lock.acquire(blocking=False):
+            # Another process is draining, it picks up our intents too
+            return 0
+        try:
+            saved = 0
+            while True:
+                batch = self._next_batch()
+                if not batch:
+                    return saved
+                saved += self.process_batch(batch)
+        finally:
+            self.drain_lock.release()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            self._wake.clear()
+            try:
+                self.drain()
+                self.last_error = None
+            except Exception as e:
+                # Intents stay pending and are retried on the next wake-up
+                self.last_error = str(e)
+            self._wake.wait(1)
+
+    def start(self):
+        """Start writing queued submissions in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="form-write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after the current batch"""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+# One queue per data folder, shared by all DataHandlers
+_QUEUES = {}
+_QUEUES_LOCK = threading.Lock()
+
+
+def start_write_queue(data_handler):
+    """Start (once per process) the write-behind queue for a data folder"""
+    key = str(Path(data_handler.base_path).resolve())
+    with _QUEUES_LOCK:
+        queue = _QUEUES.get(key)
+        if queue is None:
+            queue = WriteBehindQueue(data_handler)
+            _QUEUES[key] = queue
+        queue.start()
+    return queue
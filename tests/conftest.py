@@ -0,0 +1,177 @@
+import asyncio
+import io
+import json
+import threading
+
+import pytest
+from aiohttp import web
+
+# Settings that keep DataHandler free of background threads and remote storage
+QUIET_ENV = {
+    'FORMS_STORAGE_BACKEND': 'json',
+    'FORMS_WRITE_BEHIND': 'false',
+    'FORMS_COMPACTION_INTERVAL': '0',
+    'RETENTION_DAYS': '0',
+    'RETENTION_POLICIES': '',
+    'COLD_TIER_DAYS': '0',
+    'FILE_STORAGE_BACKEND': 'local'
+}
+
+
+@pytest.fixture
+def upload_path(tmp_path, monkeypatch):
+    """Point UPLOAD_PATH at a fresh folder with every background worker off"""
+    path = tmp_path / "uploads"
+    monkeypatch.setenv('UPLOAD_PATH', str(path))
+    for name, value in QUIET_ENV.items():
+        monkeypatch.setenv(name, value)
+    return path
+
+
+@pytest.fixture
+def make_form():
+    """Return a factory for valid form submissions of each form type"""
+    def make(form_type="SOP Produksi", **fields):
+        if form_type == "SOP Produksi":
+            record = {
+                'jenis_form': form_type,
+                'nomor_sop': "PRD-SOP-001",
+                'judul_sop': "Pengoperasian mesin press",
+                'departemen': "Produksi",
+                'tanggal_efektif': "2024-01-05",
+                'penyusun': "Andi",
+                'reviewer': "Budi",
+                'approver': "Citra",
+                'deskripsi': "Langkah kerja standar area produksi"
+            }
+        elif form_type == "HIRARC":
+            record = {
+                'jenis_form': form_type,
+                'area_kerja': "Gudang",
+                'aktivitas': "Pengangkatan material dengan forklift",
+                'bahaya': "Material jatuh dari ketinggian",
+                'risiko': "Cedera kepala",
+                'tingkat_risiko': "Tinggi",
+                'pengendalian': "Gunakan APD lengkap",
+                'pic': "Dewi",
+                'deadline': "2024-02-01",
+                'departemen': "Safety"
+            }
+        else:
+            record = {
+                'jenis_form': form_type,
+                'nomor_audit': "AUD-2024-001",
+                'tanggal_audit': "2024-03-01",
+                'departemen': "Quality Control",
+                'auditor': "Eko",
+                'auditee': "Fajar",
+                'temuan': "Kalibrasi alat ukur terlambat",
+                'kategori_temuan': "Minor",
+                'tindakan_perbaikan': "Jadwalkan kalibrasi ulang",
+                'deadline': "2024-04-01"
+            }
+        record.update(fields)
+        return record
+    return make
+
+
+@pytest.fixture
+def make_upload():
+    """Return a factory for in-memory uploads like Streamlit's UploadedFile"""
+    def make(name="laporan.pdf", body=b"isi laporan"):
+        upload = io.BytesIO(b"%PDF-1.4\n" + body + b"\n%%EOF\n")
+        upload.name = name
+        upload.size = len(upload.getvalue())
+        return upload
+    return make
+
+
+class MockInferenceServer:
+    """
+    Local stand-in for the inference API. Tests set an async handler per
+    model in `models`; each gets (request, payload) and returns a response.
+    """
+
+    def __init__(self):
+        self.models = {}
+        # (model, payload) of every request, in arrival order
+        self.requests = []
+        # Client ports seen, one per TCP connection
+        self.connections = set()
+        self.loop = asyncio.new_event_loop()
+        self.runner = None
+
+    async def handle(self, request):
+        self.connections.add(request.transport.get_extra_info('peername')[1])
+        model = request.match_info['model']
+        payload = await request.json()
+        self.requests.append((model, payload))
+        return await self.models[model](request, payload)
+
+    async def status(self, request):
+        return web.Response(text="ok")
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_post('/models/{model:.*}', self.handle)
+        app.router.add_get('/models/{model:.*}', self.status)
+        # Like a real server, stop working on requests the client gave up on
+        self.runner = web.AppRunner(app, access_log=None, handler_cancellation=True, shutdown_timeout=1)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    def answer(self, model, text, delay=0):
+        """Let a model answer with generated text after delay seconds"""
+        async def handler(request, payload):
+            await asyncio.sleep(delay)
+            return web.json_response([{'generated_text': payload['inputs'] + " [/INST] " + text}])
+        self.models[model] = handler
+
+    def fail(self, model, status, delay=0):
+        """Let a model answer with an error status after delay seconds"""
+        async def handler(request, payload):
+            await asyncio.sleep(delay)
+            return web.json_response({'error': "gagal"}, status=status)
+        self.models[model] = handler
+
+    def stream(self, model, tokens, delay=0, first_delay=0):
+        """Let a model stream tokens as server-sent events, delay seconds apart"""
+        async def handler(request, payload):
+            response = web.StreamResponse(headers={'Content-Type': "text/event-stream"})
+            await response.prepare(request)
+            await asyncio.sleep(first_delay)
+            for number, text in enumerate(tokens):
+                if number:
+                    await asyncio.sleep(delay)
+                event = {'token': {'text': text, 'special': False}}
+                await response.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            await response.write(b"data: [DONE]\n\n")
+            return response
+        self.models[model] = handler
+
+    def start(self):
+        threading.Thread(target=self.loop.run_forever, name="mock-inference", daemon=True).start()
+        port = asyncio.run_coroutine_threadsafe(self._start(), self.loop).result(5)
+        return f"http://127.0.0.1:{port}/models/"
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+@pytest.fixture
+def inference_server(tmp_path, monkeypatch):
+    """Run a mock inference API and point HuggingFaceAPI at it, with a fresh response cache"""
+    server = MockInferenceServer()
+    monkeypatch.setenv('HUGGINGFACE_API_URL', server.start())
+    monkeypatch.setenv('HUGGINGFACE_API_KEY', "test")
+    monkeypatch.setenv('PRIMARY_MODEL', "primary")
+    monkeypatch.setenv('FALLBACK_MODEL', "fallback")
+    monkeypatch.setenv('AI_CACHE_PATH', str(tmp_path / "ai_cache.db"))
+    monkeypatch.setenv('AI_CACHE_MAX_ENTRIES', "1000")
+    monkeypatch.setenv('AI_HEDGING', "false")
+    yield server
+    server.stop()
+
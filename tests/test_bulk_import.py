@@ -0,0 +1,108 @@
+import csv
+import json
+from datetime import datetime
+
+from openpyxl import Workbook
+
+from logic.data_handler import DataHandler
+
+
+def stored_numbers(handler, field='nomor_sop'):
+    return sorted(record[field] for record in handler.load_forms_data())
+
+
+def test_csv_import_reports_invalid_rows_and_keeps_the_rest(upload_path, make_form, tmp_path):
+    rows = [
+        make_form(nomor_sop="SOP-1"),
+        make_form(nomor_sop="SOP-2", tanggal_efektif="05/01/2024"),
+        make_form(nomor_sop="SOP-3", jenis_form="Laporan"),
+        make_form(nomor_sop="SOP-4", timestamp="2023-06-01T08:00:00")
+    ]
+    source = tmp_path / "import.csv"
+    with open(source, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) + ['timestamp'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    handler = DataHandler()
+    report = handler.bulk_import(source)
+
+    assert report['imported'] == 2
+    assert report['failed'] == 2
+    assert [row for row, _ in report['errors']] == [3, 4]
+    assert "YYYY-MM-DD" in report['errors'][0][1]
+    assert stored_numbers(handler) == ["SOP-1", "SOP-4"]
+    imported = {record['nomor_sop']: record for record in handler.load_forms_data()}
+    assert imported["SOP-4"]['timestamp'] == "2023-06-01T08:00:00"
+
+
+def test_excel_import_normalizes_typed_cells(upload_path, make_form, tmp_path):
+    header = list(make_form())
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(header)
+    # Date cell, numeric SOP number and a numeric date that cannot be valid
+    date_cell = make_form(nomor_sop=101, tanggal_efektif=datetime(2024, 1, 5))
+    number_cell = make_form(nomor_sop="SOP-2", tanggal_efektif=20240105)
+    text_cell = make_form(nomor_sop="SOP-3")
+    for form in (date_cell, number_cell, text_cell):
+        sheet.append([form[field] for field in header])
+    source = tmp_path / "import.xlsx"
+    workbook.save(source)
+
+    handler = DataHandler()
+    report = handler.bulk_import(source)
+
+    assert report['imported'] == 2
+    assert report['failed'] == 1
+    assert report['errors'][0][0] == 3
+    imported = {record['nomor_sop']: record for record in handler.load_forms_data()}
+    assert sorted(imported) == ["101", "SOP-3"]
+    assert imported["101"]['tanggal_efektif'] == "2024-01-05"
+
+
+def test_jsonl_import_survives_non_string_values(upload_path, make_form, tmp_path):
+    lines = [
+        json.dumps(make_form(nomor_sop="SOP-1")),
+        json.dumps(make_form(nomor_sop="SOP-2", tanggal_efektif=20240105)),
+        "{not json",
+        json.dumps(["not", "an", "object"]),
+        json.dumps(make_form("HIRARC", deadline=None)),
+        json.dumps(make_form(nomor_sop="SOP-6", reviewer=7, approver={'nama': "Citra"}))
+    ]
+    source = tmp_path / "import.jsonl"
+    source.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+    handler = DataHandler()
+    report = handler.bulk_import(source)
+
+    assert report['imported'] == 2
+    assert [row for row, _ in report['errors']] == [2, 3, 4, 5]
+    imported = {record['nomor_sop']: record for record in handler.load_forms_data()}
+    assert sorted(imported) == ["SOP-1", "SOP-6"]
+    assert imported["SOP-6"]['reviewer'] == "7"
+    assert json.loads(imported["SOP-6"]['approver']) == {'nama': "Citra"}
+
+
+def test_unexpected_row_error_is_reported_not_raised(upload_path, make_form, tmp_path, monkeypatch):
+    source = tmp_path / "import.jsonl"
+    source.write_text(
+        "\n".join(json.dumps(make_form(nomor_sop=f"SOP-{i}")) for i in range(1, 4)) + "\n",
+        encoding='utf-8'
+    )
+    handler = DataHandler()
+
+    from logic.validation import FormValidator
+    original = FormValidator.validate_sop_form
+
+    def flaky(self, form_data, uploaded_file=None):
+        if form_data['nomor_sop'] == "SOP-2":
+            raise TypeError("expected string or bytes-like object")
+        return original(self, form_data, uploaded_file)
+
+    monkeypatch.setattr(FormValidator, 'validate_sop_form', flaky)
+    report = handler.bulk_import(source)
+
+    assert report['imported'] == 2
+    assert report['errors'] == [(2, "Baris tidak dapat diproses: expected string or bytes-like object")]
+    assert stored_numbers(handler) == ["SOP-1", "SOP-3"]
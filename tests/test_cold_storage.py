@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+from logic.cold_storage import DecompressedCache
+from logic.data_handler import DataHandler
+from logic.file_storage import FileStorage
+
+
+def writer(content, calls=None, delay=0):
+    """Return a write(destination) callback that records its calls"""
+    def write(destination):
+        if calls is not None:
+            calls.append(destination)
+        with open(destination, 'wb') as f:
+            f.write(content[:1])
+            time.sleep(delay)
+            f.write(content[1:])
+    return write
+
+
+def test_cached_copies_survive_a_restart(tmp_path):
+    cache = DecompressedCache(tmp_path, max_files=2)
+    first = cache.fetch("aaa", ".pdf", writer(b"pertama"))
+    cache.fetch("bbb", ".pdf", writer(b"kedua"))
+    os.utime(first, (time.time() - 60, time.time() - 60))
+
+    calls = []
+    restarted = DecompressedCache(tmp_path, max_files=2)
+
+    assert list(restarted.entries) == ["aaa", "bbb"]
+    assert restarted.fetch("aaa", ".pdf", writer(b"lagi", calls)).read_bytes() == b"pertama"
+    assert calls == []
+    # "bbb" is now the least recently used copy
+    restarted.fetch("ccc", ".pdf", writer(b"ketiga"))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["aaa.pdf", "ccc.pdf"]
+
+
+def test_restart_trims_to_max_files_and_drops_stale_temp_files(tmp_path):
+    now = time.time()
+    for age, name in [(30, "old.pdf"), (20, "mid.pdf"), (10, "new.pdf"),
+                      (2 * 60 * 60, "x.pdf.abc.tmp"), (5, "y.pdf.def.tmp")]:
+        path = tmp_path / name
+        path.write_bytes(b"isi")
+        os.utime(path, (now - age, now - age))
+
+    cache = DecompressedCache(tmp_path, max_files=2)
+
+    assert list(cache.entries) == ["mid", "new"]
+    # A fresh temp file may belong to a decompression still running elsewhere
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["mid.pdf", "new.pdf", "y.pdf.def.tmp"]
+
+
+def test_concurrent_decompressions_of_one_file(tmp_path):
+    # Two processes sharing the folder, each with its own cache
+    caches = [DecompressedCache(tmp_path), DecompressedCache(tmp_path)]
+    content = b"isi dokumen " * 1000
+    paths, errors = [], []
+
+    def fetch(cache):
+        try:
+            paths.append(cache.fetch("aaa", ".pdf", writer(content, delay=0.2)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=fetch, args=(cache,)) for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert [path.read_bytes() for path in paths] == [content, content]
+    assert [path.name for path in tmp_path.iterdir()] == ["aaa.pdf"]
+
+
+def test_cold_files_are_compressed_and_read_back(upload_path, make_upload):
+    storage = FileStorage()
+    body = b"baris laporan yang berulang\n" * 500
+    path = storage.save_file(make_upload(body=body), "Audit Internal")
+    digest = storage.index.get_file(path)['checksum']
+
+    result = storage.compress_cold_files(min_age_days=0)
+
+    assert result['blobs'] == 1
+    assert result['bytes_after'] < result['bytes_before']
+    assert not (upload_path / path).exists()
+    assert not storage.blob_path(digest).exists()
+    assert not list(storage.blob_path(digest).parent.glob("*.tmp"))
+    assert storage.read_file(path) == make_upload(body=body).getvalue()
+    assert storage.get_cold_tier_stats()['Audit_Internal']['cold_files'] == 1
+
+    # Saving the same content again makes it hot again
+    again = storage.save_file(make_upload(body=body), "Audit Internal")
+    assert (upload_path / path).exists() and (upload_path / again).exists()
+    assert storage.index.blob_info(digest)['compression'] is None
+
+
+def test_records_of_cold_files_still_resolve(upload_path, make_form, make_upload):
+    handler = DataHandler()
+    body = b"temuan audit yang berulang\n" * 500
+    entry = handler.save_form_entry(make_form("Audit Internal"), make_upload(body=body))
+    # Records from before relative keys hold the absolute per-form path
+    legacy = {**entry, 'file_path': str(upload_path / entry['file_path'])}
+
+    handler.file_storage.compress_cold_files(min_age_days=0)
+
+    # The per-form link is gone, the record's key still reaches the content
+    assert not (upload_path / entry['file_path']).exists()
+    for record in (entry, legacy):
+        with open(handler.get_uploaded_file_path(record), 'rb') as f:
+            assert f.read() == make_upload(body=body).getvalue()
@@ -0,0 +1,98 @@
+import threading
+
+from logic.compaction import FormStoreCompactor
+from logic import form_store
+from logic.form_store import JsonlFormStore
+
+
+def make_store(tmp_path, make_form, updates=3):
+    """Store with one January record updated a few times and one deleted"""
+    store = JsonlFormStore(tmp_path)
+    store.initialize()
+    store.append_many([
+        {**make_form(nomor_sop="SOP-1"), 'timestamp': "2024-01-10T08:00:00"},
+        {**make_form(nomor_sop="SOP-2"), 'timestamp': "2024-01-11T08:00:00"}
+    ])
+    kept, dropped = sorted(store.load_partition("2024-01"), key=lambda record: record['nomor_sop'])
+    for version in range(updates):
+        store.put({**kept, 'status': f"Revisi {version}"})
+    store.delete(dropped['id'])
+    return store, kept['id']
+
+
+def line_count(path):
+    return sum(1 for line in path.read_text(encoding='utf-8').splitlines() if line.strip())
+
+
+def test_compaction_keeps_only_live_records(tmp_path, make_form):
+    store, kept_id = make_store(tmp_path, make_form)
+    partition_file = store.partition_file("2024-01")
+    mode = partition_file.stat().st_mode
+
+    assert store.compaction_candidates() == ["2024-01"]
+    assert FormStoreCompactor(store).run_once() == {"2024-01": (6, 1)}
+
+    assert line_count(partition_file) == 1
+    assert partition_file.stat().st_mode == mode
+    assert store.get(kept_id)['status'] == "Revisi 2"
+    assert store.load_manifest()["2024-01"]['lines'] == 1
+    assert store.compaction_candidates() == []
+    assert not list(store.partitions_dir.glob("*.compact"))
+
+
+def test_second_compactor_skips_a_partition_in_progress(tmp_path, make_form):
+    store, _ = make_store(tmp_path, make_form)
+    compaction_lock = store.compaction_lock()
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with compaction_lock:
+            held.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    try:
+        held.wait(5)
+        assert store.compact_partition("2024-01") is None
+        assert line_count(store.partition_file("2024-01")) == 6
+    finally:
+        release.set()
+        holder.join()
+
+    assert store.compact_partition("2024-01") == (6, 1)
+
+
+def test_leftover_temp_file_does_not_break_compaction(tmp_path, make_form):
+    store, kept_id = make_store(tmp_path, make_form)
+    partition_file = store.partition_file("2024-01")
+    # Left behind by a compactor that died under the old fixed temp name
+    stale = partition_file.with_name(partition_file.name + ".compact")
+    stale.write_text('{"id": "stale"}\n', encoding='utf-8')
+
+    assert store.compact_partition("2024-01") == (6, 1)
+    assert store.get(kept_id) is not None
+    assert store.get("stale") is None
+
+
+def test_compaction_leaves_no_lock_per_partition(tmp_path, make_form):
+    store, _ = make_store(tmp_path, make_form)
+    store.append_many([{**make_form(), 'timestamp': "2024-02-10T08:00:00"}])
+    locks = len(form_store._WRITE_LOCKS)
+
+    store.compact(force=True)
+    store.compact(force=True)
+
+    assert not list(store.partitions_dir.glob("*.lock"))
+    assert len(form_store._WRITE_LOCKS) <= locks + 1
+
+
+def test_compacted_deletes_narrow_the_date_bounds(tmp_path, make_form):
+    store, _ = make_store(tmp_path, make_form)
+    # SOP-2, the latest record of January, was deleted
+    assert store.date_bounds()[1] == "2024-01-11T08:00:00"
+
+    store.compact_partition("2024-01")
+
+    assert store.date_bounds() == ("2024-01-10T08:00:00", "2024-01-10T08:00:00")
@@ -0,0 +1,20 @@
+import pytest
+
+from logic.config import env_flag
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("true", True), ("True", True), ("1", True), ("yes  # hedge slow calls", True),
+    ("false", False), ("0", False), ("no", False), ("on", False)
+])
+def test_env_flag_values(monkeypatch, value, expected):
+    monkeypatch.setenv('SOME_FLAG', value)
+    assert env_flag('SOME_FLAG') is expected
+
+
+def test_env_flag_default(monkeypatch):
+    monkeypatch.delenv('SOME_FLAG', raising=False)
+    assert env_flag('SOME_FLAG') is False
+    assert env_flag('SOME_FLAG', default=True) is True
+    monkeypatch.setenv('SOME_FLAG', " # nothing set")
+    assert env_flag('SOME_FLAG', default=True) is True
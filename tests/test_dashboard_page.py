@@ -0,0 +1,73 @@
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from backend.pages.dashboard import DEFAULT_WINDOW_DAYS
+from logic.data_handler import DataHandler
+
+
+def dashboard():
+    from backend.pages.dashboard import render_page
+
+    render_page()
+
+
+@pytest.fixture
+def dashboard_app(upload_path, make_form, monkeypatch):
+    """Dashboard over forms from January, March and June 2024"""
+    handler = DataHandler()
+    for month in (1, 3, 6):
+        handler._commit_entries([{**make_form(nomor_sop=f"SOP-{month}"), 'timestamp': f"2024-{month:02d}-10T08:00:00"}])
+    # The page calls st.pie_chart, which this Streamlit release lacks
+    monkeypatch.setattr(st, 'pie_chart', st.bar_chart, raising=False)
+    monkeypatch.setitem(sys.modules, '__main__', sys.modules['__main__'])
+    return AppTest.from_function(dashboard)
+
+
+def test_first_load_shows_only_the_last_days(dashboard_app):
+    app = dashboard_app.run()
+
+    assert not app.exception
+    assert app.date_input(key="dashboard_start_date").value == date(2024, 6, 10) - timedelta(days=DEFAULT_WINDOW_DAYS)
+    assert app.session_state['dashboard_filters_active'] is True
+    assert len(app.session_state['filtered_df']) == 1
+
+
+def test_full_range_is_served_from_the_aggregates(dashboard_app, monkeypatch):
+    loads = []
+    load = DataHandler.get_dashboard_data
+    monkeypatch.setattr(DataHandler, 'get_dashboard_data', lambda self, **kw: loads.append(kw) or load(self, **kw))
+    app = dashboard_app.run()
+    loads.clear()
+
+    app.date_input(key="dashboard_start_date").set_value(date(2024, 1, 10)).run()
+
+    assert not app.exception
+    assert app.session_state['dashboard_filters_active'] is False
+    assert app.session_state['filtered_df'] is None
+    assert loads == []
+    assert app.metric[0].value == "3"
+
+    app.date_input(key="dashboard_start_date").set_value(date(2024, 3, 1)).run()
+
+    assert app.session_state['dashboard_filters_active'] is True
+    assert len(app.session_state['filtered_df']) == 2
+    assert len(loads) == 1
+
+
+def test_short_history_defaults_to_all_of_it(upload_path, make_form, monkeypatch):
+    handler = DataHandler()
+    for day in (1, 5):
+        handler._commit_entries([{**make_form(nomor_sop=f"SOP-{day}"), 'timestamp': f"2024-06-{day:02d}T08:00:00"}])
+    monkeypatch.setattr(st, 'pie_chart', st.bar_chart, raising=False)
+    monkeypatch.setitem(sys.modules, '__main__', sys.modules['__main__'])
+
+    app = AppTest.from_function(dashboard).run()
+
+    assert not app.exception
+    assert app.date_input(key="dashboard_start_date").value == date(2024, 6, 1)
+    assert app.session_state['filtered_df'] is None
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from logic.data_handler import DataHandler
+from logic.form_store import new_record_id
+
+
+def read_counter(monkeypatch, store):
+    """Count how often records are parsed from disk"""
+    reads = []
+    original = store._read_lines
+
+    def counted(path):
+        reads.append(path)
+        return original(path)
+
+    monkeypatch.setattr(store, '_read_lines', counted)
+    return reads
+
+
+def test_sessions_share_one_parsed_partition(upload_path, make_form, monkeypatch):
+    first = DataHandler()
+    saved = first.save_form_entry(make_form())
+    second = DataHandler()
+    reads = read_counter(monkeypatch, second.store)
+
+    key = second.store.partition_key(saved)
+    assert second.store.load_partition(key) is first.store.load_partition(key)
+    assert reads == []
+
+
+def test_own_writes_carry_the_cache_forward(upload_path, make_form, monkeypatch):
+    handler = DataHandler()
+    saved = handler.save_form_entry(make_form(nomor_sop="SOP-1"))
+    key = handler.store.partition_key(saved)
+    before = handler.store.load_partition(key)
+    reads = read_counter(monkeypatch, handler.store)
+
+    handler.save_form_entry(make_form(nomor_sop="SOP-2"))
+
+    after = handler.store.load_partition(key)
+    assert [record['nomor_sop'] for record in after] == ["SOP-1", "SOP-2"]
+    # Readers holding the old list are not affected
+    assert [record['nomor_sop'] for record in before] == ["SOP-1"]
+    assert reads == []
+
+
+def test_outside_writes_invalidate_the_cache(upload_path, make_form):
+    handler = DataHandler()
+    saved = handler.save_form_entry(make_form(nomor_sop="SOP-1"))
+    key = handler.store.partition_key(saved)
+    handler.store.load_partition(key)
+
+    # Another replica appending to the same partition
+    with open(handler.store.partition_file(key), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({**saved, 'id': new_record_id(saved), 'nomor_sop': "SOP-2"}) + "\n")
+
+    assert sorted(record['nomor_sop'] for record in handler.store.load_partition(key)) == ["SOP-1", "SOP-2"]
+
+
+@pytest.mark.parametrize("backend", ['json', 'sqlite'])
+def test_updates_and_deletes_are_visible_to_every_session(upload_path, make_form, monkeypatch, backend):
+    monkeypatch.setenv('FORMS_STORAGE_BACKEND', backend)
+    writer, reader = DataHandler(), DataHandler()
+    saved = writer.save_form_entry(make_form(nomor_sop="SOP-1"))
+    other = writer.save_form_entry(make_form(nomor_sop="SOP-2"))
+    assert len(reader.load_forms_data()) == 2
+
+    writer.update_entry(saved['id'], {'judul_sop': "Judul baru"})
+    writer.delete_entry(other['id'])
+
+    assert [record['judul_sop'] for record in reader.load_forms_data()] == ["Judul baru"]
+
+
+@pytest.mark.parametrize("backend", ['json', 'sqlite'])
+def test_callers_get_their_own_list(upload_path, make_form, monkeypatch, backend):
+    monkeypatch.setenv('FORMS_STORAGE_BACKEND', backend)
+    handler = DataHandler()
+    handler.save_form_entry(make_form())
+
+    handler.load_forms_data().append({'id': "tambahan"})
+
+    assert len(DataHandler().load_forms_data()) == 1
@@ -0,0 +1,85 @@
+import io
+import json
+import tempfile
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from logic.export import EXPORT_FORMATS, export_dataframe, export_file
+from logic.frame_loader import records_to_dataframe
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    """Collect temporary export files in a folder of their own"""
+    folder = tmp_path / "tmp"
+    folder.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(folder))
+    return folder
+
+
+@pytest.fixture
+def frame(make_form):
+    records = [
+        {**make_form(nomor_sop=f"SOP-{i}"), 'timestamp': f"2024-01-{i + 1:02d}T08:00:00"}
+        for i in range(7)
+    ]
+    return records_to_dataframe(records)
+
+
+def read_export(df, export_format, **kwargs):
+    with export_file(df, export_format, **kwargs) as f:
+        return f.read()
+
+
+def test_csv_export_in_chunks_matches_the_frame(frame, export_dir):
+    content = read_export(frame, 'CSV', chunk_size=3)
+
+    exported = pd.read_csv(io.BytesIO(content))
+    assert list(exported.columns) == list(frame.columns)
+    assert list(exported['nomor_sop']) == [f"SOP-{i}" for i in range(7)]
+    assert content.count(b"jenis_form") == 1
+    assert not any(export_dir.iterdir())
+
+
+def test_jsonl_export_writes_one_record_per_line(frame, export_dir):
+    lines = read_export(frame, 'JSONL', chunk_size=2).decode('utf-8').splitlines()
+
+    assert len(lines) == 7
+    assert json.loads(lines[6])['nomor_sop'] == "SOP-6"
+    assert not any(export_dir.iterdir())
+
+
+def test_json_export_is_one_array_written_in_chunks(frame, export_dir):
+    exported = json.loads(read_export(frame, 'JSON', chunk_size=3))
+
+    assert [record['nomor_sop'] for record in exported] == [f"SOP-{i}" for i in range(7)]
+    assert json.loads(read_export(frame.iloc[:0], 'JSON')) == []
+    assert not any(export_dir.iterdir())
+
+
+def test_export_file_is_read_from_disk_after_unlinking(frame, export_dir):
+    with export_file(frame, 'CSV') as f:
+        # Already gone from the folder, the open handle keeps the content
+        assert not any(export_dir.iterdir())
+        assert f.read().startswith(b"jenis_form,nomor_sop")
+
+
+def test_excel_export_streams_rows(frame, export_dir):
+    content = read_export(frame, 'Excel', chunk_size=4)
+
+    rows = list(load_workbook(io.BytesIO(content), read_only=True).active.iter_rows(values_only=True))
+    assert list(rows[0]) == list(frame.columns)
+    assert len(rows) == 8
+    assert not any(export_dir.iterdir())
+
+
+def test_export_dataframe_leaves_file_to_caller_and_cleans_up_on_error(frame, export_dir):
+    path, file_name, mime_type = export_dataframe(frame, 'CSV')
+    assert path.exists() and (file_name, mime_type) == ("iso_data.csv", EXPORT_FORMATS['CSV'][1])
+    path.unlink()
+
+    with pytest.raises(ValueError):
+        export_file(frame, 'PDF')
+    assert not any(export_dir.iterdir())
@@ -0,0 +1,140 @@
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from logic.data_handler import DataHandler
+from logic.file_storage import FileStorage
+
+
+def test_same_name_in_the_same_second_gets_separate_paths(upload_path, make_upload):
+    storage = FileStorage()
+    first = storage.save_file(make_upload(body=b"A"), "HIRARC", record_id="record-a")
+    second = storage.save_file(make_upload(body=b"B"), "HIRARC", record_id="record-b")
+    anonymous = [storage.save_file(make_upload(body=b"C"), "HIRARC") for _ in range(2)]
+
+    assert len({first, second, *anonymous}) == 4
+    assert storage.read_file(first).endswith(b"A\n%%EOF\n")
+    assert storage.read_file(second).endswith(b"B\n%%EOF\n")
+    assert storage.index.files_for_record("record-a") == [first]
+    assert storage.index.files_for_record("record-b") == [second]
+
+
+def test_submissions_with_same_file_name_keep_their_own_file(upload_path, make_form, make_upload):
+    handler = DataHandler()
+    first = handler.save_form_entry(make_form(), make_upload(body=b"A"))
+    second = handler.save_form_entry(make_form(), make_upload(body=b"B"))
+
+    assert first['file_path'] != second['file_path']
+    with open(handler.get_uploaded_file_path(first), 'rb') as f:
+        assert f.read().endswith(b"A\n%%EOF\n")
+    for record in (first, second):
+        assert len(handler.file_storage.index.files_for_record(record['id'])) == 1
+
+
+def test_local_storage_reconciles_only_once(upload_path, monkeypatch):
+    FileStorage()
+    calls = []
+    monkeypatch.setattr(FileStorage, 'reconcile_index', lambda self: calls.append(self))
+
+    # An empty index is no reason to walk the upload tree on every start
+    FileStorage()
+    assert calls == []
+
+
+def test_uploads_from_before_the_index_are_indexed(upload_path, make_upload):
+    folder = upload_path / "HIRARC"
+    folder.mkdir(parents=True)
+    (folder / "lama.pdf").write_bytes(make_upload().getvalue())
+    (folder / "salinan.pdf").write_bytes(make_upload().getvalue())
+
+    storage = FileStorage()
+
+    assert storage.list_files("HIRARC") == ["HIRARC/lama.pdf", "HIRARC/salinan.pdf"]
+    assert storage.index.stats()['blobs'] == 1
+    assert (folder / "lama.pdf").stat().st_ino == (folder / "salinan.pdf").stat().st_ino
+
+
+def test_same_content_is_stored_once(upload_path, make_upload):
+    storage = FileStorage()
+    first = storage.save_file(make_upload(), "SOP Produksi", record_id="record-a")
+    second = storage.save_file(make_upload(name="revisi.pdf"), "HIRARC", record_id="record-b")
+
+    digest = storage.get_file_info(first)['checksum']
+    assert storage.get_file_info(second)['checksum'] == digest
+    assert storage.index.blob_info(digest)['refs'] == 2
+    # Both per-form paths are hardlinks to the one blob
+    blob_inode = storage.blob_path(digest).stat().st_ino
+    assert storage.get_file_path(first).stat().st_ino == blob_inode
+    assert storage.get_file_path(second).stat().st_ino == blob_inode
+
+    stats = storage.get_storage_stats()
+    assert stats['files'] == 2
+    assert stats['blobs'] == 1
+    assert stats['saved_bytes'] == stats['stored_bytes']
+    assert not list(storage.blobs_dir.glob("upload_*"))
+
+
+def test_blob_is_removed_with_its_last_reference(upload_path, make_upload):
+    storage = FileStorage()
+    first = storage.save_file(make_upload(), "HIRARC")
+    second = storage.save_file(make_upload(), "HIRARC")
+    digest = storage.get_file_info(first)['checksum']
+
+    assert storage.delete_file(first)
+    assert storage.index.blob_info(digest)['refs'] == 1
+    assert storage.read_file(second).startswith(b"%PDF")
+
+    assert storage.delete_file(second)
+    assert storage.index.blob_info(digest) is None
+    assert not storage.blob_path(digest).exists()
+    assert storage.get_storage_stats()['blobs'] == 0
+    assert not storage.delete_file(second)
+
+
+def test_cleanup_old_files_releases_blobs(upload_path, make_upload):
+    storage = FileStorage()
+    old = storage.save_file(make_upload(body=b"lama"), "HIRARC")
+    digest = storage.get_file_info(old)['checksum']
+
+    recent = storage.save_file(make_upload(body=b"baru"), "HIRARC")
+    # Age is the indexed save time, backdate the first upload
+    with sqlite3.connect(storage.index.db_file) as conn:
+        conn.execute(
+            "UPDATE files SET created = ? WHERE path = ?",
+            ((datetime.now() - timedelta(days=40)).timestamp(), old)
+        )
+
+    assert storage.cleanup_old_files(days_old=30) == 1
+    assert storage.list_files("HIRARC") == [recent]
+    assert not storage.blob_path(digest).exists()
+
+
+def test_records_keep_the_relative_storage_key(upload_path, make_form, make_upload):
+    handler = DataHandler()
+    entry = handler.save_form_entry(make_form("HIRARC"), make_upload())
+
+    assert entry['file_path'] == handler.file_storage.list_files("HIRARC")[0]
+    assert not Path(entry['file_path']).is_absolute()
+    assert handler.get_uploaded_file_path(entry) == upload_path / entry['file_path']
+
+
+def test_older_absolute_paths_still_resolve(upload_path, make_form, make_upload):
+    handler = DataHandler()
+    entry = handler.save_form_entry(make_form("HIRARC"), make_upload())
+    relative_path = entry['file_path']
+
+    for legacy in (upload_path / relative_path, upload_path.resolve() / relative_path):
+        assert handler.get_uploaded_file_path({**entry, 'file_path': str(legacy)}) == upload_path / relative_path
+    # A path that names nothing falls back to the record's indexed upload
+    stale = {**entry, 'file_path': str(upload_path / "cold_cache" / "hilang.pdf")}
+    assert handler.get_uploaded_file_path(stale) == upload_path / relative_path
+    assert handler.get_uploaded_file_path({'id': entry['id']}) is None
+
+
+def test_moved_upload_is_found_through_its_record(upload_path, make_form, make_upload):
+    handler = DataHandler()
+    entry = handler.save_form_entry(make_form("HIRARC"), make_upload())
+
+    new_path = handler.file_storage.move_file(entry['file_path'], "Audit Internal")
+
+    assert handler.get_uploaded_file_path(entry) == upload_path / new_path
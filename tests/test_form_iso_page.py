@@ -0,0 +1,30 @@
+import sys
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+
+def confirm_submit():
+    from backend.pages.form_iso import FormISOPage
+
+    FormISOPage().report_submitted("SOP")
+
+
+@pytest.mark.parametrize("write_behind, message", [
+    ('false', "Form SOP berhasil disimpan!"),
+    ('true', "Form SOP diterima dan sedang disimpan")
+])
+def test_submit_message_matches_the_write_mode(upload_path, tmp_path, monkeypatch, write_behind, message):
+    monkeypatch.setenv('FORMS_WRITE_BEHIND', write_behind)
+    # No API key, so the page never warms suggestions up over the network
+    monkeypatch.setenv('HUGGINGFACE_API_KEY', "")
+    monkeypatch.setenv('AI_CACHE_PATH', str(tmp_path / "ai_cache.db"))
+    monkeypatch.setenv('AI_SUGGESTIONS_PATH', str(tmp_path / "ai_suggestions.json"))
+    # AppTest leaves its script as __main__, which spawned processes would re-run
+    monkeypatch.setitem(sys.modules, '__main__', sys.modules['__main__'])
+
+    app = AppTest.from_function(confirm_submit).run()
+
+    assert not app.exception
+    # The leading emoji may be split off as the element's icon
+    assert [element.value.lstrip("✅ ") for element in app.success] == [message]
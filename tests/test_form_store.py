@@ -0,0 +1,76 @@
+import json
+
+from logic.data_handler import DataHandler
+from logic.form_store import partition_of_id
+
+
+def test_append_after_torn_line_keeps_new_record(upload_path, make_form):
+    handler = DataHandler()
+    first = handler.save_form_entry(make_form())
+    partition_file = handler.store.partition_file(partition_of_id(first['id']))
+
+    # Interrupted write: half a record without its newline
+    with open(partition_file, 'a', encoding='utf-8') as f:
+        f.write('{"id": "torn')
+
+    second = handler.save_form_entry(make_form(nomor_sop="PRD-SOP-002"))
+
+    assert handler.get_entry(second['id'])['nomor_sop'] == "PRD-SOP-002"
+    fresh = DataHandler()
+    assert sorted(record['id'] for record in fresh.load_forms_data()) == sorted([first['id'], second['id']])
+    assert fresh.store.count() == 2
+    assert fresh.get_aggregates()['total'] == 2
+
+
+def test_each_submit_appends_one_line(upload_path, make_form):
+    handler = DataHandler()
+    first = handler.save_form_entry(make_form(nomor_sop="SOP-1"))
+    partition_file = handler.store.partition_file(partition_of_id(first['id']))
+    inode = partition_file.stat().st_ino
+
+    second = handler.save_form_entry(make_form(nomor_sop="SOP-2"))
+
+    lines = partition_file.read_text(encoding='utf-8').splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [first['id'], second['id']]
+    # Appended in place, not rewritten through a temp file
+    assert partition_file.stat().st_ino == inode
+    assert [record['nomor_sop'] for record in DataHandler().load_forms_data()] == ["SOP-1", "SOP-2"]
+
+
+def test_legacy_json_document_is_migrated(upload_path, make_form):
+    upload_path.mkdir(parents=True)
+    legacy = [
+        {**make_form(nomor_sop="SOP-1"), 'timestamp': "2023-11-02T09:00:00"},
+        {**make_form("HIRARC"), 'timestamp': "2024-01-15T10:00:00"}
+    ]
+    (upload_path / "forms_data.json").write_text(json.dumps(legacy), encoding='utf-8')
+
+    handler = DataHandler()
+
+    records = sorted(handler.load_forms_data(), key=lambda record: record['timestamp'])
+    assert [record['jenis_form'] for record in records] == ["SOP Produksi", "HIRARC"]
+    assert all(partition_of_id(record['id']) for record in records)
+    assert (upload_path / "forms_data.json.migrated").exists()
+    assert not (upload_path / "forms_data.json").exists()
+    assert sorted(handler.store.load_manifest()) == ["2023-11", "2024-01"]
+
+
+def test_legacy_log_with_torn_tail_is_migrated(upload_path, make_form):
+    upload_path.mkdir(parents=True)
+    lines = [json.dumps({**make_form(nomor_sop=f"SOP-{i}"), 'timestamp': "2024-02-01T08:00:00"}) for i in range(2)]
+    (upload_path / "forms_data.jsonl").write_text("\n".join(lines) + '\n{"jenis_form": "SOP', encoding='utf-8')
+
+    handler = DataHandler()
+
+    assert sorted(record['nomor_sop'] for record in handler.load_forms_data()) == ["SOP-0", "SOP-1"]
+    assert (upload_path / "forms_data.jsonl.migrated").exists()
+
+
+def test_save_forms_data_replaces_everything(upload_path, make_form):
+    handler = DataHandler()
+    handler.save_form_entry(make_form(nomor_sop="SOP-1"))
+
+    handler.save_forms_data([{**make_form(nomor_sop="SOP-9"), 'timestamp': "2022-05-05T08:00:00"}])
+
+    assert [record['nomor_sop'] for record in DataHandler().load_forms_data()] == ["SOP-9"]
+    assert list(handler.store.load_manifest()) == ["2022-05"]
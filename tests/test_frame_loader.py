@@ -0,0 +1,62 @@
+import pandas as pd
+
+from logic.frame_loader import STRING_DTYPE, drop_unused_categories, records_to_dataframe
+
+
+def test_columns_get_compact_dtypes(make_form):
+    records = [
+        {**make_form(), 'timestamp': "2024-01-05T08:00:00"},
+        {**make_form("HIRARC"), 'timestamp': "2024-01-06T09:30:00.123456"},
+        {**make_form("Audit Internal"), 'timestamp': "2024-02-01T10:00:00"}
+    ]
+
+    df = records_to_dataframe(records)
+
+    # Column order follows first appearance, like pd.DataFrame(records)
+    assert list(df.columns[:3]) == ['jenis_form', 'nomor_sop', 'judul_sop']
+    assert df['jenis_form'].dtype == 'category'
+    assert list(df['jenis_form'].cat.categories) == sorted(["SOP Produksi", "HIRARC", "Audit Internal"])
+    assert df['departemen'].dtype == 'category'
+    assert pd.api.types.is_datetime64_any_dtype(df['timestamp'])
+    assert df['timestamp'][1] == pd.Timestamp("2024-01-06T09:30:00.123456")
+    assert pd.api.types.is_datetime64_any_dtype(df['tanggal_efektif'])
+    if STRING_DTYPE:
+        assert df['judul_sop'].dtype == STRING_DTYPE
+    # Fields a form type lacks are missing, not empty strings
+    assert df['nomor_sop'].isna().tolist() == [False, True, True]
+
+
+def test_bad_dates_become_nat_and_are_counted(make_form, caplog):
+    records = [
+        make_form(tanggal_efektif="bukan tanggal"),
+        make_form(tanggal_efektif="2024-01-05"),
+        make_form(tanggal_efektif=None)
+    ]
+
+    df = records_to_dataframe(records)
+
+    assert pd.isna(df['tanggal_efektif'][0])
+    assert df['tanggal_efektif'][1] == pd.Timestamp("2024-01-05")
+    # Missing dates are not parse failures
+    assert df.attrs['unparsed_dates'] == {'tanggal_efektif': 1}
+    assert "'bukan tanggal'" in caplog.text
+
+
+def test_mixed_values_are_kept(make_form):
+    df = records_to_dataframe([make_form(penyusun=12), make_form(penyusun="Andi")])
+
+    assert list(df['penyusun']) == [12, "Andi"]
+    assert df.attrs['unparsed_dates'] == {}
+
+
+def test_filtering_can_drop_unused_categories(make_form):
+    df = records_to_dataframe([make_form(), make_form("HIRARC")])
+
+    filtered = drop_unused_categories(df[df['jenis_form'] == "HIRARC"])
+
+    assert list(filtered['jenis_form'].cat.categories) == ["HIRARC"]
+    assert filtered['jenis_form'].value_counts().to_dict() == {"HIRARC": 1}
+
+
+def test_empty_records_give_an_empty_frame():
+    assert records_to_dataframe([]).empty
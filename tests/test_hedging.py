@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from ai import latency_budget
+from ai.huggingface_api import HuggingFaceAPI
+
+
+@pytest.fixture
+def hedging(inference_server, monkeypatch):
+    """Hedge after 0.2s, with fresh budgets and every call reaching the server"""
+    monkeypatch.setattr(latency_budget, '_BUDGETS', {})
+    monkeypatch.setenv('AI_HEDGING', "true")
+    monkeypatch.setenv('AI_HEDGE_BUDGET', "0.2")
+    monkeypatch.setenv('AI_HEDGE_MIN_BUDGET', "0.1")
+    monkeypatch.setenv('AI_CACHE_MAX_ENTRIES', "0")
+    return inference_server
+
+
+def test_slow_primary_is_hedged_and_fallback_wins(hedging):
+    hedging.answer("primary", "Lambat.", delay=3)
+    hedging.answer("fallback", "Cepat.")
+    api = HuggingFaceAPI()
+
+    started = time.perf_counter()
+    answer = api.get_response("Halo?")
+
+    assert answer == ("Cepat.", "fallback")
+    assert time.perf_counter() - started < 1
+    stats = api.hedge_budget.stats()
+    assert (stats['requests'], stats['hedged'], stats['fallback_wins'], stats['primary_wins']) == (1, 1, 1, 0)
+    # The cancelled primary still counts the time it was waited for
+    assert stats['samples'] == 1
+
+
+def test_fast_primary_is_not_hedged(hedging):
+    hedging.answer("primary", "Cepat.")
+    api = HuggingFaceAPI()
+
+    assert api.get_response("Halo?") == ("Cepat.", "primary")
+    assert [model for model, _ in hedging.requests] == ["primary"]
+    stats = api.hedge_budget.stats()
+    assert (stats['requests'], stats['hedged'], stats['samples']) == (1, 0, 1)
+
+
+def test_primary_can_still_win_after_the_hedge(hedging):
+    hedging.answer("primary", "Utama.", delay=0.4)
+    hedging.answer("fallback", "Cadangan.", delay=3)
+    api = HuggingFaceAPI()
+
+    assert api.get_response("Halo?") == ("Utama.", "primary")
+    assert [model for model, _ in hedging.requests] == ["primary", "fallback"]
+    assert api.hedge_budget.stats()['primary_wins'] == 1
+
+
+def test_without_hedging_the_fallback_waits_for_the_primary(inference_server, monkeypatch):
+    monkeypatch.setenv('AI_CACHE_MAX_ENTRIES', "0")
+    inference_server.answer("primary", "Utama.", delay=0.4)
+    inference_server.answer("fallback", "Cadangan.")
+    api = HuggingFaceAPI()
+
+    assert api.hedge_budget is None
+    assert api.get_response("Halo?") == ("Utama.", "primary")
+    assert [model for model, _ in inference_server.requests] == ["primary"]
+
+
+def test_late_first_token_is_hedged(hedging):
+    hedging.stream("primary", ["Lambat."], first_delay=3)
+    hedging.answer("fallback", "Cepat.")
+    api = HuggingFaceAPI()
+
+    started = time.perf_counter()
+    assert list(api.stream_response("Halo?")) == ["Cepat."]
+    assert time.perf_counter() - started < 1
+    assert api.last_stream_stats['model'] == "fallback"
+    assert api.stream_budget.stats()['fallback_wins'] == 1
+    # Responses and first tokens keep separate budgets
+    assert api.hedge_budget.stats()['requests'] == 0
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+from tenacity import wait_none
+
+from ai.http_client import AsyncHTTPClient
+from ai.huggingface_api import HuggingFaceAPI
+
+
+@pytest.fixture
+def api(inference_server, monkeypatch):
+    # Every call reaches the server
+    monkeypatch.setenv('AI_CACHE_MAX_ENTRIES', "0")
+    return HuggingFaceAPI()
+
+
+def test_sync_facade_reuses_one_connection(inference_server, api):
+    inference_server.answer("primary", "Kebijakan mutu dan sasaran mutu.")
+
+    answers = [api.get_response(f"Pertanyaan {number}?") for number in range(5)]
+
+    assert answers[0] == ("Kebijakan mutu dan sasaran mutu.", "primary")
+    assert len(inference_server.requests) == 5
+    # Keep-alive: one handshake for all calls
+    assert len(inference_server.connections) == 1
+
+
+def test_concurrent_calls_do_not_block_each_other(inference_server, api):
+    inference_server.answer("primary", "Jawaban.", delay=0.3)
+
+    async def ask_all():
+        return await asyncio.gather(*(HuggingFaceAPI().get_response_async(f"Q{n}") for n in range(10)))
+
+    started = time.perf_counter()
+    answers = api.http.run_sync(ask_all())
+
+    assert [text for text, _ in answers] == ["Jawaban."] * 10
+    # Ten 0.3s calls overlap instead of queueing
+    assert time.perf_counter() - started < 1.5
+
+
+def test_server_errors_are_retried(inference_server, api, monkeypatch):
+    monkeypatch.setattr(HuggingFaceAPI._post.retry, 'wait', wait_none())
+    attempts = []
+
+    async def loading_then_ready(request, payload):
+        attempts.append(payload)
+        if len(attempts) < 3:
+            return web.json_response({'error': "Model is loading"}, status=503)
+        return web.json_response([{'generated_text': "Siap."}])
+
+    inference_server.models["primary"] = loading_then_ready
+
+    assert api.get_response("Halo?") == ("Siap.", "primary")
+    assert len(attempts) == 3
+
+
+def test_client_errors_go_straight_to_the_fallback(inference_server, api):
+    inference_server.fail("primary", 400)
+    inference_server.answer("fallback", "Jawaban cadangan.")
+
+    assert api.get_response("Halo?") == ("Jawaban cadangan.", "fallback")
+    assert [model for model, _ in inference_server.requests] == ["primary", "fallback"]
+
+
+def test_read_timeout_ends_a_stalled_request(inference_server):
+    inference_server.answer("primary", "Terlambat.", delay=2)
+    client = AsyncHTTPClient(connect_timeout=1, read_timeout=0.2)
+    url = f"{HuggingFaceAPI().api_url}primary"
+
+    try:
+        started = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            client.run_sync(client.post_json(url, {}, {'inputs': "Halo"}))
+        assert time.perf_counter() - started < 1.5
+    finally:
+        client.close()
+
+
+def test_iterate_sync_yields_items_as_they_arrive():
+    client = AsyncHTTPClient()
+
+    async def slow_numbers():
+        for number in range(3):
+            await asyncio.sleep(0.1)
+            yield number
+
+    try:
+        started = time.perf_counter()
+        items = client.iterate_sync(slow_numbers())
+        assert next(items) == 0
+        assert time.perf_counter() - started < 0.25
+        assert list(items) == [1, 2]
+    finally:
+        client.close()
+
+
+def test_iterate_sync_raises_producer_errors():
+    client = AsyncHTTPClient()
+
+    async def broken():
+        yield 1
+        raise ValueError("rusak")
+
+    try:
+        items = client.iterate_sync(broken())
+        assert next(items) == 1
+        with pytest.raises(ValueError, match="rusak"):
+            next(items)
+    finally:
+        client.close()
+
+
+def test_model_info_checks_the_connection(inference_server, api):
+    info = api.get_model_info()
+
+    assert info['api_status'] == "connected"
+    assert info['cache'] is None
+    assert info['hedging'] is None
@@ -0,0 +1,36 @@
+import pytest
+
+from ai import latency_budget
+from ai.latency_budget import LatencyBudget, get_latency_budget
+
+
+@pytest.fixture(autouse=True)
+def fresh_budgets(monkeypatch):
+    monkeypatch.setattr(latency_budget, '_BUDGETS', {})
+
+
+def test_hedging_is_off_unless_enabled(monkeypatch):
+    monkeypatch.delenv('AI_HEDGING', raising=False)
+    assert get_latency_budget("model") is None
+
+    monkeypatch.setenv('AI_HEDGING', "TRUE")
+    monkeypatch.setenv('AI_HEDGE_BUDGET', "2")
+    budget = get_latency_budget("model")
+    assert budget.budget() == 2
+    assert get_latency_budget("model") is budget
+
+
+def test_budget_follows_the_percentile_once_warm():
+    budget = LatencyBudget(initial=5, minimum=1, maximum=30, percentile=95, min_samples=20)
+    for _ in range(19):
+        budget.record(0.5)
+    assert budget.budget() == 5
+
+    for seconds in range(1, 21):
+        budget.record(float(seconds))
+    # p95 of 19 x 0.5 and 1..20 seconds
+    assert budget.budget() == 19
+    budget.record(100)
+    for _ in range(200):
+        budget.record(0.2)
+    assert budget.budget() == 1
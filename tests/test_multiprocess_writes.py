@@ -0,0 +1,74 @@
+import multiprocessing
+
+import pytest
+
+from logic.data_handler import DataHandler
+from logic.form_store import fcntl, get_write_lock
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="advisory file locks need POSIX")
+
+# Fresh interpreters, like separate replicas, instead of forked copies of this one
+SPAWN = multiprocessing.get_context('spawn')
+
+
+def submit_forms(forms, start_event, results):
+    """One replica submitting its forms, then draining a write-behind queue"""
+    handler = DataHandler()
+    start_event.wait(30)
+    ids = [handler.submit_form_entry(form)['id'] for form in forms]
+    if handler.write_queue is not None:
+        handler.write_queue.stop()
+        while handler.write_queue.pending_count():
+            handler.write_queue.drain()
+    results.put(ids)
+
+
+def hold_lock(path, locked, release):
+    with get_write_lock(path):
+        locked.set()
+        release.wait(30)
+
+
+@pytest.mark.parametrize("backend, write_behind", [('json', 'false'), ('sqlite', 'true')])
+def test_two_processes_lose_no_records(upload_path, monkeypatch, make_form, backend, write_behind):
+    monkeypatch.setenv('FORMS_STORAGE_BACKEND', backend)
+    monkeypatch.setenv('FORMS_WRITE_BEHIND', write_behind)
+    start_event = SPAWN.Event()
+    results = SPAWN.Queue()
+    workers = [
+        SPAWN.Process(target=submit_forms, args=(
+            [make_form(nomor_sop=f"SOP-{worker}-{i}") for i in range(5)], start_event, results
+        ))
+        for worker in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    start_event.set()
+    submitted = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+
+    monkeypatch.setenv('FORMS_WRITE_BEHIND', 'false')
+    handler = DataHandler()
+    stored = [record['id'] for record in handler.load_forms_data()]
+    assert sorted(stored) == sorted(submitted[0] + submitted[1])
+    assert len(set(stored)) == 10
+    assert handler.get_aggregates()['total'] == 10
+
+
+def test_write_lock_excludes_another_process(tmp_path):
+    path = tmp_path / "forms"
+    locked, release = SPAWN.Event(), SPAWN.Event()
+    holder = SPAWN.Process(target=hold_lock, args=(path, locked, release))
+    holder.start()
+    try:
+        assert locked.wait(30)
+        assert get_write_lock(path).acquire(blocking=False) is False
+    finally:
+        release.set()
+        holder.join(30)
+
+    lock = get_write_lock(path)
+    assert lock.acquire(blocking=False) is True
+    lock.release()
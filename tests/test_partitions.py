@@ -0,0 +1,82 @@
+from datetime import date, datetime
+
+import pytest
+
+from logic.data_handler import DataHandler
+from logic.form_store import JsonlFormStore
+
+
+@pytest.fixture
+def store(tmp_path, make_form):
+    store = JsonlFormStore(tmp_path)
+    store.initialize()
+    store.append_many([
+        {**make_form(nomor_sop="SOP-1"), 'timestamp': "2024-01-31T23:00:00"},
+        {**make_form(nomor_sop="SOP-2"), 'timestamp': "2024-02-01T07:00:00"},
+        {**make_form("HIRARC"), 'timestamp': "2024-02-15T08:00:00"},
+        {**make_form(nomor_sop="SOP-3"), 'timestamp': "2024-04-10T08:00:00"},
+        {**make_form(nomor_sop="SOP-4"), 'timestamp': "bukan tanggal"}
+    ])
+    return store
+
+
+def loaded_partitions(monkeypatch, store):
+    loaded = []
+    original = store.load_partition
+    monkeypatch.setattr(store, 'load_partition', lambda key: loaded.append(key) or original(key))
+    return loaded
+
+
+def test_records_are_split_by_month(store):
+    files = sorted(path.name for path in store.partitions_dir.glob("*.jsonl"))
+    assert files == ["2024-01.jsonl", "2024-02.jsonl", "2024-04.jsonl", "undated.jsonl"]
+
+    manifest = store.load_manifest()
+    assert manifest["2024-02"]['count'] == 2
+    assert manifest["2024-02"]['min_timestamp'] == "2024-02-01T07:00:00"
+    assert manifest["2024-02"]['max_timestamp'] == "2024-02-15T08:00:00"
+    assert store.date_bounds() == ("2024-01-31T23:00:00", "2024-04-10T08:00:00")
+    assert store.count() == 5
+
+
+def test_date_range_only_opens_overlapping_partitions(store, monkeypatch):
+    loaded = loaded_partitions(monkeypatch, store)
+
+    records = store.query(start_date=date(2024, 2, 1), end_date=datetime(2024, 2, 29, 23, 59, 59))
+
+    assert [record['timestamp'] for record in records] == ["2024-02-01T07:00:00", "2024-02-15T08:00:00"]
+    assert loaded == ["2024-02"]
+
+
+def test_filters_combine_with_the_date_range(store, monkeypatch):
+    assert [record['nomor_sop'] for record in store.query(end_date=date(2024, 2, 10), form_type="SOP Produksi")] == [
+        "SOP-1", "SOP-2"
+    ]
+    assert store.query(start_date=date(2024, 3, 1), department="Safety") == []
+
+    loaded = loaded_partitions(monkeypatch, store)
+    # Undated records only show up without a date filter
+    assert len(store.query()) == 5
+    assert "undated" in loaded
+
+
+def test_dashboard_data_for_a_range(upload_path, make_form):
+    handler = DataHandler()
+    handler.save_forms_data([
+        {**make_form(nomor_sop="SOP-1"), 'timestamp': "2024-01-05T08:00:00"},
+        {**make_form(nomor_sop="SOP-2"), 'timestamp': "2024-03-05T08:00:00"}
+    ])
+
+    assert handler.get_date_bounds() == (datetime(2024, 1, 5, 8), datetime(2024, 3, 5, 8))
+    df = handler.get_dashboard_data(start_date=date(2024, 2, 1))
+    assert list(df['nomor_sop']) == ["SOP-2"]
+    assert handler.get_dashboard_data(start_date=date(2025, 1, 1)).empty
+
+
+def test_undated_records_do_not_break_the_date_bounds(upload_path, make_form):
+    handler = DataHandler()
+    handler.save_forms_data([{**make_form(), 'timestamp': "bukan tanggal"}])
+    assert handler.get_date_bounds() is None
+
+    handler.save_form_entry(make_form())
+    assert handler.get_date_bounds()[0].date() == date.today()
@@ -0,0 +1,117 @@
+import json
+import sqlite3
+
+import pytest
+
+from logic.data_handler import DataHandler
+from logic.form_store import JsonlFormStore, partition_of_id
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def handler(request, upload_path, monkeypatch):
+    monkeypatch.setenv('FORMS_STORAGE_BACKEND', request.param)
+    return DataHandler()
+
+
+def test_ids_name_the_partition(handler, make_form):
+    saved = handler.save_form_entry(make_form())
+
+    assert partition_of_id(saved['id']) == saved['timestamp'][:7]
+    assert handler.get_entry(saved['id']) == saved
+    assert handler.get_entry("bukan-id") is None
+    assert handler.get_entry(saved['id'][:-1] + ("0" if saved['id'][-1] != "0" else "1")) is None
+
+
+def test_update_keeps_id_and_submission_time(handler, make_form):
+    saved = handler.save_form_entry(make_form())
+
+    updated = handler.update_entry(saved['id'], {'judul_sop': "Judul baru", 'id': "lain", 'timestamp': "2020-01-01"})
+
+    assert updated['id'] == saved['id']
+    assert updated['timestamp'] == saved['timestamp']
+    assert updated['updated_at'] >= saved['timestamp']
+    assert DataHandler().get_entry(saved['id'])['judul_sop'] == "Judul baru"
+    assert len(handler.load_forms_data()) == 1
+    assert handler.update_entry("2024-01-" + "0" * 32, {'judul_sop': "x"}) is None
+
+
+def test_delete_removes_only_that_record(handler, make_form):
+    kept = handler.save_form_entry(make_form(nomor_sop="SOP-1"))
+    deleted = handler.save_form_entry(make_form(nomor_sop="SOP-2"))
+
+    assert handler.delete_entry(deleted['id']) is True
+    assert handler.delete_entry(deleted['id']) is False
+
+    assert [record['id'] for record in DataHandler().load_forms_data()] == [kept['id']]
+    assert handler.get_entry(deleted['id']) is None
+
+
+def test_json_update_and_delete_append_to_the_log(upload_path, make_form):
+    handler = DataHandler()
+    saved = handler.save_form_entry(make_form())
+    partition_file = handler.store.partition_file(partition_of_id(saved['id']))
+
+    handler.update_entry(saved['id'], {'status': "Completed"})
+    handler.delete_entry(saved['id'])
+
+    lines = [json.loads(line) for line in partition_file.read_text(encoding='utf-8').splitlines()]
+    assert [line.get('status') for line in lines[:2]] == [None, "Completed"]
+    assert lines[2]['_deleted'] is True and lines[2]['id'] == saved['id']
+    assert handler.store.load_manifest()[partition_of_id(saved['id'])]['count'] == 0
+
+
+def test_records_from_before_ids_get_one(upload_path, make_form):
+    # Format 1 partition: no IDs, no line counts
+    store = JsonlFormStore(upload_path)
+    store.partitions_dir.mkdir(parents=True)
+    record = {**make_form(), 'timestamp': "2024-01-05T08:00:00"}
+    store.partition_file("2024-01").write_text(json.dumps(record) + "\n", encoding='utf-8')
+    store.manifest_file.write_text(json.dumps({'partitions': {"2024-01": {
+        'min_timestamp': record['timestamp'], 'max_timestamp': record['timestamp'], 'count': 1
+    }}}), encoding='utf-8')
+
+    handler = DataHandler()
+
+    [upgraded] = handler.load_forms_data()
+    assert partition_of_id(upgraded['id']) == "2024-01"
+    assert handler.get_entry(upgraded['id'])['nomor_sop'] == record['nomor_sop']
+
+
+def test_sqlite_rows_from_before_ids_get_one(upload_path, make_form, monkeypatch):
+    upload_path.mkdir(parents=True)
+    record = {**make_form(), 'timestamp': "2024-01-05T08:00:00"}
+    with sqlite3.connect(upload_path / "forms_data.db") as conn:
+        conn.execute(
+            "CREATE TABLE forms (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, jenis_form TEXT, "
+            "departemen TEXT, tingkat_risiko TEXT, data TEXT NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO forms (timestamp, jenis_form, departemen, data) VALUES (?, ?, ?, ?)",
+            (record['timestamp'], record['jenis_form'], record['departemen'], json.dumps(record))
+        )
+    monkeypatch.setenv('FORMS_STORAGE_BACKEND', 'sqlite')
+
+    handler = DataHandler()
+
+    [upgraded] = handler.load_forms_data()
+    assert partition_of_id(upgraded['id']) == "2024-01"
+    assert handler.delete_entry(upgraded['id']) is True
+    assert handler.load_forms_data() == []
+
+
+@pytest.mark.parametrize('record_id', ["../../etc/passwd", "2024-01-" + "0" * 31, "undated-" + "a" * 32])
+def test_supplied_ids_are_checked(handler, make_form, record_id):
+    with pytest.raises(ValueError):
+        handler.save_form_entry({**make_form(), 'id': record_id})
+    with pytest.raises(ValueError):
+        handler._commit_entries([{**make_form(), 'timestamp': "2024-01-10T08:00:00", 'id': record_id}])
+
+    assert handler.load_forms_data() == []
+
+
+def test_valid_supplied_id_is_kept(handler, make_form):
+    entry = {**make_form(), 'timestamp': "2024-01-10T08:00:00", 'id': "2024-01-" + "a" * 32}
+
+    handler._commit_entries([entry])
+
+    assert handler.get_entry("2024-01-" + "a" * 32)['nomor_sop'] == entry['nomor_sop']
@@ -0,0 +1,117 @@
+import pytest
+
+from ai import response_cache
+from ai.huggingface_api import HuggingFaceAPI
+from ai.response_cache import ResponseCache, context_hash, normalize_query
+
+
+class Clock:
+    """Stand-in for the time module with a settable time()"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache, 'time', clock)
+    return clock
+
+
+def test_normalize_query_ignores_case_spacing_and_end_punctuation():
+    assert normalize_query("  Apa saja dokumen   wajib ISO 9001?? ") == "apa saja dokumen wajib iso 9001"
+    assert normalize_query(None) == ""
+
+
+def test_key_covers_question_model_and_context(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.db")
+    cache.put("Apa itu HIRARC?", "primary", "Identifikasi bahaya.", context_hash([]))
+
+    assert cache.get("apa itu hirarc", "primary", context_hash([])) == "Identifikasi bahaya."
+    assert cache.get("Apa itu HIRARC?", "fallback", context_hash([])) is None
+    assert cache.get("Apa itu HIRARC?", "primary", context_hash([["Q", "A"]])) is None
+    assert cache.stats() == {
+        'hits': 1, 'misses': 2, 'evictions': 0, 'expired': 0, 'entries': 1, 'hit_rate': 1 / 3
+    }
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.db", ttl=60)
+    cache.put("Q1", "primary", "A1")
+    cache.put("Q2", "primary", "A2")
+
+    clock.now += 61
+    assert cache.get("Q1", "primary") is None
+    assert cache.purge_expired() == 1
+    assert cache.stats()['expired'] == 2
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.db", max_entries=2)
+    cache.put("Q1", "primary", "A1")
+    clock.now += 1
+    cache.put("Q2", "primary", "A2")
+    clock.now += 1
+    # Reading Q1 makes Q2 the least recently used
+    cache.get("Q1", "primary")
+    clock.now += 1
+
+    cache.put("Q3", "primary", "A3")
+
+    assert cache.get("Q2", "primary") is None
+    assert cache.get("Q1", "primary") == "A1"
+    assert cache.get("Q3", "primary") == "A3"
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_survives_a_restart(tmp_path):
+    ResponseCache(tmp_path / "cache.db").put("Q", "primary", "A")
+
+    reopened = ResponseCache(tmp_path / "cache.db")
+
+    assert reopened.get("Q", "primary") == "A"
+    reopened.clear()
+    assert reopened.stats()['entries'] == reopened.stats()['hits'] == 0
+
+
+def test_repeated_question_skips_the_remote_call(inference_server):
+    inference_server.answer("primary", "Kebijakan mutu.")
+
+    first = HuggingFaceAPI().get_response("Apa saja dokumen wajib ISO 9001?")
+    second = HuggingFaceAPI().get_response("apa saja dokumen wajib ISO 9001")
+
+    assert first == second == ("Kebijakan mutu.", "primary")
+    assert len(inference_server.requests) == 1
+    assert HuggingFaceAPI().get_model_info()['cache']['hits'] == 1
+
+
+def test_follow_up_in_another_context_is_asked_again(inference_server):
+    inference_server.answer("primary", "Jawaban.")
+    api = HuggingFaceAPI()
+
+    api.get_response("Apa contohnya?")
+    api.get_response("Apa contohnya?")
+
+    # The first answer is now in the prompt's context window
+    assert len(inference_server.requests) == 2
+
+
+def test_fallback_answers_are_not_cached(inference_server):
+    inference_server.fail("primary", 400)
+    inference_server.answer("fallback", "Jawaban cadangan.")
+
+    HuggingFaceAPI().get_response("Apa itu audit internal?")
+    HuggingFaceAPI().get_response("Apa itu audit internal?")
+
+    assert [model for model, _ in inference_server.requests] == ["primary", "fallback"] * 2
+
+
+def test_cache_can_be_turned_off(inference_server, monkeypatch):
+    monkeypatch.setenv('AI_CACHE_MAX_ENTRIES', "0")
+
+    assert HuggingFaceAPI().cache is None
@@ -0,0 +1,101 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from logic.file_storage import FileStorage
+from logic.retention import RetentionSweeper, parse_policies
+
+
+def backdate(storage, relative_path, days):
+    """Make an indexed file look saved `days` ago"""
+    with sqlite3.connect(storage.index.db_file) as conn:
+        conn.execute(
+            "UPDATE files SET created = ? WHERE path = ?",
+            ((datetime.now() - timedelta(days=days)).timestamp(), relative_path)
+        )
+
+
+def test_parse_policies():
+    assert parse_policies("HIRARC=365, SOP Produksi=0") == {'HIRARC': 365, 'SOP_Produksi': 0}
+    assert parse_policies("") == {}
+    assert parse_policies(None) == {}
+    with pytest.raises(ValueError):
+        parse_policies("HIRARC=setahun")
+
+
+def test_sweep_applies_per_form_type_policies(upload_path, make_upload):
+    storage = FileStorage()
+    expired = storage.save_file(make_upload(body=b"lama"), "HIRARC")
+    fresh = storage.save_file(make_upload(body=b"baru"), "HIRARC")
+    kept = storage.save_file(make_upload(body=b"sop"), "SOP Produksi")
+    default = storage.save_file(make_upload(body=b"audit"), "Audit Internal")
+    for relative_path in (expired, kept, default):
+        backdate(storage, relative_path, 100)
+
+    sweeper = RetentionSweeper(
+        storage, parse_policies("HIRARC=30,SOP Produksi=0"), default_days=None, max_files_per_second=0
+    )
+    removed, reclaimed = sweeper.sweep()
+
+    assert removed == 1
+    assert reclaimed == len(make_upload(body=b"lama").getvalue())
+    assert storage.list_files() == sorted([fresh, kept, default])
+
+
+def test_shared_content_is_reclaimed_with_its_last_reference(upload_path, make_upload):
+    storage = FileStorage()
+    old = storage.save_file(make_upload(), "HIRARC")
+    shared = storage.save_file(make_upload(), "HIRARC")
+    backdate(storage, old, 100)
+
+    sweeper = RetentionSweeper(storage, default_days=30, max_files_per_second=0)
+
+    assert sweeper.sweep() == (1, 0)
+    backdate(storage, shared, 100)
+    assert sweeper.sweep() == (1, len(make_upload().getvalue()))
+
+
+def test_sweep_works_through_batches_and_keeps_totals(upload_path, make_upload):
+    storage = FileStorage()
+    for i in range(5):
+        backdate(storage, storage.save_file(make_upload(body=str(i).encode()), "HIRARC"), 100 - i)
+
+    sweeper = RetentionSweeper(storage, default_days=30, batch_size=2, max_files_per_second=0)
+    removed, _ = sweeper.sweep()
+
+    assert removed == 5
+    assert storage.list_files() == []
+    progress = sweeper.get_progress()
+    assert progress['running'] is False
+    assert progress['last_sweep'] is not None
+    # Totals survive a restart
+    restarted = RetentionSweeper(storage, default_days=30)
+    assert restarted.get_progress()['files_removed'] == 5
+    assert restarted.get_progress()['bytes_reclaimed'] == progress['bytes_reclaimed']
+
+
+def test_sweep_is_rate_limited(upload_path, make_upload):
+    storage = FileStorage()
+    for i in range(3):
+        backdate(storage, storage.save_file(make_upload(body=str(i).encode()), "HIRARC"), 100)
+
+    sweeper = RetentionSweeper(storage, default_days=30, max_files_per_second=10)
+    started = time.monotonic()
+    sweeper.sweep()
+
+    # The third delete is due 0.2s after the first
+    assert time.monotonic() - started >= 0.2
+
+
+def test_stopped_sweeper_leaves_the_rest_for_later(upload_path, make_upload):
+    storage = FileStorage()
+    for i in range(3):
+        backdate(storage, storage.save_file(make_upload(body=str(i).encode()), "HIRARC"), 100)
+
+    sweeper = RetentionSweeper(storage, default_days=30, max_files_per_second=1)
+    sweeper._stop_event.set()
+
+    assert sweeper.sweep() == (0, 0)
+    assert len(storage.list_files()) == 3
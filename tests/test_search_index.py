@@ -0,0 +1,84 @@
+import pytest
+
+from logic.data_handler import DataHandler
+from logic.search_index import FormSearchIndex, normalize_text, stem_word
+
+
+@pytest.mark.parametrize("word", ["pengangkatan", "mengangkat", "diangkatnya", "angkat"])
+def test_word_forms_share_a_stem(word):
+    assert stem_word(word) == "angkat"
+
+
+def test_normalize_text_drops_accents_and_stop_words():
+    assert normalize_text("Pemeriksaan alat ukur dan timbangan café") == ["periksa", "alat", "ukur", "timbang", "cafe"]
+    assert normalize_text(None) == []
+
+
+def test_query_matches_other_word_forms_and_prefixes(tmp_path):
+    index = FormSearchIndex(tmp_path / "search.db")
+    index.initialize()
+    index.rebuild([
+        {'id': "a", 'bahaya': "Material jatuh saat pengangkatan"},
+        {'id': "b", 'temuan': "Kalibrasi alat ukur terlambat"},
+        {'id': "c", 'jenis_form': "SOP Produksi"}
+    ], data_version=1)
+
+    assert [record_id for record_id, _ in index.search("mengangkat material")] == ["a"]
+    # The last word matches as a prefix, results follow typing
+    assert [record_id for record_id, _ in index.search("kalib")] == ["b"]
+    assert index.search("dan yang") == []
+    assert index.is_current(1)
+
+
+def test_hazard_matches_rank_above_description_matches(tmp_path):
+    index = FormSearchIndex(tmp_path / "search.db")
+    index.initialize()
+    index.rebuild([
+        {'id': "deskripsi", 'deskripsi': "Risiko tumpahan oli di area mesin"},
+        {'id': "bahaya", 'bahaya': "Tumpahan oli di area mesin"}
+    ], data_version=1)
+
+    hits = index.search("tumpahan oli")
+
+    assert [record_id for record_id, _ in hits] == ["bahaya", "deskripsi"]
+    assert hits[0][1] > hits[1][1] > 0
+
+
+def test_saved_entries_are_searchable_at_once(upload_path, make_form):
+    handler = DataHandler()
+    handler.search_entries("apa saja")
+    hirarc = handler.save_form_entry(make_form("HIRARC"))
+    audit = handler.save_form_entry(make_form("Audit Internal"))
+    version = handler.store.data_version()
+
+    hits, elapsed_ms = handler.search_entries("material jatuh")
+
+    assert [hit['id'] for hit in hits] == [hirarc['id']]
+    assert hits[0]['score'] > 0
+    assert elapsed_ms >= 0
+    # Folded in on save, no rebuild needed
+    assert handler.search_index.is_current(version)
+    assert [hit['id'] for hit in handler.search_entries("kalibrasi")[0]] == [audit['id']]
+
+
+def test_updates_and_deletes_reach_the_index(upload_path, make_form):
+    handler = DataHandler()
+    entry = handler.save_form_entry(make_form("HIRARC"))
+
+    handler.update_entry(entry['id'], {'bahaya': "Lantai licin"})
+    assert handler.search_entries("material")[0] == []
+    assert [hit['id'] for hit in handler.search_entries("licin")[0]] == [entry['id']]
+
+    handler.delete_entry(entry['id'])
+    assert handler.search_entries("licin")[0] == []
+
+
+def test_stale_index_is_rebuilt_on_search(upload_path, make_form):
+    handler = DataHandler()
+    entry = handler.save_form_entry(make_form("HIRARC"))
+    # Index lost, e.g. deleted by hand
+    handler.search_index.rebuild([], data_version=None)
+
+    hits, _ = DataHandler().search_entries("material")
+
+    assert [hit['id'] for hit in hits] == [entry['id']]
@@ -0,0 +1,57 @@
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+
+from logic.data_handler import DataHandler
+from logic.form_store import SQLiteFormStore
+
+
+@pytest.fixture
+def store(tmp_path, make_form):
+    store = SQLiteFormStore(tmp_path)
+    store.initialize()
+    store.append_many([
+        {**make_form(nomor_sop="SOP-1"), 'timestamp': "2024-01-05T08:00:00"},
+        {**make_form("HIRARC", departemen="Gudang"), 'timestamp': "2024-01-20T09:00:00"},
+        {**make_form("HIRARC", tingkat_risiko="Rendah"), 'timestamp': "2024-02-03T10:00:00"},
+        {**make_form("Audit Internal"), 'timestamp': "2024-03-01T11:00:00"}
+    ])
+    return store
+
+
+def test_filters_are_pushed_down(store):
+    assert [record['timestamp'][:10] for record in store.query(form_type="HIRARC")] == ["2024-01-20", "2024-02-03"]
+    assert [record['departemen'] for record in store.query(department="Gudang")] == ["Gudang"]
+    in_january = store.query(start_date=date(2024, 1, 1), end_date=datetime(2024, 1, 31, 23, 59, 59))
+    assert len(in_january) == 2
+    assert store.query(start_date=date(2024, 1, 10), form_type="HIRARC", department="Safety")[0]['tingkat_risiko'] == "Rendah"
+
+    with sqlite3.connect(store.db_file) as conn:
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT data FROM forms WHERE timestamp >= ? AND timestamp <= ?", ("a", "b")
+        ))
+    assert "idx_forms_timestamp" in plan
+
+
+def test_counts_are_grouped_in_sql(store):
+    assert dict(store.count_by_form_type()) == {"SOP Produksi": 1, "HIRARC": 2, "Audit Internal": 1}
+    assert dict(store.count_by_department()) == {"Produksi": 1, "Gudang": 1, "Safety": 1, "Quality Control": 1}
+    assert sorted(store.risk_by_department()) == [("Gudang", "Tinggi", 1), ("Safety", "Rendah", 1)]
+    assert dict(store.daily_counts())["2024-02-03"] == 1
+    assert store.date_bounds() == ("2024-01-05T08:00:00", "2024-03-01T11:00:00")
+    assert store.count() == 4
+
+
+def test_json_records_are_imported_when_sqlite_is_selected(upload_path, monkeypatch, make_form):
+    json_handler = DataHandler()
+    saved = [json_handler.save_form_entry(make_form(nomor_sop=f"SOP-{i}")) for i in range(3)]
+
+    monkeypatch.setenv('FORMS_STORAGE_BACKEND', 'sqlite')
+    handler = DataHandler()
+
+    assert handler.backend == 'sqlite'
+    assert [record['id'] for record in handler.load_forms_data()] == [record['id'] for record in saved]
+    # Only the first start imports
+    assert DataHandler().store.count() == 3
+    assert handler.get_aggregates()['total'] == 3
@@ -0,0 +1,131 @@
+import pytest
+
+# S3 storage is optional, as are the packages to test it
+boto3 = pytest.importorskip("boto3")
+mock_aws = pytest.importorskip("moto").mock_aws
+
+from logic import storage_backend
+from logic.data_handler import DataHandler
+from logic.file_storage import FileStorage
+from logic.storage_backend import S3ObjectStore
+
+BUCKET = "iso-uploads"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Mocked S3 bucket with a clean object store cache"""
+    for name, value in {
+        'AWS_ACCESS_KEY_ID': "testing",
+        'AWS_SECRET_ACCESS_KEY': "testing",
+        'AWS_DEFAULT_REGION': "us-east-1"
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(storage_backend, '_OBJECT_STORES', {})
+    with mock_aws():
+        client = boto3.client('s3')
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def use_s3(s3, upload_path, monkeypatch):
+    """Switch FileStorage to the mocked bucket"""
+    monkeypatch.setenv('FILE_STORAGE_BACKEND', 's3')
+    monkeypatch.setenv('S3_BUCKET', BUCKET)
+    monkeypatch.setenv('S3_PREFIX', "iso/")
+    return s3
+
+
+def count_calls(monkeypatch, cls, name):
+    """Count calls to a method while keeping its behaviour"""
+    calls = []
+    original = getattr(cls, name)
+
+    def counted(self, *args, **kwargs):
+        calls.append(args)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(cls, name, counted)
+    return calls
+
+
+def test_s3_store_put_get_delete(s3, tmp_path):
+    store = S3ObjectStore(BUCKET, prefix="iso/")
+    source = tmp_path / "upload.tmp"
+    source.write_bytes(b"isi blob")
+
+    store.put_file("ab12", source)
+
+    assert not source.exists()
+    assert store.exists("ab12")
+    assert s3.get_object(Bucket=BUCKET, Key="iso/blobs/ab/ab12")['Body'].read() == b"isi blob"
+    assert list(store.list_keys()) == ["ab12"]
+    store.get_file("ab12", tmp_path / "copy")
+    assert (tmp_path / "copy").read_bytes() == b"isi blob"
+
+    store.delete("ab12")
+    assert not store.exists("ab12")
+    assert list(store.list_keys()) == []
+
+
+def test_s3_storage_reconciles_only_once(use_s3, monkeypatch, make_upload):
+    listings = count_calls(monkeypatch, S3ObjectStore, 'list_keys')
+
+    # Every page load creates a FileStorage; even with nothing uploaded yet
+    # only the first one lists the bucket
+    for _ in range(3):
+        FileStorage()
+    assert len(listings) == 1
+
+    path = FileStorage().save_file(make_upload(body=b"A"), "HIRARC", record_id="record-a")
+    again = FileStorage()
+    assert len(listings) == 1
+    assert again.read_file(path).endswith(b"A\n%%EOF\n")
+    assert again.index.files_for_record("record-a") == [path]
+
+
+def test_switching_to_s3_uploads_local_files_once(upload_path, s3, monkeypatch, make_upload):
+    local = FileStorage()
+    path = local.save_file(make_upload(body=b"lokal"), "SOP Produksi", record_id="record-l")
+    digest = local.index.get_file(path)['checksum']
+
+    monkeypatch.setenv('FILE_STORAGE_BACKEND', 's3')
+    monkeypatch.setenv('S3_BUCKET', BUCKET)
+    remote = FileStorage()
+
+    assert remote.blobs.exists(digest)
+    assert not (upload_path / path).exists()
+    assert not local.blob_path(digest).exists()
+    assert remote.read_file(path).endswith(b"lokal\n%%EOF\n")
+    assert remote.index.files_for_record("record-l") == [path]
+
+    reconciles = count_calls(monkeypatch, FileStorage, 'reconcile_index')
+    FileStorage()
+    assert reconciles == []
+
+
+def test_records_keep_the_storage_key_not_a_download(use_s3, monkeypatch, make_form, make_upload):
+    downloads = count_calls(monkeypatch, S3ObjectStore, 'get_file')
+    handler = DataHandler()
+
+    entry = handler.save_form_entry(make_form("HIRARC"), make_upload())
+
+    # Nothing is fetched back right after the upload
+    assert downloads == []
+    assert entry['file_path'] == handler.file_storage.list_files("HIRARC")[0]
+    with open(handler.get_uploaded_file_path(handler.get_entry(entry['id'])), 'rb') as f:
+        assert f.read() == make_upload().getvalue()
+    assert len(downloads) == 1
+
+
+def test_deleted_files_keep_their_object(use_s3, make_upload):
+    storage = FileStorage()
+    path = storage.save_file(make_upload(), "HIRARC")
+    digest = storage.index.get_file(path)['checksum']
+
+    storage.delete_file(path)
+    storage.reconcile_index()
+
+    # Another replica's index may still reference it
+    assert storage.blobs.exists(digest)
@@ -0,0 +1,112 @@
+import json
+import sys
+import time
+
+from aiohttp import web
+from streamlit.testing.v1 import AppTest
+
+from ai.huggingface_api import HuggingFaceAPI
+
+
+def test_tokens_arrive_before_the_answer_is_complete(inference_server):
+    inference_server.stream("primary", ["Kebijakan", " mutu", " tertulis."], delay=0.2)
+    api = HuggingFaceAPI()
+
+    started = time.perf_counter()
+    pieces = api.stream_response("Apa saja dokumen wajib ISO 9001?")
+    first = next(pieces)
+    first_after = time.perf_counter() - started
+
+    assert first == "Kebijakan"
+    # The last token is only sent 0.4s in
+    assert first_after < 0.3
+    assert list(pieces) == [" mutu", " tertulis."]
+    assert inference_server.requests[0][1]['stream'] is True
+
+
+def test_stream_records_latency_metrics(inference_server):
+    inference_server.stream("primary", ["Satu", " dua", " tiga"], delay=0.1, first_delay=0.1)
+    api = HuggingFaceAPI()
+
+    assert "".join(api.stream_response("Hitung?")) == "Satu dua tiga"
+
+    stats = api.last_stream_stats
+    assert stats['model'] == "primary"
+    assert stats['cached'] is False
+    assert stats['error'] is None
+    assert stats['tokens'] == 3
+    assert 100 <= stats['ttft_ms'] < stats['total_ms']
+    # Two tokens in about 0.2s after the first
+    assert 5 < stats['tokens_per_second'] < 20
+    assert api.stream_metrics == [stats]
+    assert api.context == [("Hitung?", "Satu dua tiga")]
+
+
+def test_special_tokens_are_not_shown(inference_server):
+    async def with_end_token(request, payload):
+        response = web.StreamResponse(headers={'Content-Type': "text/event-stream"})
+        await response.prepare(request)
+        for token in ({'text': "Ya", 'special': False}, {'text': "</s>", 'special': True}):
+            await response.write(f"data: {json.dumps({'token': token})}\n\n".encode('utf-8'))
+        return response
+
+    inference_server.models["primary"] = with_end_token
+
+    assert list(HuggingFaceAPI().stream_response("Boleh?")) == ["Ya"]
+
+
+def test_streamed_answer_is_cached(inference_server):
+    inference_server.stream("primary", ["Identifikasi", " bahaya."])
+    list(HuggingFaceAPI().stream_response("Apa itu HIRARC?"))
+
+    api = HuggingFaceAPI()
+    assert list(api.stream_response("apa itu hirarc")) == ["Identifikasi bahaya."]
+    assert api.last_stream_stats['cached'] is True
+    assert len(inference_server.requests) == 1
+
+
+def test_failed_stream_falls_back_in_one_piece(inference_server):
+    inference_server.fail("primary", 400)
+    inference_server.answer("fallback", "Jawaban cadangan.")
+    api = HuggingFaceAPI()
+
+    assert list(api.stream_response("Halo?")) == ["Jawaban cadangan."]
+    assert api.last_stream_stats['model'] == "fallback"
+    assert api.last_stream_stats['tokens'] == 0
+
+
+def test_cut_off_stream_keeps_the_shown_part(inference_server):
+    async def cut_off(request, payload):
+        response = web.StreamResponse(headers={'Content-Type': "text/event-stream"})
+        await response.prepare(request)
+        await response.write(b'data: {"token": {"text": "Sebagian", "special": false}}\n\n')
+        await response.write(b'data: {"error": "Model overloaded"}\n\n')
+        return response
+
+    inference_server.models["primary"] = cut_off
+    api = HuggingFaceAPI()
+
+    assert list(api.stream_response("Halo?")) == ["Sebagian"]
+    assert api.last_stream_stats['error'] == "Model overloaded"
+    # Incomplete answers are not cached
+    assert api.cache.stats()['entries'] == 0
+
+
+def render_assistant():
+    from backend.pages.assistant import render_page
+
+    render_page()
+
+
+def test_chat_shows_the_streamed_answer_with_metrics(inference_server, monkeypatch):
+    inference_server.stream("primary", ["Kebijakan", " mutu."])
+    # AppTest leaves its script as __main__, which spawned processes would re-run
+    monkeypatch.setitem(sys.modules, '__main__', sys.modules['__main__'])
+
+    app = AppTest.from_function(render_assistant, default_timeout=10).run()
+    app.chat_input[0].set_value("Apa saja dokumen wajib ISO 9001?").run()
+
+    assert not app.exception
+    assert app.session_state.chat_history[-1]['content'].startswith("Kebijakan mutu.")
+    assert app.session_state.chat_history[-1]['metrics'].startswith("⏱️ token pertama")
+    assert not app.warning
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import re
+import threading
+import time
+
+import pytest
+from aiohttp import web
+
+from ai import suggestion_cache
+from ai.huggingface_api import HuggingFaceAPI
+from ai.suggestion_cache import SuggestionCache, start_suggestion_cache
+
+PAIRS = [("Nomor SOP", "SOP Produksi"), ("Area Kerja", "HIRARC")]
+
+
+@pytest.fixture
+def suggestions(inference_server):
+    """Fallback model answering one example per field and variant"""
+    calls = {'active': 0, 'peak': 0}
+
+    async def suggest(request, payload):
+        calls['active'] += 1
+        calls['peak'] = max(calls['peak'], calls['active'])
+        await asyncio.sleep(0.05)
+        calls['active'] -= 1
+        field = re.search(r"for the (.+?) field", payload['inputs']).group(1)
+        variation = re.search(r"variation (\d+)", payload['inputs'])
+        number = variation.group(1) if variation else "1"
+        return web.json_response([{'generated_text': f"Contoh {field} {number}"}])
+
+    inference_server.models["fallback"] = suggest
+    return calls
+
+
+def test_warm_fills_every_pair_with_distinct_variants(inference_server, suggestions, tmp_path):
+    cache = SuggestionCache(HuggingFaceAPI(), tmp_path / "suggestions.json", pairs=PAIRS, variants=3, concurrency=2)
+
+    assert cache.warm() == 2
+
+    assert cache.entries["Nomor SOP|SOP Produksi"]['variants'] == [
+        "Contoh Nomor SOP 1", "Contoh Nomor SOP 2", "Contoh Nomor SOP 3"
+    ]
+    assert len(inference_server.requests) == 6
+    assert suggestions['peak'] <= 2
+    # Nothing stale, nothing to do
+    assert cache.warm() == 0
+
+
+def test_clicks_rotate_through_variants_from_memory(inference_server, suggestions, tmp_path):
+    cache = SuggestionCache(HuggingFaceAPI(), tmp_path / "suggestions.json", pairs=PAIRS, variants=2)
+    cache.warm()
+    requests = len(inference_server.requests)
+
+    shown = [cache.get("Area Kerja", "HIRARC") for _ in range(3)]
+
+    assert shown == ["Contoh Area Kerja 1", "Contoh Area Kerja 2", "Contoh Area Kerja 1"]
+    assert len(inference_server.requests) == requests
+
+
+def test_warm_variants_survive_a_restart(inference_server, suggestions, tmp_path):
+    cache_file = tmp_path / "suggestions.json"
+    SuggestionCache(HuggingFaceAPI(), cache_file, pairs=PAIRS, variants=2).warm()
+    requests = len(inference_server.requests)
+
+    restarted = SuggestionCache(HuggingFaceAPI(), cache_file, pairs=PAIRS, variants=2)
+
+    assert restarted.warm() == 0
+    assert restarted.get("Nomor SOP", "SOP Produksi") == "Contoh Nomor SOP 1"
+    assert len(inference_server.requests) == requests
+
+
+def test_cold_pair_asks_the_model_once(inference_server, suggestions, tmp_path):
+    cache = SuggestionCache(HuggingFaceAPI(), tmp_path / "suggestions.json", pairs=PAIRS)
+
+    assert cache.get("Temuan Audit", "Audit Internal") == "Contoh Temuan Audit 1"
+    assert cache.get("Temuan Audit", "Audit Internal") == "Contoh Temuan Audit 1"
+    assert len(inference_server.requests) == 1
+    saved = json.loads((tmp_path / "suggestions.json").read_text(encoding='utf-8'))
+    assert saved["Temuan Audit|Audit Internal"]['variants'] == ["Contoh Temuan Audit 1"]
+
+
+def test_stale_pairs_are_refreshed(inference_server, suggestions, tmp_path):
+    cache = SuggestionCache(HuggingFaceAPI(), tmp_path / "suggestions.json", pairs=PAIRS, variants=1)
+    cache.warm()
+    cache.entries["Area Kerja|HIRARC"]['updated'] -= cache.refresh_interval + 1
+
+    assert cache.is_stale("Area Kerja", "HIRARC")
+    assert not cache.is_stale("Nomor SOP", "SOP Produksi")
+    assert cache.warm() == 1
+
+
+def test_repeated_answers_do_not_keep_a_pair_stale(inference_server, tmp_path):
+    inference_server.answer("fallback", "Contoh yang sama")
+    cache = SuggestionCache(HuggingFaceAPI(), tmp_path / "suggestions.json", pairs=PAIRS[:1], variants=3)
+
+    assert cache.warm() == 1
+
+    assert cache.entries["Nomor SOP|SOP Produksi"]['variants'] == ["Contoh yang sama"]
+    assert not cache.is_stale("Nomor SOP", "SOP Produksi")
+    assert cache.warm() == 0
+    assert len(inference_server.requests) == 3
+
+
+def test_pair_answered_by_a_click_is_still_warmed(inference_server, suggestions, tmp_path):
+    cache = SuggestionCache(HuggingFaceAPI(), tmp_path / "suggestions.json", pairs=PAIRS[:1], variants=2)
+    cache.get("Nomor SOP", "SOP Produksi")
+
+    assert cache.is_stale("Nomor SOP", "SOP Produksi")
+    assert cache.warm() == 1
+    assert len(cache.entries["Nomor SOP|SOP Produksi"]['variants']) == 2
+
+
+def test_concurrent_saves_leave_no_temp_files(tmp_path):
+    cache = SuggestionCache(None, tmp_path / "suggestions.json", pairs=PAIRS)
+    cache.entries = {"Nomor SOP|SOP Produksi": {'variants': ["Contoh"], 'updated': time.time()}}
+
+    threads = [threading.Thread(target=cache._save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["suggestions.json"]
+    assert json.loads((tmp_path / "suggestions.json").read_text(encoding='utf-8')) == cache.entries
+
+
+def test_unanswered_model_keeps_old_variants(inference_server, suggestions, tmp_path):
+    cache = SuggestionCache(HuggingFaceAPI(), tmp_path / "suggestions.json", pairs=PAIRS, variants=1)
+    cache.warm()
+    inference_server.fail("fallback", 400)
+
+    assert cache.warm(force=True) == 0
+    assert cache.get("Nomor SOP", "SOP Produksi") == "Contoh Nomor SOP 1"
+    assert cache.get("Judul SOP", "SOP Produksi") == "Example Judul SOP"
+
+
+def test_no_background_warm_up_without_an_api_key(inference_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(suggestion_cache, '_CACHE', None)
+    monkeypatch.setenv('AI_SUGGESTIONS_PATH', str(tmp_path / "suggestions.json"))
+    monkeypatch.setenv('HUGGINGFACE_API_KEY', "")
+
+    cache = start_suggestion_cache(HuggingFaceAPI())
+
+    assert cache._thread is None
+    assert start_suggestion_cache(HuggingFaceAPI()) is cache
+
+
+def test_background_thread_warms_at_startup(inference_server, suggestions, tmp_path):
+    cache = SuggestionCache(HuggingFaceAPI(), tmp_path / "suggestions.json", pairs=PAIRS, variants=2)
+
+    cache.start()
+    try:
+        deadline = time.monotonic() + 5
+        while any(cache.is_stale(*pair) for pair in PAIRS) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        cache.stop()
+
+    assert not any(cache.is_stale(*pair) for pair in PAIRS)
+    assert cache.last_error is None
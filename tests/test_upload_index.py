@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+
+from logic.file_storage import FileStorage
+
+
+def test_list_and_info_come_from_the_index(upload_path, make_upload, monkeypatch):
+    storage = FileStorage()
+    hirarc = storage.save_file(make_upload(), "HIRARC", record_id="record-a")
+    audit = storage.save_file(make_upload(body=b"audit"), "Audit Internal")
+
+    def no_walk(*args, **kwargs):
+        raise AssertionError("upload tree walked")
+
+    monkeypatch.setattr(Path, 'rglob', no_walk)
+    monkeypatch.setattr(Path, 'stat', no_walk)
+    monkeypatch.setattr(os, 'scandir', no_walk)
+
+    assert storage.list_files() == sorted([audit, hirarc])
+    assert storage.list_files("Audit Internal") == [audit]
+    info = storage.get_file_info(hirarc)
+    assert info['name'] == Path(hirarc).name
+    assert info['size'] == len(make_upload().getvalue())
+    assert info['record_id'] == "record-a"
+    assert storage.get_file_info("HIRARC/tidak_ada.pdf") is None
+
+
+def test_move_file_updates_the_index(upload_path, make_upload):
+    storage = FileStorage()
+    relative_path = storage.save_file(make_upload(), "HIRARC", record_id="record-a")
+
+    new_path = storage.move_file(relative_path, "Audit Internal")
+
+    assert new_path == f"Audit_Internal/{Path(relative_path).name}"
+    assert storage.list_files("HIRARC") == []
+    assert storage.list_files("Audit Internal") == [new_path]
+    assert storage.get_file_info(new_path)['record_id'] == "record-a"
+    assert storage.read_file(new_path).startswith(b"%PDF")
+    assert storage.move_file("HIRARC/tidak_ada.pdf", "Audit Internal") is None
+
+
+def test_reconcile_rebuilds_the_index_from_disk(upload_path, make_upload):
+    storage = FileStorage()
+    kept = storage.save_file(make_upload(), "HIRARC", record_id="record-a")
+    removed = storage.save_file(make_upload(body=b"hilang"), "HIRARC")
+    # Changed behind the index's back: one file deleted, one copied in by hand
+    (upload_path / removed).unlink()
+    (upload_path / "HIRARC" / "manual.pdf").write_bytes(make_upload(body=b"manual").getvalue())
+
+    result = storage.reconcile_index()
+
+    assert storage.list_files() == sorted([kept, "HIRARC/manual.pdf"])
+    # Unchanged files keep their checksum and record, only the new one is hashed
+    assert result['hashed'] == 1
+    assert result['blobs_removed'] == 1
+    assert storage.get_file_info(kept)['record_id'] == "record-a"
+    assert storage.get_storage_stats()['blobs'] == 2
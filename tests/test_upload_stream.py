@@ -0,0 +1,76 @@
+import hashlib
+import io
+
+import pytest
+
+from logic.data_handler import DataHandler
+from logic.file_storage import FileStorage, UploadTooLargeError, stream_upload
+
+
+class ReadOnlyUpload:
+    """File-like object without readinto, recording the size of each read"""
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return self.data.read(size)
+
+
+def test_stream_upload_hashes_and_counts_across_chunks(tmp_path):
+    body = bytes(range(256)) * 41
+
+    temp_path, digest, size = stream_upload(io.BytesIO(body), tmp_path, chunk_size=1000)
+
+    assert temp_path.parent == tmp_path
+    assert temp_path.read_bytes() == body
+    assert digest == hashlib.sha256(body).hexdigest()
+    assert size == len(body)
+
+
+def test_stream_upload_reads_fixed_size_chunks(tmp_path):
+    body = b"x" * 2500
+    upload = ReadOnlyUpload(body)
+
+    temp_path, digest, size = stream_upload(upload, tmp_path, chunk_size=1000)
+
+    # Never asks for the whole upload at once
+    assert upload.reads == [1000, 1000, 1000, 1000]
+    assert temp_path.read_bytes() == body
+    assert size == 2500
+
+
+def test_stream_upload_rejects_oversized_upload_without_leftovers(tmp_path):
+    with pytest.raises(UploadTooLargeError):
+        stream_upload(io.BytesIO(b"x" * 2500), tmp_path, max_bytes=2000, chunk_size=1000)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_at_the_limit_is_accepted(tmp_path):
+    _, _, size = stream_upload(io.BytesIO(b"x" * 2000), tmp_path, max_bytes=2000, chunk_size=1000)
+
+    assert size == 2000
+
+
+def test_oversized_upload_is_neither_stored_nor_indexed(upload_path, make_upload, monkeypatch):
+    monkeypatch.setenv('MAX_UPLOAD_SIZE', '100')
+    handler = DataHandler()
+
+    with pytest.raises(UploadTooLargeError):
+        handler.save_uploaded_file(make_upload(body=b"x" * 200), "HIRARC")
+
+    assert handler.file_storage.list_files() == []
+    assert not list(handler.file_storage.blobs_dir.glob("upload_*"))
+
+
+def test_save_file_rewinds_a_read_upload(upload_path, make_upload):
+    storage = FileStorage()
+    upload = make_upload()
+    upload.read()
+
+    relative_path = storage.save_file(upload, "HIRARC")
+
+    assert storage.read_file(relative_path) == upload.getvalue()
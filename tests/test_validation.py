@@ -0,0 +1,96 @@
+import io
+import zipfile
+
+import pytest
+
+from logic.validation import SNIFF_HEAD_BYTES, SNIFF_TAIL_BYTES, FormValidator
+
+
+class CountingUpload(io.BytesIO):
+    """Upload that counts the bytes read from it"""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def upload(data, name="laporan.pdf"):
+    return CountingUpload(data, name)
+
+
+def docx_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", "<document/>")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def validator(monkeypatch):
+    monkeypatch.setenv('ALLOWED_FILE_TYPES', 'pdf')
+    monkeypatch.setenv('MAX_UPLOAD_SIZE', str(5 * 1024 * 1024))
+    return FormValidator()
+
+
+def test_valid_pdf_is_accepted(validator, make_upload):
+    assert validator.validate_file(make_upload()) == (True, "")
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"MZ\x90\x00 bukan pdf %%EOF", "File bukan PDF yang valid"),
+    (b"%PDF-1.4\nterpotong", "File PDF tidak lengkap atau rusak"),
+    (b"%PDF-1.4\ntrailer << /Encrypt 5 0 R >>\n%%EOF\n", "File PDF dilindungi password tidak dapat diproses"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1 ole", "Dokumen terenkripsi atau berformat lama tidak dapat diproses"),
+    (b"", "File kosong")
+])
+def test_bad_pdf_content_is_rejected(validator, data, message):
+    assert validator.validate_file(upload(data)) == (False, message)
+
+
+def test_only_head_and_tail_are_read(validator):
+    large = upload(b"%PDF-1.4\n" + b"x" * (2 * 1024 * 1024) + b"\n%%EOF\n")
+
+    assert validator.validate_file(large) == (True, "")
+    assert large.bytes_read == SNIFF_HEAD_BYTES + SNIFF_TAIL_BYTES
+    # Left ready for the streaming writer
+    assert large.tell() == 0
+
+
+def test_oversized_file_is_rejected_before_reading(validator, monkeypatch):
+    monkeypatch.setenv('MAX_UPLOAD_SIZE', '1024  # 1 KB')
+    large = upload(b"%PDF-1.4\n" + b"x" * 2048 + b"\n%%EOF\n")
+
+    is_valid, message = FormValidator().validate_file(large)
+
+    assert not is_valid
+    assert message.startswith("Ukuran file terlalu besar")
+    assert large.bytes_read == 0
+
+
+def test_allowed_file_types_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv('ALLOWED_FILE_TYPES', 'PDF, .docx')
+    validator = FormValidator()
+
+    assert validator.allowed_file_types == ['.pdf', '.docx']
+    assert validator.validate_file(upload(docx_bytes(), "prosedur.docx")) == (True, "")
+    assert validator.validate_file(upload(b"%PDF-1.4\n%%EOF\n", "prosedur.docx")) == \
+        (False, "File bukan dokumen Word yang valid")
+    is_valid, message = validator.validate_file(upload(b"teks", "catatan.txt"))
+    assert not is_valid
+    assert message.startswith("Format file tidak valid")
+
+
+def test_size_without_size_attribute_is_measured(validator):
+    data = io.BytesIO(b"%PDF-1.4\nisi\n%%EOF\n")
+    data.name = "laporan.pdf"
+
+    assert validator.validate_file(data) == (True, "")
+
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from logic.data_handler import DataHandler
+from logic.write_queue import FAILED, QUEUED, SAVED, WriteBehindQueue
+
+
+@pytest.fixture
+def queue(upload_path):
+    """Write-behind queue drained by hand instead of its background thread"""
+    return WriteBehindQueue(DataHandler(), linger=0)
+
+
+def test_submissions_are_committed_in_one_batch(queue, make_form, make_upload):
+    handler = queue.data_handler
+    submitted = [
+        queue.submit(make_form(nomor_sop=f"SOP-{i}"), make_upload(body=f"isi {i}".encode()))
+        for i in range(3)
+    ]
+    assert queue.status(submitted[0]['id'])['status'] == QUEUED
+    assert handler.get_entry(submitted[0]['id']) is None
+
+    commits = []
+    original = handler._commit_entries
+    handler._commit_entries = lambda entries: (commits.append(len(entries)), original(entries))
+
+    assert queue.drain() == 3
+    assert commits == [3]
+    assert queue.pending_count() == 0
+    assert not any(queue.spool_dir.iterdir())
+    for i, record in enumerate(submitted):
+        assert queue.status(record['id'])['status'] == SAVED
+        with open(handler.get_uploaded_file_path(handler.get_entry(record['id'])), 'rb') as f:
+            assert f.read().endswith(f"isi {i}\n%%EOF\n".encode())
+
+
+def test_intents_are_replayed_after_a_restart(queue, make_form):
+    record = queue.submit(make_form())
+
+    # A new process finds the intent on disk
+    restarted = WriteBehindQueue(DataHandler(), linger=0)
+    assert restarted.status(record['id'])['status'] == QUEUED
+    assert restarted.drain() == 1
+    assert restarted.status(record['id'])['status'] == SAVED
+    assert queue.status(record['id'])['status'] == SAVED
+
+
+def test_failed_commit_keeps_uploads_of_records_already_saved(queue, make_form, make_upload, monkeypatch):
+    handler = queue.data_handler
+    committed = queue.submit(make_form(nomor_sop="SOP-1"), make_upload(body=b"satu"))
+    pending = queue.submit(make_form(nomor_sop="SOP-2"), make_upload(body=b"dua"))
+
+    # Crash after the first record was committed but before its intent was removed
+    intent_path = next(queue.pending_dir.glob(f"*_{committed['id']}.json"))
+    intent = json.loads(intent_path.read_text(encoding='utf-8'))
+    queue._store_upload(intent)
+    handler._commit_entries([intent['record']])
+
+    def broken(entries):
+        raise OSError("disk penuh")
+
+    monkeypatch.setattr(handler, '_commit_entries', broken)
+    assert queue.drain() == 1
+
+    assert queue.status(committed['id'])['status'] == SAVED
+    saved_files = handler.file_storage.index.files_for_record(committed['id'])
+    assert len(saved_files) == 1
+    assert handler.file_storage.read_file(saved_files[0]).endswith(b"satu\n%%EOF\n")
+
+    status = queue.status(pending['id'])
+    assert status['status'] == FAILED
+    assert status['error'] == "disk penuh"
+    assert handler.file_storage.index.files_for_record(pending['id']) == []
+    assert queue.pending_count() == 0
+    assert not any(queue.spool_dir.iterdir())
+
+
+def test_write_behind_is_off_by_default(upload_path, monkeypatch, make_form):
+    monkeypatch.delenv('FORMS_WRITE_BEHIND')
+    handler = DataHandler()
+
+    assert handler.write_queue is None
+    record = handler.submit_form_entry(make_form())
+    assert handler.get_submission_status(record['id'])['status'] == SAVED
+
+
+def test_invalid_ids_are_refused_before_queueing(queue, make_form):
+    with pytest.raises(ValueError):
+        queue.submit({**make_form(), 'id': "../../forms"})
+
+    assert not any(queue.pending_dir.iterdir())